@@ -0,0 +1,628 @@
+import datetime as dt
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path, PosixPath
+from typing import Union
+
+from . import indexutils, ioutils, syncutils
+
+
+##############################################################
+################### Typed config views #######################
+##############################################################
+
+
+@dataclass(frozen=True)
+class PressureLocationConfig:
+    """
+    Settings of one location in the pressure section of the config file.
+    Elevations are converted to floats when the entry is read; that both are
+    given is checked when the pressure correction is calculated.
+    `raw_pressure_folders` are all the raw folders of the location, which may
+    contain a `{year}` placeholder (see `pressureutils.get_raw_pressure_folders`);
+    `raw_pressure_folder` is the first of them.
+    """
+    name: str
+    raw_pressure_folder: str
+    raw_file_extension: str
+    parsed_pressure_folder: str
+    start_date: dt.date
+    end_date: Union[dt.date, None] = None
+    use_pressure_correction_factor: bool = False
+    em27_m: Union[float, None] = None
+    pressure_sensor_m: Union[float, None] = None
+    workers: Union[int, None] = None
+    float_format: Union[str, None] = None
+    index_file: Union[str, None] = None
+    change_detection: str = 'stat'
+    incremental: bool = False
+    raw_file_pattern: Union[re.Pattern, None] = None
+    raw_file_format: Union[str, None] = None
+    raw_pressure_folders: tuple[str, ...] = ()
+    merge_raw_files: bool = False
+
+
+@dataclass(frozen=True)
+class SymlinkJobConfig:
+    """
+    Settings of one job in the symlinks section of the config file.
+    `link_name_pattern` and `link_name_template` give the names of links,
+    see `ioutils.compile_link_name_rule`. `link_mode` is how targets are
+    written in the link folder, one of `syncutils.LINK_MODES`. `depth`,
+    `include` and `exclude` mirror the tree of the target folders, see
+    `syncutils.list_targets`; a depth of None has no limit.
+    """
+    name: str
+    target_folders: tuple[str, ...]
+    link_folder: str
+    state_file: Union[str, None] = None
+    link_name_pattern: Union[re.Pattern, None] = None
+    link_name_template: Union[str, None] = None
+    link_mode: str = 'symlink'
+    depth: Union[int, None] = 1
+    include: tuple[str, ...] = ()
+    exclude: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class PipelineSettings:
+    """
+    Settings of the optional pipeline section of the config file, shared by
+    all locations. `workers` is the number of processes of the pool that
+    parses the files of all locations, default is the largest `workers` of
+    the locations. `location_workers` is the number of locations processed
+    at the same time.
+    """
+    workers: Union[int, None] = None
+    location_workers: int = 1
+
+
+PRESSURE_REQUIRED_KEYS: tuple[str, ...] = (
+    'raw_pressure_folder',
+    'raw_file_extension',
+    'parsed_pressure_folder',
+    'start_date'
+)
+SYMLINK_REQUIRED_KEYS: tuple[str, ...] = (
+    'target_folders',
+    'link_folder'
+)
+# jobs of EM27 instruments whose links were named by date before link names
+# could be configured: config files written for them that set no rule get
+# the date rule, see `check_link_name_rule`. New jobs set a link_name_template.
+LEGACY_DATE_NAMED_JOBS: tuple[str, ...] = ('SN039', 'SN081', 'SN122')
+
+
+##############################################################
+################# Parsed pipeline config #####################
+##############################################################
+
+
+class PipelineConfig:
+    """
+    Pipeline configuration parsed once from a YAML file.
+    Views of locations and jobs are validated the first time they are
+    requested and kept for later calls. Validation is done per location or
+    job, so an error in one entry does not prevent using the others.
+    """
+
+    def __init__(
+            self,
+            data: dict,
+            config_file_path: Union[str, PosixPath, None] = None
+    ) -> None:
+        if not isinstance(data, dict):
+            raise ValueError(
+                f'Config file {config_file_path} must contain a mapping of sections.'
+                f' Got {type(data)}.'
+            )
+        self.data: dict = data
+        self.path: Union[Path, None] = (
+            None if config_file_path is None else Path(config_file_path)
+        )
+        self._views: dict[tuple[str, str], Union[PressureLocationConfig, SymlinkJobConfig]] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f'PipelineConfig({self.path})'
+
+    def section(
+            self,
+            section: str
+    ) -> dict:
+        """
+        Returns the raw dictionary of a config section.
+        """
+        try:
+            config_section = self.data[section]
+        except KeyError:
+            raise KeyError(
+                f"Section '{section}' not found in config file {self.path}."
+            ) from None
+        if config_section is None:
+            return {}
+        if not isinstance(config_section, dict):
+            raise ValueError(
+                f"Section '{section}' in config file {self.path} must be a mapping."
+                f" Got {type(config_section)}."
+            )
+        return config_section
+
+    def section_keys(
+            self,
+            section: str
+    ) -> list:
+        """
+        Returns all the keys within a specific section, i.e. locations or jobs.
+        """
+        return list(self.section(section).keys())
+
+    def pressure_location(
+            self,
+            section: str,
+            location: str
+    ) -> PressureLocationConfig:
+        """
+        Returns the validated settings of a location in a pressure section.
+        """
+        return self._view(section, location, self._build_pressure_location)
+
+    def pipeline_settings(
+            self,
+            section: str = 'pipeline'
+    ) -> PipelineSettings:
+        """
+        Returns the validated settings of the pipeline section, or the
+        default settings if the config file has no such section.
+        """
+        if self.data.get(section) is None:
+            return PipelineSettings()
+        settings = self.section(section)
+        return PipelineSettings(
+            workers=check_workers(settings.get('workers'), section),
+            location_workers=check_workers(
+                settings.get('location_workers'), section, 'location_workers'
+            ) or 1
+        )
+
+    def symlink_job(
+            self,
+            section: str,
+            job_name: str
+    ) -> SymlinkJobConfig:
+        """
+        Returns the validated settings of a job in a symlinks section.
+        """
+        return self._view(section, job_name, self._build_symlink_job)
+
+    def _view(
+            self,
+            section: str,
+            key: str,
+            build
+    ) -> Union[PressureLocationConfig, SymlinkJobConfig]:
+        with self._lock:
+            if (section, key) not in self._views:
+                entry = self.section(section).get(key)
+                if not isinstance(entry, dict):
+                    raise ValueError(
+                        f"Entry '{key}' in section '{section}' of config file"
+                        f" {self.path} must be a mapping. Got {type(entry)}."
+                    )
+                self._views[(section, key)] = build(key, entry)
+            return self._views[(section, key)]
+
+    def _build_pressure_location(
+            self,
+            location: str,
+            entry: dict
+    ) -> PressureLocationConfig:
+        check_required_keys(entry, PRESSURE_REQUIRED_KEYS, location)
+        raw_pressure_folders = check_folder_list(
+            entry['raw_pressure_folder'], 'raw_pressure_folder', location
+        )
+        return PressureLocationConfig(
+            name=location,
+            raw_pressure_folder=raw_pressure_folders[0],
+            raw_file_extension=str(entry['raw_file_extension']),
+            parsed_pressure_folder=str(entry['parsed_pressure_folder']),
+            start_date=parse_config_date(entry['start_date'], 'start_date', location),
+            end_date=parse_config_date(entry.get('end_date'), 'end_date', location),
+            use_pressure_correction_factor=check_bool(
+                entry.get('use_pressure_correction_factor'),
+                'use_pressure_correction_factor',
+                location
+            ),
+            em27_m=check_float(entry.get('em27_m'), 'em27_m', location),
+            pressure_sensor_m=check_float(
+                entry.get('pressure_sensor_m'), 'pressure_sensor_m', location
+            ),
+            workers=check_workers(entry.get('workers'), location),
+            float_format=entry.get('float_format'),
+            index_file=(
+                None if entry.get('index_file') is None
+                else str(entry['index_file'])
+            ),
+            change_detection=check_change_detection(
+                entry.get('change_detection'), location
+            ),
+            incremental=check_incremental(
+                entry.get('incremental'), entry.get('index_file'), location
+            ),
+            raw_file_pattern=compile_raw_file_pattern(
+                entry.get('raw_file_pattern'),
+                str(entry['raw_file_extension']),
+                location
+            ),
+            raw_file_format=(
+                None if entry.get('raw_file_format') is None
+                else str(entry['raw_file_format'])
+            ),
+            raw_pressure_folders=raw_pressure_folders,
+            merge_raw_files=check_merge_raw_files(
+                entry.get('merge_raw_files'), entry.get('incremental'), location
+            )
+        )
+
+    def _build_symlink_job(
+            self,
+            job_name: str,
+            entry: dict
+    ) -> SymlinkJobConfig:
+        check_required_keys(entry, SYMLINK_REQUIRED_KEYS, job_name)
+        link_name_pattern, link_name_template = check_link_name_rule(
+            entry.get('link_name_pattern'),
+            entry.get('link_name_template'),
+            job_name
+        )
+        if (
+            job_name in LEGACY_DATE_NAMED_JOBS
+            and link_name_pattern is None
+            and link_name_template is None
+        ):
+            print(
+                f"* Job '{job_name}': links are named by date by default for this job,"
+                f" set link_name_template: '{ioutils.DIRNAME_TEMPLATE}' in the config file."
+            )
+            link_name_template = ioutils.DIRNAME_TEMPLATE
+        return SymlinkJobConfig(
+            name=job_name,
+            target_folders=check_folder_list(
+                entry['target_folders'], 'target_folders', job_name
+            ),
+            link_folder=str(entry['link_folder']),
+            state_file=(
+                None if entry.get('state_file') is None
+                else str(entry['state_file'])
+            ),
+            link_name_pattern=link_name_pattern,
+            link_name_template=link_name_template,
+            link_mode=check_link_mode(entry.get('link_mode'), job_name),
+            depth=check_depth(entry.get('depth'), job_name),
+            include=check_pattern_list(entry.get('include'), 'include', job_name),
+            exclude=check_pattern_list(entry.get('exclude'), 'exclude', job_name)
+        )
+
+
+def check_required_keys(
+        entry: dict,
+        required_keys: tuple[str, ...],
+        name: str
+) -> None:
+    """
+    Raises a ValueError if a required key is missing or empty in a config entry.
+    """
+    missing_keys = [
+        key for key in required_keys
+        if entry.get(key) is None
+    ]
+    if missing_keys:
+        raise ValueError(
+            f"Missing required config value(s) for '{name}': {', '.join(missing_keys)}."
+        )
+
+
+def check_folder_list(
+        value: Union[str, list],
+        key: str,
+        name: str
+) -> tuple[str, ...]:
+    """
+    Checks a config value that is a folder or a list of folders and
+    returns the folders.
+    """
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not value:
+        raise ValueError(
+            f"{key} of '{name}' must be a folder or a list of folders."
+            f" Got {type(value)}."
+        )
+    return tuple(str(folder) for folder in value)
+
+
+def check_link_name_rule(
+        pattern: Union[str, None],
+        template: Union[str, None],
+        name: str
+) -> tuple[Union[re.Pattern, None], Union[str, None]]:
+    """
+    Checks the link_name_pattern and link_name_template config values of a
+    symlink job and returns them, the pattern compiled.
+    Empty values return None.
+    """
+    if pattern is None and template is None:
+        return None, None
+    try:
+        ioutils.compile_link_name_rule(
+            None if pattern is None else str(pattern),
+            None if template is None else str(template)
+        )
+    except ValueError as e:
+        raise ValueError(
+            f"Config value link_name_pattern or link_name_template for '{name}': {e}"
+        ) from None
+    return (
+        None if pattern is None else re.compile(str(pattern)),
+        None if template is None else str(template)
+    )
+
+
+def check_link_mode(
+        value: Union[str, None],
+        name: str
+) -> str:
+    """
+    Checks the link_mode config value of a symlink job and returns it.
+    Empty values return 'symlink'.
+    """
+    if value is None:
+        return 'symlink'
+    try:
+        return syncutils.check_link_mode(str(value))
+    except ValueError as e:
+        raise ValueError(f"Config value link_mode for '{name}': {e}") from None
+
+
+def check_depth(
+        value: Union[int, str, None],
+        name: str
+) -> Union[int, None]:
+    """
+    Checks the depth config value of a symlink job: a positive number or
+    'all', returned as None. Empty values return 1.
+    """
+    if value is None:
+        return 1
+    if value == 'all':
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(
+            f"Config value depth for '{name}' must be a positive number or 'all'."
+            f" Got '{value}'."
+        )
+    return value
+
+
+def check_pattern_list(
+        value: Union[str, list, None],
+        key: str,
+        name: str
+) -> tuple[str, ...]:
+    """
+    Checks a config value that is a pattern or a list of patterns and
+    returns the patterns. Empty values return no patterns.
+    """
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        raise ValueError(
+            f"{key} of '{name}' must be a pattern or a list of patterns."
+            f" Got {type(value)}."
+        )
+    return tuple(str(pattern) for pattern in value)
+
+
+def check_bool(
+        value: Union[bool, None],
+        key: str,
+        name: str
+) -> bool:
+    """
+    Checks a config value that is True or False. Empty values return False.
+    """
+    if value is None:
+        return False
+    if not isinstance(value, bool):
+        raise ValueError(
+            f"Config value {key} for '{name}' must be True, False or empty."
+            f" Got '{value}'."
+        )
+    return value
+
+
+def check_float(
+        value: Union[float, int, str, None],
+        key: str,
+        name: str
+) -> Union[float, None]:
+    """
+    Checks a config value that is a number, e.g. an elevation in m, and
+    returns it as a float. Numbers written as strings are accepted.
+    Empty values return None.
+    """
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"Config value {key} for '{name}' must be a number or empty."
+            f" Got '{value}'."
+        ) from None
+
+
+def check_workers(
+        value: Union[int, str, None],
+        name: str,
+        key: str = 'workers'
+) -> Union[int, None]:
+    """
+    Checks a workers config value, or another number of workers given by
+    `key`: a positive whole number, also accepted written as a string.
+    Empty values return None.
+    """
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        workers = int(str(value))
+    except ValueError:
+        workers = 0
+    if workers < 1:
+        raise ValueError(
+            f"Config value {key} for '{name}' must be a positive integer."
+            f" Got '{value}'."
+        )
+    return workers
+
+
+def check_change_detection(
+        value: Union[str, None],
+        name: str
+) -> str:
+    """
+    Checks a change_detection config value. Empty values return 'stat'.
+    """
+    if value is None:
+        return 'stat'
+    try:
+        return indexutils.check_change_detection(str(value))
+    except ValueError as e:
+        raise ValueError(f"Config value change_detection for '{name}': {e}") from None
+
+
+def check_incremental(
+        value: Union[bool, None],
+        index_file: Union[str, None],
+        name: str
+) -> bool:
+    """
+    Checks an incremental config value. Incremental parsing records its
+    progress in the processing index, so it requires an index_file.
+    Empty values return False.
+    """
+    if value is None:
+        return False
+    if not isinstance(value, bool):
+        raise ValueError(
+            f"Config value incremental for '{name}' must be True, False or empty."
+            f" Got '{value}'."
+        )
+    if value and index_file is None:
+        raise ValueError(
+            f"Config value incremental for '{name}' requires an index_file."
+        )
+    return value
+
+
+def check_merge_raw_files(
+        value: Union[bool, None],
+        incremental: Union[bool, None],
+        name: str
+) -> bool:
+    """
+    Checks a merge_raw_files config value. Merged files are parsed again as a
+    whole, so merging cannot be combined with incremental parsing.
+    Empty values return False.
+    """
+    if value is None:
+        return False
+    if not isinstance(value, bool):
+        raise ValueError(
+            f"Config value merge_raw_files for '{name}' must be True, False or empty."
+            f" Got '{value}'."
+        )
+    if value and incremental:
+        raise ValueError(
+            f"Config value merge_raw_files for '{name}' cannot be combined with incremental."
+        )
+    return value
+
+
+def compile_raw_file_pattern(
+        value: Union[str, None],
+        raw_file_extension: str,
+        name: str
+) -> Union[re.Pattern, None]:
+    """
+    Compiles a raw_file_pattern config value, a regular expression with the
+    named groups year, month and day, see `ioutils.compile_filename_patterns`.
+    Empty values return None.
+    """
+    if value is None:
+        return None
+    try:
+        return ioutils.compile_filename_patterns(
+            {raw_file_extension: str(value)}
+        )[raw_file_extension]
+    except ValueError as e:
+        raise ValueError(f"Config value raw_file_pattern for '{name}': {e}") from None
+
+
+def parse_config_date(
+        value: Union[str, dt.date, None],
+        key: str,
+        name: str
+) -> Union[dt.date, None]:
+    """
+    Parses a yyyy-mm-dd config value into a date. YAML may already
+    have loaded unquoted dates as date objects. Empty values return None.
+    """
+    if value is None or isinstance(value, dt.date):
+        return value
+    try:
+        return dt.datetime.strptime(str(value), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(
+            f"Config value {key} for '{name}' must be in format yyyy-mm-dd. Got '{value}'."
+        ) from None
+
+
+##############################################################
+##################### Loading config #########################
+##############################################################
+
+_CONFIG_CACHE: dict[tuple[Path, int, int], PipelineConfig] = {}
+_CONFIG_CACHE_LOCK = threading.Lock()
+
+
+def load_config(
+        config: Union[str, PosixPath, PipelineConfig]
+) -> PipelineConfig:
+    """
+    Returns the parsed config of a YAML config file.
+    The file is only read again if its path, modification time or size change.
+    A PipelineConfig is returned unchanged, so functions can take either a
+    config object or a config file path.
+    """
+    if isinstance(config, PipelineConfig):
+        return config
+    config_file_path = Path(config).resolve()
+    stat = config_file_path.stat()
+    key = (config_file_path, stat.st_mtime_ns, stat.st_size)
+    with _CONFIG_CACHE_LOCK:
+        if key not in _CONFIG_CACHE:
+            for cached_key in [k for k in _CONFIG_CACHE if k[0] == config_file_path]:
+                del _CONFIG_CACHE[cached_key]
+            _CONFIG_CACHE[key] = PipelineConfig(
+                ioutils.read_yaml_config(config_file_path),
+                config_file_path
+            )
+        return _CONFIG_CACHE[key]
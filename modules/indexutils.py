@@ -0,0 +1,318 @@
+import datetime as dt
+import hashlib
+import os
+import sqlite3
+from pathlib import Path, PosixPath
+from typing import Iterable, NamedTuple, Union
+
+PENDING: str = 'pending'
+PARSED: str = 'parsed'
+FAILED: str = 'failed'
+STATUSES: tuple[str, ...] = (PENDING, PARSED, FAILED)
+CHANGE_DETECTION_MODES: tuple[str, ...] = ('none', 'stat', 'hash')
+HASH_CHUNK_SIZE: int = 1024*1024
+# number of bytes before the byte offset of a raw file parsed incrementally
+# that are compared to tell appended lines from a rewritten file, see `parsed_part_hash`
+PARSED_PART_CHECK_SIZE: int = 64*1024
+# columns added after the first version of the index, added to older index files
+ADDED_COLUMNS: dict[str, str] = {
+    'content_hash': 'TEXT',
+    'byte_offset': 'INTEGER',
+    'last_timestamp': 'TEXT',
+    'parsed_hash': 'TEXT'
+}
+
+
+class IndexEntry(NamedTuple):
+    """
+    A raw file recorded in a processing index.
+    """
+    raw_name: str
+    raw_path: str
+    file_date: dt.date
+    size: int
+    mtime_ns: int
+    output_path: Union[str, None]
+    status: str
+    content_hash: Union[str, None] = None
+    byte_offset: Union[int, None] = None
+    last_timestamp: Union[str, None] = None
+    parsed_hash: Union[str, None] = None
+
+
+class ProcessingIndex:
+    """
+    Local SQLite record of the raw files of a location: raw path, date, size,
+    modification time, output path and processing status. For incremental
+    parsing, the number of bytes and the last timestamp parsed, and a hash of
+    the part parsed, are recorded too. Keeping this record
+    avoids listing the parsed folder and comparing dates on every run.
+    Use as a context manager to commit and close the database.
+    """
+
+    def __init__(
+            self,
+            index_file_path: Union[str, PosixPath]
+    ) -> None:
+        self.path: Path = Path(index_file_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS raw_files ('
+            ' raw_name TEXT PRIMARY KEY,'
+            ' raw_path TEXT NOT NULL,'
+            ' file_date TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' output_path TEXT,'
+            ' status TEXT NOT NULL,'
+            ' content_hash TEXT,'
+            ' byte_offset INTEGER,'
+            ' last_timestamp TEXT,'
+            ' parsed_hash TEXT'
+            ')'
+        )
+        columns = [
+            row[1] for row in self._connection.execute('PRAGMA table_info(raw_files)')
+        ]
+        for column, column_type in ADDED_COLUMNS.items():
+            if column not in columns:
+                self._connection.execute(
+                    f'ALTER TABLE raw_files ADD COLUMN {column} {column_type}'
+                )
+
+    def __enter__(self) -> 'ProcessingIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Commits changes and closes the database.
+        """
+        self._connection.commit()
+        self._connection.close()
+
+    def entries(self) -> dict[str, IndexEntry]:
+        """
+        Returns all recorded raw files by raw file name.
+        """
+        return {
+            row[0]: IndexEntry(
+                row[0], row[1], dt.date.fromisoformat(row[2]), *row[3:]
+            )
+            for row in self._connection.execute(
+                'SELECT raw_name, raw_path, file_date, size, mtime_ns,'
+                ' output_path, status, content_hash, byte_offset, last_timestamp,'
+                ' parsed_hash FROM raw_files'
+            )
+        }
+
+    def add(
+            self,
+            entries: Iterable[IndexEntry]
+    ) -> None:
+        """
+        Records raw files, replacing existing records of the same names.
+        """
+        self._connection.executemany(
+            'INSERT OR REPLACE INTO raw_files'
+            ' (raw_name, raw_path, file_date, size, mtime_ns, output_path, status,'
+            ' content_hash, byte_offset, last_timestamp, parsed_hash)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                (e.raw_name, e.raw_path, e.file_date.isoformat(), e.size,
+                 e.mtime_ns, e.output_path, check_status(e.status), e.content_hash,
+                 e.byte_offset, e.last_timestamp, e.parsed_hash)
+                for e in entries
+            )
+        )
+
+    def remove(
+            self,
+            raw_names: Iterable[str]
+    ) -> None:
+        """
+        Removes the records of raw files, e.g. of deleted files.
+        """
+        self._connection.executemany(
+            'DELETE FROM raw_files WHERE raw_name = ?',
+            ((name,) for name in raw_names)
+        )
+
+    def set_status(
+            self,
+            file_date: dt.date,
+            status: str,
+            output_path: Union[str, PosixPath, None] = None
+    ) -> None:
+        """
+        Updates the status and output path of the raw files of a date after
+        processing. Their size, modification time and content hash are left as
+        recorded before processing (see `pressureutils.update_processing_index`),
+        so that lines written to a raw file while it was processed are found
+        as a change by the next run.
+        """
+        check_status(status)
+        self._connection.execute(
+            'UPDATE raw_files SET status = ?, output_path = ? WHERE file_date = ?',
+            (
+                status,
+                None if output_path is None else str(output_path),
+                file_date.isoformat()
+            )
+        )
+
+    def set_progress(
+            self,
+            raw_path: Union[str, PosixPath],
+            byte_offset: int,
+            last_timestamp: Union[str, None],
+            parsed_hash: Union[str, None] = None
+    ) -> None:
+        """
+        Records up to which byte and timestamp a raw file was parsed
+        incrementally, see `pressureutils.append_pressure_file`, and the
+        `parsed_part_hash` of the part parsed.
+        """
+        self._connection.execute(
+            'UPDATE raw_files SET byte_offset = ?, last_timestamp = ?, parsed_hash = ?'
+            ' WHERE raw_path = ?',
+            (byte_offset, last_timestamp, parsed_hash, str(raw_path))
+        )
+
+    def clear(self) -> None:
+        """
+        Removes all records, e.g. to rebuild the index from the folders.
+        """
+        self._connection.execute('DELETE FROM raw_files')
+
+
+def check_status(
+        status: str
+) -> str:
+    """
+    Returns status if it is a valid status, else raises a ValueError.
+    """
+    if status not in STATUSES:
+        raise ValueError(
+            f"Index status must be one of {', '.join(STATUSES)}. Got '{status}'."
+        )
+    return status
+
+
+def check_change_detection(
+        mode: str
+) -> str:
+    """
+    Returns mode if it is a valid change detection mode, else raises a ValueError.
+    """
+    if mode not in CHANGE_DETECTION_MODES:
+        raise ValueError(
+            f"Change detection must be one of {', '.join(CHANGE_DETECTION_MODES)}."
+            f" Got '{mode}'."
+        )
+    return mode
+
+
+def file_hash(
+        file_path: Union[str, PosixPath]
+) -> str:
+    """
+    Returns a BLAKE2b hash of the content of a file, read in chunks.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_changed(
+        entry: IndexEntry,
+        stat: os.stat_result,
+        mode: str = 'stat'
+) -> bool:
+    """
+    Checks if a raw file changed since it was recorded in the index.
+    'stat' compares size and modification time. 'hash' also compares the
+    content hash when only the modification time differs, so files that
+    were touched or copied without changes are not counted as changed.
+    'none' never counts files as changed.
+    A file that is smaller than the part parsed incrementally, or whose part
+    parsed incrementally differs from the one recorded, always counts as
+    changed, see `is_appended`.
+    """
+    if entry.byte_offset is not None and stat.st_size < entry.byte_offset:
+        return True
+    if check_change_detection(mode) == 'none':
+        return (
+            entry.byte_offset is not None
+            and stat.st_size > entry.byte_offset
+            and not is_parsed_part_unchanged(entry, mode)
+        )
+    if stat.st_size != entry.size:
+        return True
+    if stat.st_mtime_ns == entry.mtime_ns:
+        return False
+    if mode == 'hash' and entry.content_hash is not None:
+        return file_hash(entry.raw_path) != entry.content_hash
+    return True
+
+
+def is_appended(
+        entry: IndexEntry,
+        stat: os.stat_result,
+        mode: str = 'stat'
+) -> bool:
+    """
+    Checks if a raw file parsed incrementally is larger than the part
+    that was parsed, and that part is unchanged (see `is_parsed_part_unchanged`),
+    i.e. if lines were appended since it was parsed. A file replaced by a
+    larger version, e.g. with corrected values, is not appended.
+    """
+    return (
+        entry.byte_offset is not None
+        and stat.st_size > entry.byte_offset
+        and is_parsed_part_unchanged(entry, mode)
+    )
+
+
+def is_parsed_part_unchanged(
+        entry: IndexEntry,
+        mode: str = 'stat'
+) -> bool:
+    """
+    Checks if the part of a raw file parsed incrementally has the
+    `parsed_part_hash` recorded after parsing. Records without a hash, e.g.
+    from older index files, count as unchanged.
+    """
+    if entry.parsed_hash is None:
+        return True
+    try:
+        return parsed_part_hash(entry.raw_path, entry.byte_offset, mode) == entry.parsed_hash
+    except OSError:
+        return False
+
+
+def parsed_part_hash(
+        file_path: Union[str, PosixPath],
+        byte_offset: int,
+        mode: str = 'stat'
+) -> str:
+    """
+    Returns a BLAKE2b hash of the part of a raw file parsed incrementally, its
+    first `byte_offset` bytes. With 'hash' change detection the whole part is
+    read, otherwise only its last `PARSED_PART_CHECK_SIZE` bytes, so that a
+    check reads one block of a growing file.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        if check_change_detection(mode) != 'hash':
+            file.seek(max(byte_offset - PARSED_PART_CHECK_SIZE, 0))
+        remaining = byte_offset - file.tell()
+        while remaining > 0 and (chunk := file.read(min(HASH_CHUNK_SIZE, remaining))):
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
@@ -1,7 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+import fnmatch
+import os
+import re
 import shutil
 import datetime as dt
 from pathlib import Path, PosixPath
-from typing import List, Union
+from typing import Callable, Iterable, List, Union
 
 import yaml
 
@@ -75,28 +79,91 @@ def get_file_extension(
 
 def read_file_names(
         folder_path: Union[str, PosixPath],
+        pattern: Union[str, re.Pattern, None] = None,
         v: bool = False
 ) -> List[str]:
     """
     Returns a list of names of files in a folder.
+    If `pattern` is given, only names matching it are returned. It is either a
+    glob pattern, e.g. '*.lst', or a compiled regular expression matched from
+    the start of the name. Names are filtered before the entry type is checked.
+    The folder is listed with `os.scandir`, which gets the type of entries from
+    the directory listing, so no stat call is made per file except for symlinks.
     """
     # TODO: handle case where folder doesn't exits
     # (current behaviour: returns an empty array, folder is created later)
     if v:
         print(f'Reading file names from {folder_path}')
-    file_names = [
-        file.name for file in Path(folder_path).glob('*')
-        if not file.is_dir()
-    ]
+    if isinstance(pattern, str):
+        pattern = re.compile(fnmatch.translate(pattern))
+    try:
+        with os.scandir(folder_path) as entries:
+            file_names = [
+                entry.name for entry in entries
+                if (pattern is None or pattern.match(entry.name))
+                and not entry.is_dir()
+            ]
+    except FileNotFoundError:
+        file_names = []
     if v:
         print(file_names)
     return file_names
 
 
+def read_file_folders(
+        folder_paths: Iterable[Union[str, PosixPath]],
+        pattern: Union[str, re.Pattern, None] = None,
+        v: bool = False
+) -> dict[str, Path]:
+    """
+    Returns the folder of each file in several folders by file name, e.g. of
+    the raw folders of a location split by year. The folders are listed with
+    `read_file_names` in parallel threads, which overlap the time spent waiting
+    on the file system, e.g. on network mounts. A name found in more than one
+    folder is given the first of these folders. Paths are not built here, as
+    building one per file takes longer than listing the folders.
+    """
+    folder_paths = [Path(folder_path) for folder_path in folder_paths]
+    if len(folder_paths) > 1:
+        with ThreadPoolExecutor(max_workers=len(folder_paths)) as executor:
+            listings = list(executor.map(
+                lambda folder_path: read_file_names(folder_path, pattern=pattern, v=v),
+                folder_paths
+            ))
+    else:
+        listings = [
+            read_file_names(folder_path, pattern=pattern, v=v)
+            for folder_path in folder_paths
+        ]
+    file_folders: dict[str, Path] = {}
+    for folder_path, file_names in zip(folder_paths, listings):
+        for file_name in file_names:
+            file_folders.setdefault(file_name, folder_path)
+    return file_folders
+
+
 ##############################################################
 ############## Working with file name dates ##################
 ##############################################################
 
+# File name formats by file type. Patterns are matched against the whole file
+# name and have the named groups year, month and day. A 2 digit year is 20yy.
+FILENAME_DATE_PATTERNS: dict[str, re.Pattern] = {
+    # aws_yyyymmdd.lst
+    'lst': re.compile(r'[^_.]*_(?P<year>\d{4})(?P<month>\d{2})(?P<day>\d{2})\.lst'),
+    # yymmdd_PTU300_log.txt or yymmdd_PTU300_error_log.txt
+    'txt': re.compile(r'(?P<year>\d{2})(?P<month>\d{2})(?P<day>\d{2})_[^.]*\.txt'),
+    # <prefix>-<location>-yyyymmdd.csv
+    'csv': re.compile(r'[^-.]*-[^.]*-(?P<year>\d{4})(?P<month>\d{2})(?P<day>\d{2})\.csv')
+}
+DATE_GROUPS: tuple[str, ...] = ('year', 'month', 'day')
+# File names of a date by file type, formatted with `str.format`
+FILENAME_TEMPLATES: dict[str, str] = {
+    'lst': 'aws_{date:%Y%m%d}.lst',
+    'txt': '{date:%y%m%d}_PTU300_log.txt',
+    'csv': 'pressure-{location}-{date:%Y%m%d}.csv'
+}
+
 
 def generate_file_list_from_dates(
         date_list: Union[list, set],
@@ -133,32 +200,26 @@ def generate_fname_from_date(
         v: bool = False
 ) -> str:
     """
-    Generates a filename from a date
-    """
-    # TODO: generates from given filename
-    # filename format is not hard coded
-    if file_type == 'lst':
-        # aws_yyyymmdd.lst
-        date_string = date.strftime("%Y%m%d")
-        file_name = f'aws_{date_string}.lst'
-    elif file_type == 'txt':
-        # yymmdd_PTU300_log.txt
-        date_string = date.strftime("%y%m%d")
-        file_name = f'{date_string}_PTU300_log.txt'
-    elif file_type == 'csv':
-        # prefix-<location>-yyyymmdd.csv
-        date_string = date.strftime("%Y%m%d")
-        if location is not None:
-            file_name = f'pressure-{location}-{date_string}.csv'
-        else:
-            raise ValueError(
-                'Sensor location value needed for generating csv file name.'
-            )
-    else:
+    Generates a filename from a date with the template of the file type
+    in `FILENAME_TEMPLATES`.
+    """
+    try:
+        template = FILENAME_TEMPLATES[file_type]
+    except KeyError:
         raise ValueError(
             f'Pressure file type \'{file_type}\' not supported.'
             ' Supported types: .lst, .txt, .csv'
+        ) from None
+    if location is None and '{location}' in template:
+        raise ValueError(
+            'Sensor location value needed for generating csv file name.'
         )
+    try:
+        file_name = template.format(date=date, location=location)
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError(
+            f'A date is needed for generating a file name. Got {date}.'
+        ) from None
     if v:
         print(
             f'file name from date: {file_name}'
@@ -170,38 +231,185 @@ def generate_date_list_from_folder(
         folder_path: Union[str, PosixPath],
         start_date: dt.date,
         end_date: dt.date,
+        pattern: Union[str, re.Pattern, None] = None,
+        patterns: Union[dict[str, re.Pattern], None] = None,
         v: bool = False,
         vv: bool = False
 ) -> List[dt.date]:
     """
     Generates a list of date objects from a folder containing
-    file names that include the date.
+    file names that include the date, once per file.
+    See `generate_date_map_from_folder`.
     """
-    file_names = read_file_names(folder_path, v=v)
-    date_list = []
-    for f in file_names:
-        try:
-            d = extract_date_from_fname(f)
-            if timeutils.date_in_range(
-                d, start_date=start_date, end_date=end_date
-            ):
-                date_list.append(d)
-            if vv:
-                print(f'file\'{f}\': {d} date extracted.')
-        except Exception as e:
+    date_map = generate_date_map_from_folder(
+        folder_path,
+        start_date=start_date,
+        end_date=end_date,
+        pattern=pattern,
+        patterns=patterns,
+        v=v,
+        vv=vv
+    )
+    return [d for d, names in date_map.items() for _ in names]
+
+
+def generate_date_map_from_folder(
+        folder_path: Union[str, PosixPath],
+        start_date: dt.date,
+        end_date: dt.date,
+        pattern: Union[str, re.Pattern, None] = None,
+        patterns: Union[dict[str, re.Pattern], None] = None,
+        v: bool = False,
+        vv: bool = False
+) -> dict[dt.date, List[str]]:
+    """
+    Maps the dates in the file names of a folder, from start_date to end_date,
+    to the sorted names of the files of each date. Dates are sorted.
+    `pattern` is passed to `read_file_names`, so that only candidate
+    file names, e.g. '*.lst', are parsed for dates. Dates are parsed with
+    `parse_date_from_fname` and `patterns`; other names are skipped.
+    """
+    return {
+        d: [file_path.name for file_path in file_paths]
+        for d, file_paths in generate_date_map_from_folders(
+            [folder_path],
+            start_date=start_date,
+            end_date=end_date,
+            pattern=pattern,
+            patterns=patterns,
+            v=v,
+            vv=vv
+        ).items()
+    }
+
+
+def generate_date_map_from_folders(
+        folder_paths: Iterable[Union[str, PosixPath]],
+        start_date: dt.date,
+        end_date: dt.date,
+        pattern: Union[str, re.Pattern, None] = None,
+        patterns: Union[dict[str, re.Pattern], None] = None,
+        v: bool = False,
+        vv: bool = False
+) -> dict[dt.date, List[Path]]:
+    """
+    Like `generate_date_map_from_folder` for several folders listed with
+    `read_file_folders`, mapping dates to the paths of their files sorted by
+    file name.
+    """
+    file_folders = read_file_folders(folder_paths, pattern=pattern, v=v)
+    date_map: dict[dt.date, List[Path]] = {}
+    for f in sorted(file_folders):
+        d = parse_date_from_fname(f, patterns)
+        if d is None:
             if v:
-                print(f'* file\'{f}\': {e}')
-    return sorted(date_list)
+                print(f'* file\'{f}\': no date in file name.')
+            continue
+        if vv:
+            print(f'file\'{f}\': {d} date extracted.')
+        if timeutils.date_in_range(
+            d, start_date=start_date, end_date=end_date
+        ):
+            date_map.setdefault(d, []).append(file_folders[f]/f)
+    return dict(sorted(date_map.items()))
+
+
+def generate_date_map_from_dates(
+        folder_path: Union[str, PosixPath],
+        start_date: dt.date,
+        end_date: dt.date,
+        template: str,
+        location: Union[str, None] = None,
+        v: bool = False
+) -> dict[dt.date, List[str]]:
+    """
+    Like `generate_date_map_from_folder`, but instead of listing the folder,
+    the file name of each date from start_date to end_date is built with
+    `template` (see `FILENAME_TEMPLATES`) and checked to exist. This is faster
+    than listing for a short range of dates in a large folder, but only files
+    named after the template are found.
+    """
+    folder_path = Path(folder_path)
+    date_map: dict[dt.date, List[str]] = {}
+    for day in range((end_date - start_date).days + 1):
+        d = start_date + dt.timedelta(days=day)
+        file_name = template.format(date=d, location=location)
+        if (folder_path/file_name).is_file():
+            date_map[d] = [file_name]
+        elif v:
+            print(f'* file\'{file_name}\' not found.')
+    return date_map
+
+
+def compile_filename_patterns(
+        patterns: Union[dict[str, Union[str, re.Pattern, None]], None] = None
+) -> dict[str, re.Pattern]:
+    """
+    Returns the file name formats of `FILENAME_DATE_PATTERNS` with the
+    patterns given by file type added or replaced, e.g. from a config file.
+    Raises a ValueError if a pattern is not a valid regular expression
+    or does not have the named groups year, month and day.
+    """
+    compiled_patterns = dict(FILENAME_DATE_PATTERNS)
+    for file_type, pattern in (patterns or {}).items():
+        if pattern is None:
+            continue
+        try:
+            pattern = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(
+                f"File name pattern for '{file_type}' files is not a valid"
+                f" regular expression: {e}"
+            ) from None
+        missing_groups = [
+            group for group in DATE_GROUPS if group not in pattern.groupindex
+        ]
+        if missing_groups:
+            raise ValueError(
+                f"File name pattern for '{file_type}' files must have the named"
+                f" groups {', '.join(DATE_GROUPS)}, e.g. (?P<year>\\d{{4}})."
+                f" Missing: {', '.join(missing_groups)}."
+            )
+        compiled_patterns[file_type] = pattern
+    return compiled_patterns
+
+
+def parse_date_from_fname(
+        file_name: str,
+        patterns: Union[dict[str, re.Pattern], None] = None
+) -> Union[dt.date, None]:
+    """
+    Parses the date of a file name with the pattern of its file type in
+    `patterns`, default `FILENAME_DATE_PATTERNS`. Matching and parsing is
+    done in one step. Returns None if the file type has no pattern, the name
+    does not match, or the date is not valid.
+    """
+    if patterns is None:
+        patterns = FILENAME_DATE_PATTERNS
+    pattern = patterns.get(get_file_extension(file_name))
+    if pattern is None:
+        return None
+    match = pattern.fullmatch(file_name)
+    if match is None:
+        return None
+    year = match['year']
+    try:
+        return dt.date(
+            int(year) + (2000 if len(year) == 2 else 0),
+            int(match['month']),
+            int(match['day'])
+        )
+    except ValueError:
+        return None
 
 
 def extract_date_from_fname(
-        file_name: str
+        file_name: str,
+        patterns: Union[dict[str, re.Pattern], None] = None
 ) -> dt.date:
     """
     Parses a date from a filename.
-
-    Note: custom parsing instead of datetime's strptime for more
-    flexibility in file names.
+    Like `parse_date_from_fname`, but raises a ValueError if no date is found.
 
     For file type '.lst' file name format is:
         - aws_yyyymmdd.lst
@@ -209,35 +417,97 @@ def extract_date_from_fname(
     For file type '.txt' file name format is:
         - yymmdd_PTU300_log.txt or
         - yymmdd_PTU300_error_log.txt
-    If string "error" is in name, date will be extracted twice,
-    however due to set operations, dates are unique and are only counted once
+    Both give the same date. The main log is parsed for that date, or both
+    are merged with the merge_raw_files config option, see
+    `pressureutils.sort_raw_file_names`.
 
     For file type '.csv' file name format is:
         - <prefix>-<location>-yyyymmdd.csv
     """
+    date = parse_date_from_fname(file_name, patterns)
+    if date is not None:
+        return date
     file_type = get_file_extension(file_name)
-    if file_type == 'lst':
-        date_string = file_name.split('.')[0].split('_')[1]
-        year = date_string[0:4]
-        month = date_string[4:6]
-        day = date_string[6:8]
-    elif file_type == 'txt':
-        date_string = file_name.split('.')[0].split('_')[0]
-        year = '20' + date_string[0:2]
-        month = date_string[2:4]
-        day = date_string[4:6]
-    elif file_type == 'csv':
-        date_string = file_name.split('.')[0].split('-')[2]
-        year = date_string[0:4]
-        month = date_string[4:6]
-        day = date_string[6:8]
-    else:
+    if file_type not in (patterns or FILENAME_DATE_PATTERNS):
         raise ValueError(
             f'Pressure file type \'{file_type}\' not supported.'
             ' Supported types: .lst, .txt, .csv'
         )
-    date = dt.datetime(int(year), int(month), int(day)).date()
-    return date
+    raise ValueError(
+        f'File name \'{file_name}\' does not match the format of'
+        f' \'.{file_type}\' files, or its date is not valid.'
+    )
+
+
+# names of EM27 interferogram measurement folders: yymmdd or yyyymmdd
+DIRNAME_DATE_PATTERN: re.Pattern = re.compile(
+    r'(?P<year>\d{2}|\d{4})(?P<month>\d{2})(?P<day>\d{2})'
+)
+# link names of interferogram measurement folders
+DIRNAME_TEMPLATE: str = '{yyyy}{mm}{dd}'
+
+
+def compile_link_name_rule(
+        pattern: Union[str, re.Pattern, None] = None,
+        template: Union[str, None] = None
+) -> Callable[[str], Union[str, None]]:
+    """
+    Returns a function that gives the link name of a target name, e.g. for
+    `syncutils.write_symlinks`, or None if the name does not match.
+    `pattern` is a regular expression matched against the whole name, default
+    `DIRNAME_DATE_PATTERN`. The link name is built from `template`, default
+    `DIRNAME_TEMPLATE`, with the named groups of the pattern, the target name
+    as {name}, and, if the pattern has the named groups year, month and day,
+    the date as {yyyy}, {yy}, {mm} and {dd}. Names with an invalid date do
+    not match. A 2 digit year is read like `extract_date_from_dirname` does:
+    69 to 99 are 19yy, else 20yy.
+    Raises a ValueError if the pattern is not valid or the template uses
+    other fields.
+    """
+    if pattern is None:
+        pattern = DIRNAME_DATE_PATTERN
+    if template is None:
+        template = DIRNAME_TEMPLATE
+    try:
+        pattern = re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid link name pattern '{pattern}': {e}") from None
+    has_date = set(DATE_GROUPS) <= set(pattern.groupindex)
+    fields = dict.fromkeys(pattern.groupindex, '')
+    if has_date:
+        fields.update(yyyy='', yy='', mm='', dd='')
+    try:
+        template.format(name='', **fields)
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise ValueError(
+            f"Link name template '{template}' must only use the fields"
+            f" {', '.join(['name', *fields])}. Got {type(e).__name__}: {e}."
+        ) from None
+
+    def link_name(name: str) -> Union[str, None]:
+        match = pattern.fullmatch(name)
+        if match is None:
+            return None
+        groups = match.groupdict()
+        if not has_date:
+            return template.format(name=name, **groups)
+        year = int(groups['year'])
+        if len(groups['year']) == 2:
+            year += 1900 if year >= 69 else 2000
+        try:
+            date = dt.date(year, int(groups['month']), int(groups['day']))
+        except ValueError:
+            return None
+        return template.format(
+            name=name,
+            **groups,
+            yyyy=f'{date.year:04d}',
+            yy=f'{date.year % 100:02d}',
+            mm=f'{date.month:02d}',
+            dd=f'{date.day:02d}'
+        )
+
+    return link_name
 
 
 def generate_dirname_from_date(
@@ -9,17 +9,22 @@ the call to `sys.argv` returns the following:
 args[0] = current file
 args[1] = function name
 args[2:] = function args : (*unpacked)
+Arguments of the form `--name=value` or `--flag` are passed as keyword
+arguments, e.g.:
+`python -m modules.pipeline prepare_pressure --workers=8`
 """
 
 import datetime as dt
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Union
+from typing import Callable, Tuple, Union
 
 import dotenv
 
-from . import pressureutils, ioutils, syncutils
+from . import configutils, pressureutils, ioutils, syncutils, watchutils
 
 
 def setup_environment() -> Path:
@@ -56,89 +61,433 @@ def setup_environment() -> Path:
     return config_file_path
 
 
+def parse_cli_args(
+        args: list[str]
+) -> Tuple[list[str], dict]:
+    """
+    Splits command line arguments into positional arguments and keyword arguments.
+    `--name=value` becomes {'name': 'value'} and `--flag` becomes {'flag': True}.
+    Dashes in names are replaced by underscores.
+    """
+    positional_args: list[str] = []
+    keyword_args: dict = {}
+    for arg in args:
+        if arg.startswith('--'):
+            name, sep, value = arg[2:].partition('=')
+            keyword_args[name.replace('-', '_')] = value if sep else True
+        else:
+            positional_args.append(arg)
+    return positional_args, keyword_args
+
+
 def prepare_pressure(
-        config_file: Union[Path, None] = None
-) -> None:
+        config_file: Union[Path, None] = None,
+        workers: Union[int, str, None] = None,
+        location_workers: Union[int, str, None] = None,
+        rebuild_index: bool = False
+) -> dict[str, Union[Tuple[int, int], Exception]]:
     """
     Reads config file and collects locations to process and
     passes them to a function that parses pressure folders
     for those locations.
+    Files are parsed by one pool of processes shared by all locations, so
+    that the number of processes is the same however many locations are
+    processed at the same time. `workers` sets its size, default is the
+    `workers` value of the pipeline section of the config file, or else the
+    largest `workers` value of the locations (see `get_shared_workers`).
+    `location_workers` sets how many locations are processed at the same time,
+    so that a slow raw folder at one location does not block the others,
+    default is the `location_workers` value of the pipeline section, or 1.
+    `rebuild_index` rebuilds the processing index of locations that have an
+    `index_file` from their raw and parsed folders.
+    Returns a summary with the number of files found and parsed per location,
+    or the exception raised for that location. If any location failed,
+    a RuntimeError is raised after all locations have been processed.
+    """
+    if config_file is None:
+        config_file = setup_environment()
+    v: bool = False # verbose logs
+    vv: bool = False # more verbose logs
+    pressure_config_section: str = "pressure"
+    config: configutils.PipelineConfig = configutils.load_config(
+        config_file
+    )
+    locations: list = config.section_keys(
+        pressure_config_section
+    )
+    settings = config.pipeline_settings()
+    if workers is not None:
+        workers = int(workers)
+    elif settings.workers is not None:
+        workers = settings.workers
+    else:
+        workers = get_shared_workers(config, pressure_config_section, locations)
+    if location_workers is not None:
+        location_workers = int(location_workers)
+    else:
+        location_workers = settings.location_workers
+    summary: dict[str, Union[Tuple[int, int], Exception]] = {}
+    if workers > 1:
+        file_pool = ProcessPoolExecutor(max_workers=workers)
+    else:
+        file_pool = nullcontext()
+    with file_pool as file_executor, ThreadPoolExecutor(
+        max_workers=max(1, min(location_workers, len(locations)))
+    ) as location_executor:
+        futures = {
+            location_executor.submit(
+                pressureutils.parse_pressure_folder,
+                config,
+                pressure_config_section,
+                location, workers=workers,
+                executor=file_executor,
+                rebuild_index=bool(rebuild_index),
+                v=v, vv=vv
+            ): location
+            for location in locations
+        }
+        for future in as_completed(futures):
+            try:
+                summary[futures[future]] = future.result()
+            except Exception as exc:
+                summary[futures[future]] = exc
+    summary = {location: summary[location] for location in locations}
+    print_pressure_summary(summary)
+    failed_locations = [
+        location for location, result in summary.items()
+        if isinstance(result, Exception)
+    ]
+    if failed_locations:
+        raise RuntimeError(
+            f"Failed to process pressure for location(s): {', '.join(failed_locations)}."
+        )
+    return summary
+
+
+def get_shared_workers(
+        config: configutils.PipelineConfig,
+        pressure_config_section: str,
+        locations: list
+) -> int:
+    """
+    Returns the number of processes of a pool shared by locations: the largest
+    `workers` value of the locations (see `pressureutils.get_workers`), or 1.
+    Locations with an invalid config are left out, they fail when processed.
+    """
+    location_workers = []
+    for location in locations:
+        try:
+            location_workers.append(
+                pressureutils.get_workers(config, pressure_config_section, location)
+            )
+        except ValueError:
+            continue
+    return max(location_workers, default=1)
+
+
+def print_pressure_summary(
+        summary: dict[str, Union[Tuple[int, int], Exception]]
+) -> None:
+    """
+    Prints the number of pressure files found and parsed per location,
+    or the error that stopped the processing of a location.
+    """
+    print('\n****** Pressure summary ******')
+    for location, result in summary.items():
+        if isinstance(result, Exception):
+            print(
+                f'! {location}: failed with {type(result).__name__}: {result}'
+            )
+        else:
+            found, parsed = result
+            print(
+                f'> {location}: parsed {parsed} of {found} unparsed pressure files'
+            )
+    print('******')
+
+
+def watch_pressure(
+        config_file: Union[Path, None] = None,
+        interval: Union[float, str] = 5,
+        debounce: Union[float, str] = 2,
+        workers: Union[int, str, None] = None,
+        polls: Union[int, str, None] = None
+) -> None:
+    """
+    Runs as a long-lived process that parses pressure files as soon as they are
+    written, instead of running `prepare_pressure` e.g. from cron.
+    All locations are processed once at start. Then the raw pressure folders
+    are polled every `interval` seconds (see `watchutils.watch_folders`) and,
+    once the files of a location stopped changing for `debounce` seconds, only
+    the dates of the new and changed raw files are parsed. Locations with
+    several raw folders are watched in each of them; `{year}` folders are
+    resolved again at each poll, so that the folder of a new year is watched
+    once the year starts. With `incremental` locations, only the lines
+    appended to a file are parsed.
+    `workers` sets the number of processes used to parse files, kept for the
+    lifetime of the process and shared by all locations, default as for
+    `prepare_pressure`. An error in a location is reported and watching
+    continues. `polls` stops after a number of polls, default is to run until
+    interrupted. The config file is read once, restart to apply changes.
     """
     if config_file is None:
         config_file = setup_environment()
+    interval = float(interval)
+    debounce = float(debounce)
+    if polls is not None:
+        polls = int(polls)
     v: bool = False # verbose logs
     vv: bool = False # more verbose logs
     pressure_config_section: str = "pressure"
-    locations: list = ioutils.get_yaml_section_keys(
-        config_file,
+    config: configutils.PipelineConfig = configutils.load_config(
+        config_file
+    )
+    locations: list = config.section_keys(
         pressure_config_section
     )
+    if workers is not None:
+        workers = int(workers)
+    elif config.pipeline_settings().workers is not None:
+        workers = config.pipeline_settings().workers
+    else:
+        workers = get_shared_workers(config, pressure_config_section, locations)
+    watched_locations: dict = {}
     for location in locations:
-        pressureutils.parse_pressure_folder(
-            config_file,
-            pressure_config_section,
-            location, v=v, vv=vv
+        try:
+            location_config = config.pressure_location(
+                pressure_config_section, location
+            )
+            extension = pressureutils.get_raw_file_extension(location_config)
+        except ValueError as e:
+            print(f'! {location}: not watched, {e}')
+            continue
+        watched_locations[location] = (location_config, f'.{extension}')
+
+    def current_folders():
+        # `{year}` folders up to the current date, e.g. after New Year
+        return {
+            (location, str(folder)): (folder, suffix)
+            for location, (location_config, suffix) in watched_locations.items()
+            for folder in pressureutils.get_raw_pressure_folders(location_config)
+        }
+
+    folders = current_folders()
+    if workers > 1:
+        file_pool = ProcessPoolExecutor(max_workers=workers)
+    else:
+        file_pool = nullcontext()
+    with file_pool as file_executor:
+
+        def parse_location(location, raw_file_names=None):
+            try:
+                pressureutils.parse_pressure_folder(
+                    config,
+                    pressure_config_section,
+                    location,
+                    workers=workers,
+                    executor=file_executor,
+                    raw_file_names=raw_file_names,
+                    v=v, vv=vv
+                )
+            except Exception as exc:
+                print(
+                    f'! {location}: failed with {type(exc).__name__}: {exc}'
+                )
+
+        # taken before parsing, so files written meanwhile are found at the first poll
+        snapshots = {
+            key: watchutils.scan_folder(folder, suffix)
+            for key, (folder, suffix) in folders.items()
+        }
+        for location in dict.fromkeys(location for location, _ in folders):
+            parse_location(location)
+        print(
+            f'\n****** Watching {len(folders)} raw pressure folders'
+            f' every {interval} s ******'
         )
+        try:
+            watchutils.watch_folders(
+                current_folders,
+                lambda key, raw_file_names: parse_location(key[0], raw_file_names),
+                interval=interval,
+                debounce=debounce,
+                snapshots=snapshots,
+                max_polls=polls,
+                v=v
+            )
+        except KeyboardInterrupt:
+            print('\n****** Stopped watching raw pressure folders ******')
 
 
 def prepare_symlinks(
-        config_file: Union[Path, None] = None
+        config_file: Union[Path, None] = None,
+        workers: Union[int, str, None] = None
 ) -> None:
     """
     Reads config file and collects symlinks into a link folder for all files in target folders.
-    When processing EM27 instrument interferogram folders, the folder name is checked to be in
-    format yyyymmdd. If it is not (i.e. in format yymmdd with only 2 digit years), the symlink
-    name will be changed to yyyymmdd (4 digit year).
+    Jobs with a `link_name_pattern` or `link_name_template` name links with that rule (see
+    `ioutils.compile_link_name_rule`); items whose names do not match are skipped and reported.
+    E.g. EM27 instrument interferogram jobs set `link_name_template: '{yyyy}{mm}{dd}'`, so that
+    measurement folders named yymmdd (2 digit years) are linked as yyyymmdd (4 digit years).
+    Jobs of config files written before link names could be configured get that rule, see
+    `configutils.LEGACY_DATE_NAMED_JOBS`. Other jobs keep the names of the targets.
+    `workers` sets the number of threads writing the links of each link folder (default 1),
+    e.g. on network mounts where each link is a round trip. With more than one worker, up to
+    `workers` link folders are also written in parallel; the target folders of a link folder
+    are linked one after the other, so that each sees the links of the previous ones. Results
+    are reported in the order of the config file. A target folder that cannot be read, e.g.
+    missing or on a mount that is down, is reported and skipped; the other jobs go on.
+    Jobs with a `state_file` skip target folders whose modification time did not change since
+    the last run, unless the link folder was changed since or the job links them to another
+    link folder or with other settings, and remove the links to targets that were removed
+    from a target folder.
+    Jobs with a `link_mode` other than symlink write hard links, clones or copies of the
+    targets instead, see `syncutils.materialize`. Jobs with a `depth` mirror the folders of
+    their target folders down to that depth, with the `include` and `exclude` patterns, see
+    `syncutils.list_targets`.
     """
     if config_file is None:
         config_file = setup_environment()
+    workers = 1 if workers is None else int(workers)
     resolve_path: bool = True
     v: bool = False # verbose logs
-    config: dict = ioutils.read_yaml_config(
+    config: configutils.PipelineConfig = configutils.load_config(
         config_file
     )
     symlink_config_section: str = "symlinks"
-    symlink_jobs: list = ioutils.get_yaml_section_keys(
-        config_file,
+    symlink_jobs: list = config.section_keys(
         symlink_config_section
     )
-    EM27_instruments: list[str] = [
-        'SN039', 'SN081', 'SN122'
-    ]
-    link_names: Union[tuple[str], None] = None
+    # (job name, target folder, link name function, state entry, job config) by link folder
+    link_folder_jobs: dict[str, list[tuple]] = {}
+    # (link folder, position in its list) in the order of the config file
+    job_order: list[tuple[str, int]] = []
+    # recorded state by state file, see syncutils.read_symlink_state
+    states: dict[str, dict] = {}
     for job_name in symlink_jobs:
-        # NOTE: if there are differences between pressure and interferogram symlinks processing
-        # they can be handled them here e.g. by conditioning on the job name
-        target_folders: list[str] = config[symlink_config_section][job_name]["target_folders"]
-        link_folder: str = config[symlink_config_section][job_name]["link_folder"]
-        for target_folder in target_folders:
-            link_names: Union[tuple[str], None] = None
+        job_config: configutils.SymlinkJobConfig = config.symlink_job(
+            symlink_config_section,
+            job_name
+        )
+        link_name: Union[Callable[[str], Union[str, None]], None] = None
+        if (
+            job_config.link_name_pattern is not None
+            or job_config.link_name_template is not None
+        ):
+            link_name = ioutils.compile_link_name_rule(
+                job_config.link_name_pattern,
+                job_config.link_name_template
+            )
+        job_state: Union[dict, None] = None
+        if job_config.state_file is not None:
+            if job_config.state_file not in states:
+                states[job_config.state_file] = syncutils.read_symlink_state(
+                    job_config.state_file
+                )
+            job_state = states[job_config.state_file].get(job_name, {})
+        for target_folder in job_config.target_folders:
+            jobs = link_folder_jobs.setdefault(job_config.link_folder, [])
+            job_order.append((job_config.link_folder, len(jobs)))
+            jobs.append((
+                job_name,
+                target_folder,
+                link_name,
+                None if job_state is None else job_state.get(target_folder),
+                job_config
+            ))
+
+    def link_folder(link_folder, jobs):
+        try:
+            Path(link_folder).mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            return [e]*len(jobs)
+        results = []
+        for _, target_folder, link_name, state, job_config in jobs:
+            skipped: list[str] = []
+            # recorded in the state, so that changing the rule links the folder again
+            link_name_rule = None if link_name is None else [
+                None if job_config.link_name_pattern is None
+                else job_config.link_name_pattern.pattern,
+                job_config.link_name_template
+            ]
             try:
-                if job_name in EM27_instruments:
-                    print(
-                        f"\n > Creating symlinks for {job_name} interferograms."
-                    )
-                    target_items = sorted(
-                        Path(target_folder).glob('*'),
-                        key=lambda p: p.name
-                    ) # same sorting key as in write_symlinks
-                    link_names = tuple(
-                        ioutils.generate_dirname_from_date(
-                            ioutils.extract_date_from_dirname(
-                                item.name
-                            )
-                        )
-                        for item in target_items
-                    )
-                _ = syncutils.write_symlinks(
-                    target_folder, link_folder, link_names=link_names,
-                    resolve_path=resolve_path, v=v
+                results.append((
+                    *syncutils.sync_symlinks(
+                        Path(target_folder),
+                        Path(link_folder),
+                        state=state,
+                        resolve_path=resolve_path,
+                        link_name=link_name,
+                        workers=workers,
+                        skipped=skipped,
+                        mode=job_config.link_mode,
+                        depth=job_config.depth,
+                        include=job_config.include,
+                        exclude=job_config.exclude,
+                        link_name_rule=link_name_rule
+                    ),
+                    skipped
+                ))
+            except (ValueError, OSError) as e:
+                # e.g. a missing target folder or a stale mount, other jobs go on
+                results.append(e)
+        return results
+
+    if workers > 1 and len(link_folder_jobs) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(link_folder_jobs))) as executor:
+            results = dict(zip(
+                link_folder_jobs,
+                executor.map(link_folder, link_folder_jobs, link_folder_jobs.values())
+            ))
+    else:
+        results = {
+            folder: link_folder(folder, jobs)
+            for folder, jobs in link_folder_jobs.items()
+        }
+    new_states: dict[str, dict] = {state_file: {} for state_file in states}
+    for folder, position in job_order:
+        job_name, target_folder, link_name, state, job_config = link_folder_jobs[folder][position]
+        state_file = job_config.state_file
+        if link_name is not None:
+            print(
+                f"\n > Creating symlinks for {job_name} with its link name rule."
+            )
+        if (
+            isinstance(results[folder][position], FileNotFoundError)
+            and results[folder][position].filename == str(Path(target_folder))
+        ):
+            print(
+                f"Error!\n> Target folder {target_folder} not found.\n",
+                results[folder][position]
+            )
+        elif isinstance(results[folder][position], Exception):
+            print(
+                f"! Error, skipping '{target_folder}'.\n",
+                results[folder][position]
+            )
+        else:
+            result, removed, state, skipped = results[folder][position]
+            if skipped:
+                print(
+                    f"! {len(skipped)} items skipped in '{target_folder}', their names do not"
+                    f" match the link name pattern of job '{job_name}': {', '.join(skipped[:10])}"
+                    f"{', ...' if len(skipped) > 10 else ''}"
                 )
-            except ValueError as e:
+            if result is None:
                 print(
-                    f"! Error, skipping '{target_folder}'. Could not parse folder date. Perhaps there are non-ifg folders in this directory?"
-                    " Please supply a directory which only has interferogram measurement folders.\n", e
+                    f"******\nTarget folder {target_folder} unchanged since last run. Skipping.\n******"
                 )
+            else:
+                _ = syncutils.report_symlinks(result, target_folder, folder, v=v)
+            if removed:
+                print(f"{len(removed)} symlinks to removed targets deleted from {folder}.")
+            if state is not None:
+                # after all target folders of the link folder were linked
+                state = syncutils.record_link_folder_state(state, Path(folder))
+        if state_file is not None and state is not None:
+            new_states[state_file].setdefault(job_name, {})[target_folder] = state
+    for state_file, state in new_states.items():
+        syncutils.write_symlink_state(state_file, state)
 
 
 if __name__ == "__main__":
@@ -146,7 +495,8 @@ if __name__ == "__main__":
     start_time_utc: dt.datetime = dt.datetime.now(dt.timezone.utc)
     print(f'\n-- LOG {start_time_utc} {args[0]} {args[1]} started --')
     if len(args) > 1:
-        globals()[args[1]](*args[2:])
+        positional_args, keyword_args = parse_cli_args(args[2:])
+        globals()[args[1]](*positional_args, **keyword_args)
     end_time_utc: dt.datetime = dt.datetime.now(dt.timezone.utc)
     run_time_delta: dt.timedelta = end_time_utc - start_time_utc
     print(f'\n-- LOG {end_time_utc} {args[0]} {args[1]} completed in {run_time_delta} --')
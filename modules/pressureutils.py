@@ -1,68 +1,365 @@
-from datetime import datetime, timedelta
-from io import StringIO
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+import functools
+import io
+import os
+import re
 from pathlib import PosixPath, Path
-from typing import List, Tuple, Union
+from typing import Any, Callable, Iterable, List, Tuple, Union
 
 import pandas as pd
 import numpy as np
 
+from . import configutils
+from . import indexutils
 from . import ioutils
 from . import timeutils
 
+AWS_COLUMNS: Tuple[str, ...] = ('OBSTIME', 'P_ST', 'T', 'RH')
+AWS_SEPARATOR_LINE: re.Pattern = re.compile(r'^[-\s]*-[-\s]*$')
+# above this number of new raw files, the parsed folder is listed
+# once instead of checking for each output file
+INDEX_PROBE_LIMIT: int = 32
+# up to this number of days from start to end date, the raw and parsed file
+# names of each date are checked instead of listing the folders
+PROBE_DATE_LIMIT: int = 64
+# approximate size in bytes of a folder entry, to estimate the number of files
+# of a folder from its size without listing it
+FOLDER_ENTRY_BYTES: int = 32
+# returned by `append_pressure_file` when a raw file has no complete line
+# of data yet and no output file was written
+NO_DATA: str = 'no data'
+# columns returned by the readers of raw pressure formats
+RAW_COLUMNS: Tuple[str, ...] = ('date', 'time', 'pressure', 'temperature', 'rh')
+
+
+@dataclass(frozen=True)
+class RawPressureFormat:
+    """
+    A format of raw pressure files, selected per location with the
+    `raw_file_format` config key (default is the raw file extension).
+    `filename_pattern` and `filename_template` give the date of a file name
+    and the file name of a date, see `ioutils.parse_date_from_fname`.
+    `columns` maps the columns needed from a file to their names or positions
+    in the file. `reader` reads a file, or a text stream with the content of
+    one, into the columns of `RAW_COLUMNS`, with dates formatted yyyy.mm.dd:
+        reader(input_file, columns, in_sep=None, engine='c', v=False) -> pd.DataFrame
+    `header_reader` reads the lines before the data of a file opened in binary
+    mode, so that lines appended to the file can be parsed on their own.
+    """
+    name: str
+    extension: str
+    filename_pattern: re.Pattern
+    filename_template: str
+    columns: dict
+    reader: Callable[..., pd.DataFrame]
+    header_reader: Callable[[io.BufferedReader], bytes]
+
+
+# formats by name, see `register_raw_pressure_format`
+RAW_PRESSURE_FORMATS: dict[str, RawPressureFormat] = {}
+
+
+def register_raw_pressure_format(
+        raw_format: RawPressureFormat,
+        replace: bool = False
+) -> None:
+    """
+    Adds a raw pressure format to `RAW_PRESSURE_FORMATS`, so that it can be
+    selected in the config file. Raises a ValueError if a format of the same
+    name exists, unless `replace` is True. Register formats when a module is
+    imported, so that they also exist in the processes that parse files.
+    """
+    if raw_format.name in RAW_PRESSURE_FORMATS and not replace:
+        raise ValueError(
+            f"Raw pressure format '{raw_format.name}' is already registered."
+        )
+    RAW_PRESSURE_FORMATS[raw_format.name] = raw_format
+
+
+def get_raw_pressure_format(
+        name: str
+) -> RawPressureFormat:
+    """
+    Returns a registered raw pressure format, else raises a ValueError.
+    """
+    try:
+        return RAW_PRESSURE_FORMATS[name]
+    except KeyError:
+        raise ValueError(
+            f"Raw pressure format '{name}' not supported."
+            f" Supported formats: {', '.join(RAW_PRESSURE_FORMATS)}."
+        ) from None
+
+
+def get_location_format(
+        location_config: configutils.PressureLocationConfig
+) -> RawPressureFormat:
+    """
+    Returns the raw pressure format of a location.
+    """
+    return get_raw_pressure_format(
+        location_config.raw_file_format or location_config.raw_file_extension
+    )
+
+
+def get_raw_file_extension(
+        location_config: configutils.PressureLocationConfig
+) -> str:
+    """
+    Returns the extension of the raw files of a location, used to list its raw
+    folders: the extension of its raw pressure format, whose file name pattern
+    and template end with it, or its `raw_file_extension` if the location names
+    its raw files with a `raw_file_pattern`.
+    """
+    if location_config.raw_file_pattern is not None:
+        return location_config.raw_file_extension
+    return get_location_format(location_config).extension
+
 
 def parse_pressure_folder(
-        config_file: Union[str, PosixPath],
+        config: Union[configutils.PipelineConfig, str, PosixPath],
         pressure_config_section: str,
         location: str,
+        workers: Union[int, None] = None,
+        executor: Union[Executor, None] = None,
+        rebuild_index: bool = False,
+        raw_file_names: Union[Iterable[str], None] = None,
         v: bool = False,
         vv: bool = False
-) -> None:
+) -> Tuple[int, int]:
     """
     Parses all unparsed pressure files in a folder. Output is written to output folder
-    defined in yaml config file.
+    defined in yaml config file. `config` is a parsed config or a config file path.
+    The number of parallel parsing processes is taken from `workers`, or from the
+    optional `workers` key of the location in the config file (default 1).
+    If an `executor` is given, files are submitted to it instead, e.g. to share
+    one process pool between locations.
+    If the location has an `index_file`, unparsed files are found with a processing
+    index, which is updated with the result of each file. `rebuild_index` clears
+    the index first, so it is rebuilt from the raw and parsed folders.
+    If the location is `incremental`, files are parsed with `append_pressure_file`:
+    only lines appended to raw files since the last run are parsed and added
+    to the output files, using the byte offsets recorded in the index.
+    If `raw_file_names` is given, e.g. files reported as changed by
+    `watchutils.watch_folders`, only the dates of these raw files are parsed,
+    see `generate_unparsed_pressure_file_list`.
+    Returns the number of unparsed files found and the number of files parsed.
     """
-    unparsed_pressure_paths, output_paths = generate_unparsed_pressure_file_list(
-        config_file,
+    config = configutils.load_config(config)
+    location_config = config.pressure_location(
         pressure_config_section,
-        location,
-        v=v, vv=vv
-    )
-    print(
-        f'******\nFound {len(unparsed_pressure_paths)} unparsed pressure files'
-        f' for location « {location} ».\n**'
+        location
     )
-    pressure_correction = calculate_barometric_factor(
-        get_elevations(
-            config_file,
+    if location_config.index_file is None:
+        if rebuild_index and v:
+            print(f'No index_file configured for location « {location} ».')
+        index_context = nullcontext()
+    else:
+        index_context = indexutils.ProcessingIndex(location_config.index_file)
+    with index_context as index:
+        if index is not None and rebuild_index:
+            print(f'Rebuilding processing index {index.path}.')
+            index.clear()
+        unparsed_pressure_paths, output_paths = generate_unparsed_pressure_file_list(
+            config,
             pressure_config_section,
             location,
+            index=index,
+            raw_file_names=raw_file_names,
+            v=v, vv=vv
+        )
+        print(
+            f'******\nFound {len(unparsed_pressure_paths)} unparsed pressure files'
+            f' for location « {location} ».\n**'
+        )
+        pressure_correction = calculate_barometric_factor(
+            get_elevations(
+                config,
+                pressure_config_section,
+                location,
+                v=v
+            )
+        )
+        if workers is None and executor is None:
+            workers = get_workers(
+                config,
+                pressure_config_section,
+                location
+            )
+        offsets = None
+        if index is not None and location_config.incremental:
+            offsets = {
+                Path(entry.raw_path): (entry.byte_offset, entry.last_timestamp)
+                for entry in index.entries().values()
+                if entry.byte_offset is not None
+            }
+        file_count = parse_pressure_files(
+            unparsed_pressure_paths,
+            output_paths,
+            pressure_correction,
+            workers=workers or 1,
+            executor=executor,
+            float_format=location_config.float_format,
+            offsets=offsets,
+            raw_format=get_location_format(location_config).name,
+            on_result=None if index is None else functools.partial(
+                record_parse_result,
+                index,
+                change_detection=location_config.change_detection
+            ),
             v=v
         )
+    print(
+        f'**\nParsed {file_count} pressure files for location « {location} ».\n******'
     )
+    return len(unparsed_pressure_paths), file_count
+
+
+def parse_pressure_files(
+        input_file_paths: Tuple[Path],
+        output_file_paths: Tuple[Path],
+        pressure_correction: Union[None, float, list] = None,
+        workers: int = 1,
+        executor: Union[Executor, None] = None,
+        float_format: Union[None, str] = None,
+        offsets: Union[dict, None] = None,
+        raw_format: Union[None, str] = None,
+        on_result: Union[Callable[[Path, Path, Union[Exception, None], Any], None], None] = None,
+        v: bool = False
+) -> int:
+    """
+    Parses pairs of input and output pressure files and returns the number of
+    files parsed. With more than one worker, files are parsed in a process pool.
+    If an `executor` is given, files are submitted to it and `workers` is ignored.
+    `float_format` and `raw_format` are passed to `parse_pressure_file`.
+    If `offsets` is given, a mapping of input paths to the byte offset and last
+    timestamp already parsed, files are parsed incrementally with
+    `append_pressure_file`, from the start for input paths not in the mapping.
+    A file that fails to parse is reported and does not stop the other files.
+    A file without data yet (`NO_DATA`) is not counted and not reported as
+    failed.
+    `on_result` is called in this process after each file with the input path,
+    the output path, the exception raised, or None if the file was parsed, and
+    the value returned by the parse function.
+    """
+    if not isinstance(workers, int) or workers < 1:
+        raise ValueError(
+            f'Number of workers must be a positive integer. Got {workers}.'
+        )
     file_count = 0
-    for in_path, out_path in zip(unparsed_pressure_paths, output_paths):
-        try:
-            parse_pressure_file(
-                in_path,
-                out_path,
-                pressure_correction,
-                'factor',
-                v=v
-            )
+
+    def parse_args(in_path, out_path):
+        if offsets is None:
+            return parse_pressure_file, (in_path, out_path)
+        return append_pressure_file, (
+            in_path, out_path, *offsets.get(Path(in_path), (0, None))
+        )
+
+    def handle_result(in_path, out_path, exc, result=None):
+        nonlocal file_count
+        if exc is None and result == NO_DATA:
+            # left pending until its first complete line is written
+            if v:
+                print(f'* {in_path}: no data yet.')
+        elif exc is None:
             file_count += 1
-        except Exception as exc:
+        else:
             # TODO: create better error handling (not enough printout for errors, too general exception)
             print(
                 f"* Failed to parse {in_path}:\n",
                 exc
             )
-    print(
-        f'**\nParsed {file_count} pressure files for location « {location} ».\n******'
+        if on_result is not None:
+            on_result(in_path, out_path, exc, result)
+
+    if executor is None and (workers == 1 or len(input_file_paths) < 2):
+        for in_path, out_path in zip(input_file_paths, output_file_paths):
+            parse_function, args = parse_args(in_path, out_path)
+            try:
+                result = parse_function(
+                    *args,
+                    pressure_correction=pressure_correction,
+                    pressure_correction_type='factor',
+                    float_format=float_format,
+                    raw_format=raw_format,
+                    v=v
+                )
+            except Exception as exc:
+                handle_result(in_path, out_path, exc)
+            else:
+                handle_result(in_path, out_path, None, result)
+        return file_count
+    if executor is None:
+        pool = ProcessPoolExecutor(
+            max_workers=min(workers, len(input_file_paths))
+        )
+    else:
+        pool = nullcontext(executor)
+    with pool as executor:
+        futures = {}
+        for in_path, out_path in zip(input_file_paths, output_file_paths):
+            parse_function, args = parse_args(in_path, out_path)
+            futures[executor.submit(
+                parse_function,
+                *args,
+                pressure_correction=pressure_correction,
+                pressure_correction_type='factor',
+                float_format=float_format,
+                raw_format=raw_format,
+                v=v
+            )] = (in_path, out_path)
+        for future in as_completed(futures):
+            exc = future.exception()
+            handle_result(
+                *futures[future], exc, None if exc is not None else future.result()
+            )
+    return file_count
+
+
+def record_parse_result(
+        index: indexutils.ProcessingIndex,
+        input_file_path: Path,
+        output_file_path: Path,
+        exc: Union[Exception, None],
+        result: Any = None,
+        change_detection: str = 'stat'
+) -> None:
+    """
+    Records in a processing index whether the raw files of the date of an
+    output file were parsed. Their size, modification time and content hash
+    are the ones recorded before parsing, see `indexutils.ProcessingIndex.set_status`.
+    The byte offset and last timestamp returned by `append_pressure_file`
+    are recorded for the input file if it was parsed incrementally, with the
+    `indexutils.parsed_part_hash` of the part parsed for `change_detection`,
+    so that a rewritten file is not taken for an appended one. A raw file
+    without data yet (`NO_DATA`) is left pending, without output file.
+    """
+    if exc is None and result == NO_DATA:
+        index.set_status(
+            ioutils.extract_date_from_fname(Path(output_file_path).name),
+            indexutils.PENDING
+        )
+        return
+    index.set_status(
+        ioutils.extract_date_from_fname(Path(output_file_path).name),
+        indexutils.PARSED if exc is None else indexutils.FAILED,
+        output_file_path if exc is None else None
     )
+    if exc is None and result is not None:
+        byte_offset, last_timestamp = result
+        index.set_progress(
+            input_file_path,
+            byte_offset,
+            last_timestamp,
+            indexutils.parsed_part_hash(input_file_path, byte_offset, change_detection)
+        )
 
 
 def parse_pressure_file(
-        input_file_path: Union[str, PosixPath],
+        input_file_path: Union[str, PosixPath, Tuple[Union[str, PosixPath], ...]],
         output_file_path: Union[str, PosixPath],
         pressure_correction: Union[None, float, list] = None,
         pressure_correction_type: str = 'factor',
@@ -70,14 +367,183 @@ def parse_pressure_file(
         out_sep: str =',',
         in_col_names: Union[None, dict] = None,
         out_col_names: Union[None, dict] = None,
+        lst_engine: str = 'c',
+        float_format: Union[None, str] = None,
+        raw_format: Union[None, str] = None,
         v: bool = False,
         q: bool = False
 ) -> None:
     """Takes aws .lst or .txt log pressure file as input and
     creates a .csv file with data necessary for retrieval algorithm.
+    The file is read with `read_pressure_frame` in the format `raw_format`,
+    default is the format named after the file extension. `float_format`
+    (e.g. '%.2f') is passed to the csv writer, default writes the shortest
+    representation of each value.
+    `input_file_path` can be a tuple of raw files of the same date, e.g. the
+    log and error log of a day, which are merged with `merge_pressure_frames`
+    into one output file.
     """
     if v:
         print('*'*4,'Creating formatted pressure file.')
+    input_file_paths = (
+        input_file_path if isinstance(input_file_path, (tuple, list))
+        else (input_file_path,)
+    )
+    _out_pressure = merge_pressure_frames([
+        read_pressure_frame(
+            path,
+            raw_format=raw_format,
+            pressure_correction=pressure_correction,
+            pressure_correction_type=pressure_correction_type,
+            in_sep=in_sep,
+            in_col_names=in_col_names,
+            out_col_names=out_col_names,
+            lst_engine=lst_engine,
+            v=v,
+            q=q
+        )
+        for path in input_file_paths
+    ])
+    # exist_ok as files of the same folder may be written by parallel processes
+    Path(output_file_path).parent.mkdir(parents=True, exist_ok=True)
+    print(output_file_path)
+    _out_pressure.to_csv(
+        output_file_path,
+        index=False,
+        sep=out_sep,
+        float_format=float_format
+    )
+    if not q:
+        print(f'{output_file_path.name} pressure file written {datetime.now().time()}.')
+    if v:
+        print(f'Pressure file location: {output_file_path}')
+
+
+def append_pressure_file(
+        input_file_path: Union[str, PosixPath],
+        output_file_path: Union[str, PosixPath],
+        byte_offset: int = 0,
+        last_timestamp: Union[str, None] = None,
+        pressure_correction: Union[None, float, list] = None,
+        pressure_correction_type: str = 'factor',
+        float_format: Union[None, str] = None,
+        raw_format: Union[None, str] = None,
+        v: bool = False,
+        q: bool = False
+) -> Union[Tuple[int, Union[str, None]], str]:
+    """
+    Incrementally parses a raw pressure file that is still being written, e.g.
+    the log of the current day. Only the lines from `byte_offset` to the last
+    complete line are read, together with the header lines of the file, and
+    rows with a timestamp after `last_timestamp` are appended to the output file.
+    The header lines are read with the `header_reader` of `raw_format`, default
+    is the format named after the file extension.
+    With a `byte_offset` of 0, or if the output file does not exist, the whole
+    file is parsed and the output file is written new.
+    Returns the byte offset and the last timestamp ("date time" of the output
+    columns) parsed, to be passed to the next call, or `NO_DATA` if the file
+    has no complete line of data yet and no output file was written.
+    """
+    input_file_path = Path(input_file_path)
+    output_file_path = Path(output_file_path)
+    pressure_format = get_raw_pressure_format(
+        raw_format or ioutils.get_file_extension(input_file_path)
+    )
+    if not output_file_path.exists():
+        byte_offset, last_timestamp = 0, None
+    with open(input_file_path, 'rb') as file:
+        header = pressure_format.header_reader(file)
+        start = max(byte_offset, len(header))
+        file.seek(start)
+        data = file.read()
+    # the last line is left for the next call if it is still being written
+    end = data.rfind(b'\n') + 1
+    if end == 0:
+        if v:
+            print(f'No new lines in {input_file_path}.')
+        if not output_file_path.exists():
+            return NO_DATA
+        return byte_offset, last_timestamp
+    _out_pressure = read_pressure_frame(
+        io.StringIO((header + data[:end]).decode()),
+        raw_format=pressure_format.name,
+        pressure_correction=pressure_correction,
+        pressure_correction_type=pressure_correction_type,
+        v=v,
+        q=q
+    )
+    date_col, time_col = _out_pressure.columns[:2]
+    timestamps = _out_pressure[date_col] + ' ' + _out_pressure[time_col]
+    if last_timestamp is not None:
+        new_rows = (timestamps > last_timestamp).to_numpy()
+        _out_pressure = _out_pressure[new_rows]
+        timestamps = timestamps[new_rows]
+    if len(timestamps):
+        last_timestamp = timestamps.iloc[-1]
+    append = byte_offset > 0
+    output_file_path.parent.mkdir(parents=True, exist_ok=True)
+    _out_pressure.to_csv(
+        output_file_path,
+        mode='a' if append else 'w',
+        header=not append,
+        index=False,
+        float_format=float_format
+    )
+    if not q:
+        print(
+            f'{output_file_path.name} pressure file: {len(_out_pressure)} rows'
+            f' {"appended" if append else "written"} {datetime.now().time()}.'
+        )
+    return start + end, last_timestamp
+
+
+def merge_pressure_frames(
+        frames: List[pd.DataFrame]
+) -> pd.DataFrame:
+    """
+    Merges frames returned by `read_pressure_frame` for the same date into one
+    frame sorted by timestamp. Rows with a timestamp already in an earlier
+    frame are dropped, so the first frame is preferred. The frames are
+    concatenated and sorted once with a stable sort of the date and time
+    strings, and duplicates are found by comparing neighbouring timestamps.
+    A single frame is returned unchanged.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    # date yyyy.mm.dd and time hh:mm:ss strings sort like timestamps
+    timestamps = (
+        df.iloc[:, 0].to_numpy(dtype=str) + ' ' + df.iloc[:, 1].to_numpy(dtype=str)
+    )
+    order = np.argsort(timestamps, kind='stable')
+    timestamps = timestamps[order]
+    first = np.ones(len(timestamps), dtype=bool)
+    first[1:] = timestamps[1:] != timestamps[:-1]
+    return df.take(order[first]).reset_index(drop=True)
+
+
+def read_pressure_frame(
+        input_file: Union[str, PosixPath, io.TextIOBase],
+        raw_format: Union[str, None] = None,
+        pressure_correction: Union[None, float, list] = None,
+        pressure_correction_type: str = 'factor',
+        in_sep: Union[None, str] = None,
+        in_col_names: Union[None, dict] = None,
+        out_col_names: Union[None, dict] = None,
+        lst_engine: str = 'c',
+        v: bool = False,
+        q: bool = False
+) -> pd.DataFrame:
+    """
+    Reads a raw pressure file, or a text stream with the content of one, with
+    the reader of its format in `RAW_PRESSURE_FORMATS` and returns the corrected
+    pressure in output columns. `raw_format` is the name of the format, default
+    is the format named after the file extension. `in_col_names` replaces
+    columns of the column schema of the format. `in_sep` and `lst_engine` are
+    passed to the reader, e.g. `read_aws_file` for aws .lst files.
+    The output is built from typed columns: date and time strings and float64
+    pressure, correction, temperature and relative humidity.
+    """
     # set default values for mutable type arguments
     if in_col_names is None:
         in_col_names = {}
@@ -91,113 +557,263 @@ def parse_pressure_file(
             'temperature': 'TemperatureC',
             'rh': 'RelativeHumidity'
         }
-    input_file_type = ioutils.get_file_extension(input_file_path)
-    if input_file_type == 'lst':    # automatic weather station (aws) file
-        if in_sep is None:
-            in_sep = r'\s\s+'
-        df = pd.read_csv(input_file_path, sep=in_sep, engine='python').drop(0)
-
-        # parse timestamp
-        if 'timestamp_col_name' in in_col_names:
-            timestamp_col_name = in_col_names['timestamp_col_name']
-        else:
-            timestamp_col_name = df.columns[0]
-        timestamps = list(df[timestamp_col_name])
-        timestamp_df = timeutils.timestamp_to_date_time(timestamps)
-        _pressure = df['P_ST']
-        _correction, _corrected_pressure = apply_pressure_correction(
-            pressure_vector=_pressure,
-            pressure_correction=pressure_correction,
-            pressure_correction_type=pressure_correction_type,
-            q=q
-        )
-        _temperature = df['T']
-        _relative_humidity = df['RH']
-        _out_pressure = pd.DataFrame(
-            np.array([
-                timestamp_df['date'],
-                timestamp_df['time'],
-                _pressure,
-                np.full(
-                    _pressure.shape,
-                    _correction
-                ),
-                _corrected_pressure,
-                _temperature,
-                _relative_humidity
-            ]).T,
-            columns=[
-                out_col_names['date'],
-                out_col_names['time'],
-                out_col_names['pressure'],
-                out_col_names['correction'],
-                out_col_names['corrected_p'],
-                out_col_names['temperature'],
-                out_col_names['rh']
-            ])
-    elif input_file_type == 'txt':  # em27 case log file
-        if in_sep is None:
-            in_sep = r'\s+'
+    if raw_format is None:
+        raw_format = ioutils.get_file_extension(input_file)
+    pressure_format = get_raw_pressure_format(raw_format)
+    columns = {**pressure_format.columns, **in_col_names}
+    if 'timestamp_col_name' in columns:
+        # name used before column schemas
+        columns['timestamp'] = columns.pop('timestamp_col_name')
+    df = pressure_format.reader(
+        input_file,
+        columns,
+        in_sep=in_sep,
+        engine=lst_engine,
+        v=v
+    )
+    _correction, _corrected_pressure = apply_pressure_correction(
+        pressure_vector=df['pressure'],
+        pressure_correction=pressure_correction,
+        pressure_correction_type=pressure_correction_type,
+        q=q
+    )
+    return pd.DataFrame({
+        out_col_names['date']: df['date'].to_numpy(dtype=object),
+        out_col_names['time']: df['time'].to_numpy(dtype=object),
+        out_col_names['pressure']: df['pressure'].to_numpy(dtype=np.float64),
+        out_col_names['correction']: correction_column(
+            _correction,
+            len(df)
+        ),
+        out_col_names['corrected_p']: _corrected_pressure.to_numpy(dtype=np.float64),
+        out_col_names['temperature']: df['temperature'].to_numpy(dtype=np.float64),
+        out_col_names['rh']: df['rh'].to_numpy(dtype=np.float64)
+    })
+
+
+def read_aws_frame(
+        input_file: Union[str, PosixPath, io.TextIOBase],
+        columns: dict,
+        in_sep: Union[None, str] = None,
+        engine: str = 'c',
+        v: bool = False
+) -> pd.DataFrame:
+    """
+    Reader of the 'lst' format, automatic weather station (aws) files.
+    `columns` has the names of the timestamp, pressure, temperature and rh
+    columns. The file is read with `read_aws_file` and the timestamp is split
+    into date and time strings.
+    """
+    value_col_names = (columns['pressure'], columns['temperature'], columns['rh'])
+    df = read_aws_file(
+        input_file,
+        timestamp_col_name=columns['timestamp'],
+        value_col_names=value_col_names,
+        in_sep=in_sep,
+        engine=engine,
+        v=v
+    )
+    timestamp_df = timeutils.datetime_to_date_time(
+        timeutils.parse_timestamps(df[columns['timestamp']])
+    )
+    # columns are taken as arrays, indexes of the frames may differ
+    return pd.DataFrame({
+        'date': timestamp_df['date'].to_numpy(),
+        'time': timestamp_df['time'].to_numpy(),
+        'pressure': df[columns['pressure']].to_numpy(),
+        'temperature': df[columns['temperature']].to_numpy(),
+        'rh': df[columns['rh']].to_numpy()
+    })
+
+
+def read_aws_header(
+        file: io.BufferedReader
+) -> bytes:
+    """
+    Header reader of the 'lst' format: the leading empty lines, the column
+    names and the separator lines of an aws file opened in binary mode.
+    """
+    header = file.readline()
+    while header and not header.strip():
+        header += file.readline()
+    while True:
+        position = file.tell()
+        line = file.readline()
+        if not line or not AWS_SEPARATOR_LINE.match(line.decode()):
+            file.seek(position)
+            return header
+        header += line
+
+
+def read_case_log_frame(
+        input_file: Union[str, PosixPath, io.TextIOBase],
+        columns: dict,
+        in_sep: Union[None, str] = None,
+        engine: str = 'c',
+        v: bool = False
+) -> pd.DataFrame:
+    """
+    Reader of the 'txt' format, em27 PTU300 case log files.
+    `columns` has the positions of the date, time, pressure, temperature and
+    rh columns after equal signs are replaced, see `preprocess_case_log_file`.
+    The C engine is used for the default separator r'\\s+', the python engine
+    for other separators; `engine` is not used.
+    """
+    if in_sep is None:
+        in_sep = r'\s+'
+    with preprocess_case_log_file(
+        input_file
+    ) as case_log_file:
         df = pd.read_csv(
-            preprocess_case_log_file(
-                input_file_path
-            ),
+            case_log_file,
             sep=in_sep,
-            engine='python',
+            # r'\s+' is supported by the C engine, other regex separators are not
+            engine='c' if in_sep == r'\s+' else 'python',
             skiprows=2,
             header=None
         )
-        _pressure = df[9]
-        _correction, _corrected_pressure = apply_pressure_correction(
-            pressure_vector=_pressure,
-            pressure_correction=pressure_correction,
-            pressure_correction_type=pressure_correction_type,
-            q=q
-        )
-        _date = [
-                    timeutils.format_datestring(
-                        original_date = d,
-                        original_format = "%d.%m.%Y",
-                        desired_format = "%Y.%m.%d"
-                    )
-                    for d in df[0]
-                ]
-        _out_pressure = pd.DataFrame(
-            np.array([
-                _date,
-                df[1],
-                _pressure,
-                np.full(
-                    _pressure.shape,
-                    _correction
-                ),
-                _corrected_pressure,
-                df[12],
-                df[15]
-            ]).T,
-            columns=[
-                out_col_names['date'],
-                out_col_names['time'],
-                out_col_names['pressure'],
-                out_col_names['correction'],
-                out_col_names['corrected_p'],
-                out_col_names['temperature'],
-                out_col_names['rh']
-            ])
-    else:
+    return pd.DataFrame({
+        'date': timeutils.format_datestrings(
+            original_dates=df[columns['date']],
+            original_format="%d.%m.%Y",
+            desired_format="%Y.%m.%d"
+        ).to_numpy(),
+        'time': df[columns['time']].to_numpy(),
+        'pressure': df[columns['pressure']].to_numpy(),
+        'temperature': df[columns['temperature']].to_numpy(),
+        'rh': df[columns['rh']].to_numpy()
+    })
+
+
+def read_case_log_header(
+        file: io.BufferedReader
+) -> bytes:
+    """
+    Header reader of the 'txt' format: the two header lines of a case log
+    file opened in binary mode.
+    """
+    return file.readline() + file.readline()
+
+
+def correction_column(
+        pressure_correction: Union[None, float, list],
+        length: int
+) -> np.ndarray:
+    """
+    Returns the pressure correction as a float64 column of a given length.
+    A constant correction is repeated and no correction gives missing values.
+    """
+    if pressure_correction is None:
+        return np.full(length, np.nan)
+    if isinstance(pressure_correction, (int, float)):
+        return np.full(length, pressure_correction, dtype=np.float64)
+    return np.asarray(pressure_correction, dtype=np.float64)
+
+
+def read_aws_file(
+        input_file_path: Union[str, PosixPath, io.TextIOBase],
+        timestamp_col_name: str = AWS_COLUMNS[0],
+        in_sep: Union[None, str] = None,
+        engine: str = 'c',
+        value_col_names: Tuple[str, ...] = AWS_COLUMNS[1:],
+        v: bool = False
+) -> pd.DataFrame:
+    """
+    Reads an automatic weather station (aws) .lst file into a DataFrame with the
+    columns timestamp and `value_col_names`, default 'P_ST', 'T' and 'RH'. The timestamp is a string of date
+    and time separated by a space, e.g. "2016-06-02 18:00".
+
+    With engine 'c', the header line gives the column names, separator lines of
+    dashes are skipped and the data is read by pandas' C tokenizer, splitting on
+    whitespace. As the timestamp contains a space, it is read as two columns and
+    joined afterwards. Only the needed columns are converted. If any row does not
+    have a value for every column (e.g. an empty fixed width field), the file is
+    read again with the 'python' engine.
+
+    With engine 'python', or if `in_sep` is given, the file is read with pandas'
+    python tokenizer, splitting on two or more spaces, and the separator row is
+    dropped.
+
+    `input_file_path` may also be a seekable text stream.
+    """
+    if engine not in ('c', 'python'):
         raise ValueError(
-            f"Supported input file types: '.lst', '.txt'."
-            f" Got '{input_file_type}'."
+            f"engine must be one of 'c', 'python'. Got '{engine}'."
         )
-    output_dir = Path(output_file_path).parent
-    if not output_dir.exists():
-        output_dir.mkdir(parents=True)
-    print(output_file_path)
-    _out_pressure.to_csv(output_file_path, index=False, sep=out_sep)
-    if not q:
-        print(f'{output_file_path.name} pressure file written {datetime.now().time()}.')
-    if v:
-        print(f'Pressure file location: {output_file_path}')
+    if engine == 'c' and in_sep is None:
+        df = _read_aws_file_c(input_file_path, timestamp_col_name, value_col_names)
+        if df is not None:
+            return df
+        if v:
+            print(
+                f'Incomplete rows in {input_file_path}, reading with python engine.'
+            )
+    if in_sep is None:
+        in_sep = r'\s\s+'
+    if hasattr(input_file_path, 'seek'):
+        input_file_path.seek(0)
+    df = pd.read_csv(input_file_path, sep=in_sep, engine='python').drop(0)
+    return df[[timestamp_col_name, *value_col_names]]
+
+
+def _read_aws_file_c(
+        input_file_path: Union[str, PosixPath, io.TextIOBase],
+        timestamp_col_name: str,
+        value_col_names: Tuple[str, ...] = AWS_COLUMNS[1:]
+) -> Union[pd.DataFrame, None]:
+    """
+    C engine part of `read_aws_file`. Returns None if rows are incomplete.
+    """
+    if hasattr(input_file_path, 'read'):
+        file_context = nullcontext(input_file_path)
+    else:
+        file_context = open(input_file_path, 'r')
+    with file_context as file:
+        header = file.readline()
+        while header and not header.strip():
+            header = file.readline()
+        header_names = header.split()
+        while True:
+            position = file.tell()
+            line = file.readline()
+            if not line or not AWS_SEPARATOR_LINE.match(line):
+                break
+        file.seek(position)
+        names = []
+        for name in header_names:
+            if name == timestamp_col_name:
+                names += [f'{name}_date', f'{name}_time']
+            else:
+                names.append(name)
+        value_names = list(value_col_names)
+        date_name, time_name = f'{timestamp_col_name}_date', f'{timestamp_col_name}_time'
+        # the last column is read to check that no row is missing values
+        usecols = {date_name, time_name, *value_names, names[-1]}
+        try:
+            df = pd.read_csv(
+                file,
+                sep=r'\s+',
+                header=None,
+                names=names,
+                usecols=lambda name: name in usecols,
+                dtype={
+                    date_name: str,
+                    time_name: str,
+                    **{name: np.float64 for name in value_names}
+                },
+                engine='c'
+            )
+        except ValueError:
+            # e.g. a value that is not a number
+            return None
+    if df[names[-1]].isna().any() or df[value_names].isna().any(axis=None):
+        return None
+    out = pd.DataFrame({
+        timestamp_col_name: df[date_name] + ' ' + df[time_name]
+    })
+    for name in value_names:
+        out[name] = df[name]
+    return out
 
 
 def apply_pressure_correction(
@@ -363,7 +979,7 @@ def calculate_barometric_factor(
 
 
 def get_elevations(
-        config_file: Union[str, PosixPath],
+        config: Union[configutils.PipelineConfig, str, PosixPath],
         pressure_config_section: str,
         location: str,
         v: bool = False,
@@ -376,58 +992,63 @@ def get_elevations(
         H = h-h_b,
     where h is the elevation of the em27 instrument and h_b is the elevation of the pressure sensor.
     """
-    pressure_config = ioutils.read_yaml_config(config_file)[pressure_config_section]
-    use_pressure_correction_factor = pressure_config[location]['use_pressure_correction_factor']
-    if use_pressure_correction_factor is True:
-        # make sure both pressure sensor and em27 values are given
-        if any(
-            elevation is None for elevation in (
-                pressure_config[location]['pressure_sensor_m'],
-                pressure_config[location]['em27_m']
-            )
-        ):
-            raise ValueError(
-                'To calculate a pressure calibration factor, ensure both'
-                ' pressure sensor and em27 elevation values in m are provided'
-                f' in pipeline configuration file for {location}.'
-            )
-        try:
-            pressure_sensor_elevation_m: float = float(
-                pressure_config[location]['pressure_sensor_m']
-            )
-            em27_elevation_m: float = float(
-                pressure_config[location]['em27_m']
-            )
-        except (TypeError, ValueError):
-            print(
-                f'Could not convert elevations to float for {location}.'
-                ' Check config file elevation data.'
-            )
-            raise
-        # elevation_difference: float = em27_elevation_m - pressure_sensor_elevation_m
-        # Math:   H = h-h_b,
-        if v:
-            print(
-                f'Elevation information for {location}:'
-                f'\nem27_m: {em27_elevation_m}'
-                f'\npressure_sensor_m: {pressure_sensor_elevation_m}'
-                # f'\nElevation difference: {elevation_difference}'
-            )
-        # return elevation_difference
-        return em27_elevation_m, pressure_sensor_elevation_m
-    elif use_pressure_correction_factor in (False, None):
+    location_config = configutils.load_config(config).pressure_location(
+        pressure_config_section,
+        location
+    )
+    if not location_config.use_pressure_correction_factor:
         return None
-    else:
+    # make sure both pressure sensor and em27 values are given
+    if any(
+        elevation is None for elevation in (
+            location_config.pressure_sensor_m,
+            location_config.em27_m
+        )
+    ):
         raise ValueError(
-            'Config parameter use_pressure_correction_factor must be True, False or empty.'
-            f' Got {use_pressure_correction_factor}.'
+            'To calculate a pressure calibration factor, ensure both'
+            ' pressure sensor and em27 elevation values in m are provided'
+            f' in pipeline configuration file for {location}.'
         )
+    pressure_sensor_elevation_m: float = location_config.pressure_sensor_m
+    em27_elevation_m: float = location_config.em27_m
+    # elevation_difference: float = em27_elevation_m - pressure_sensor_elevation_m
+    # Math:   H = h-h_b,
+    if v:
+        print(
+            f'Elevation information for {location}:'
+            f'\nem27_m: {em27_elevation_m}'
+            f'\npressure_sensor_m: {pressure_sensor_elevation_m}'
+            # f'\nElevation difference: {elevation_difference}'
+        )
+    # return elevation_difference
+    return em27_elevation_m, pressure_sensor_elevation_m
+
+
+def get_workers(
+        config: Union[configutils.PipelineConfig, str, PosixPath],
+        pressure_config_section: str,
+        location: str
+) -> int:
+    """
+    Reads the config file and returns the number of processes used to parse
+    pressure files of a location. The `workers` key is optional, default is 1.
+    Raises a ValueError if it is not a positive integer, see
+    `configutils.check_workers`.
+    """
+    workers = configutils.load_config(config).pressure_location(
+        pressure_config_section,
+        location
+    ).workers
+    return 1 if workers is None else workers
 
 
 def generate_unparsed_pressure_file_list(
-        config_file: Union[str, PosixPath],
+        config: Union[configutils.PipelineConfig, str, PosixPath],
         pressure_config_section,
         location: str,
+        index: Union[indexutils.ProcessingIndex, None] = None,
+        raw_file_names: Union[Iterable[str], None] = None,
         v: bool = False,
         vv: bool = False
 ) -> Tuple[
@@ -437,67 +1058,452 @@ def generate_unparsed_pressure_file_list(
     """
     Takes raw and parsed pressure folders from a config file and
     compares the contents based on dates in the file names.
+    If a processing index is given, the index is updated with new and changed
+    raw files and unparsed dates are taken from the index instead of the parsed folder.
+    If `raw_file_names` is given, only the dates of these raw files are returned.
+    Without an index, they are returned even if their output files exist, so
+    that raw files known to have changed are parsed again; with an index,
+    only if the index has them as unparsed.
+    Without an index, the folders are listed, unless the date range is short
+    compared to the raw folders for `probe_dates`, in which case only the file
+    names of the dates in the range are checked.
     Returns a list of full paths of unparsed pressure files.
     """
-    pressure_config = ioutils.read_yaml_config(config_file)[pressure_config_section]
-    raw_pressure_folder = pressure_config[location]['raw_pressure_folder']
-    parsed_pressure_folder = pressure_config[location]['parsed_pressure_folder']
-    start_date = datetime.strptime(
-        pressure_config[location]['start_date'],
-        "%Y-%m-%d"
-    ).date()
-    # Default end date is yesterday
-    if pressure_config[location]['end_date'] is None:
-        end_date = datetime.now().date() - timedelta(days=1)
+    location_config = configutils.load_config(config).pressure_location(
+        pressure_config_section,
+        location
+    )
+    parsed_pressure_folder = location_config.parsed_pressure_folder
+    start_date = location_config.start_date
+    # Default end date is yesterday, or today to parse the growing
+    # file of the current day incrementally
+    if location_config.end_date is None:
+        end_date = datetime.now().date() - timedelta(
+            days=0 if location_config.incremental else 1
+        )
     else:
-        end_date = datetime.strptime(
-            pressure_config[location]['end_date'],
-            "%Y-%m-%d"
-    ).date()
-    raw_pressure_dates = ioutils.generate_date_list_from_folder(
-        raw_pressure_folder,
-        start_date=start_date,
-        end_date=end_date,
-        v=v,
-        vv=vv
+        end_date = location_config.end_date
+    raw_pressure_folders = get_raw_pressure_folders(
+        location_config, start_date, end_date
     )
-    parsed_pressure_dates = ioutils.generate_date_list_from_folder(
-        parsed_pressure_folder,
-        start_date=start_date,
-        end_date=end_date,
-        v=v,
-        vv=vv
+    patterns = get_filename_patterns(location_config)
+    if raw_file_names is not None:
+        requested_files: dict[date, list[str]] = {}
+        for name in sorted(raw_file_names):
+            file_date = ioutils.parse_date_from_fname(name, patterns)
+            if file_date is None:
+                if v:
+                    print(f'* file\'{name}\': no date in file name.')
+                continue
+            if timeutils.date_in_range(
+                file_date, start_date=start_date, end_date=end_date
+            ):
+                requested_files.setdefault(file_date, []).append(name)
+    if index is None and raw_file_names is not None:
+        # the first raw folder with a file of that name, as when listing
+        unparsed_raw_files = {}
+        for file_date, names in requested_files.items():
+            for name in names:
+                raw_path = next(
+                    (
+                        folder/name for folder in raw_pressure_folders
+                        if (folder/name).is_file()
+                    ),
+                    None
+                )
+                if raw_path is not None:
+                    unparsed_raw_files.setdefault(file_date, []).append(raw_path)
+    elif index is None and probe_dates(
+        location_config, start_date, end_date, raw_pressure_folders
+    ):
+        if v:
+            print(f'** Checking file names of dates from {start_date} to {end_date}.')
+        raw_files = {}
+        for folder in raw_pressure_folders:
+            for file_date, names in ioutils.generate_date_map_from_dates(
+                folder,
+                start_date=start_date,
+                end_date=end_date,
+                template=get_location_format(location_config).filename_template,
+                v=vv
+            ).items():
+                raw_files.setdefault(file_date, [folder/names[0]])
+        parsed_pressure_dates = ioutils.generate_date_map_from_dates(
+            parsed_pressure_folder,
+            start_date=start_date,
+            end_date=end_date,
+            template=ioutils.FILENAME_TEMPLATES['csv'],
+            location=location,
+            v=vv
+        )
+        unparsed_raw_files = {
+            file_date: raw_files[file_date]
+            for file_date in ioutils.generate_set_difference(
+                set(raw_files),
+                set(parsed_pressure_dates)
+            )
+        }
+    elif index is None:
+        raw_files = ioutils.generate_date_map_from_folders(
+            raw_pressure_folders,
+            start_date=start_date,
+            end_date=end_date,
+            pattern=f'*.{get_raw_file_extension(location_config)}',
+            patterns=patterns,
+            v=v,
+            vv=vv
+        )
+        parsed_pressure_dates = ioutils.generate_date_list_from_folder(
+            parsed_pressure_folder,
+            start_date=start_date,
+            end_date=end_date,
+            pattern='*.csv',
+            v=v,
+            vv=vv
+        )
+        unparsed_raw_files = {
+            file_date: raw_files[file_date]
+            for file_date in ioutils.generate_set_difference(
+                set(raw_files),
+                set(parsed_pressure_dates)
+            )
+        }
+    else:
+        update_processing_index(
+            index,
+            location_config,
+            start_date=start_date,
+            end_date=end_date,
+            v=v, vv=vv
+        )
+        raw_files = {}
+        unparsed_pressure_dates = set()
+        for entry in sorted(index.entries().values()):
+            if not timeutils.date_in_range(
+                entry.file_date, start_date=start_date, end_date=end_date
+            ):
+                continue
+            raw_files.setdefault(entry.file_date, []).append(Path(entry.raw_path))
+            if entry.status != indexutils.PARSED:
+                unparsed_pressure_dates.add(entry.file_date)
+        if raw_file_names is not None:
+            unparsed_pressure_dates &= set(requested_files)
+        unparsed_raw_files = {
+            file_date: raw_files[file_date]
+            for file_date in unparsed_pressure_dates
+        }
+    unparsed_pressure_dates = sorted(unparsed_raw_files)
+    if location_config.merge_raw_files:
+        # all raw files of a date are parsed together, see `parse_pressure_file`
+        unparsed_pressure_paths = tuple(
+            tuple(sort_raw_file_names(
+                unparsed_raw_files[file_date],
+                file_date,
+                get_location_format(location_config).name
+            ))
+            for file_date
+            in unparsed_pressure_dates
+        )
+    else:
+        unparsed_pressure_paths = tuple(
+            select_raw_file_name(
+                unparsed_raw_files[file_date],
+                file_date,
+                get_location_format(location_config).name
+            )
+            for file_date
+            in unparsed_pressure_dates
+        )
+    output_paths = tuple(
+        Path(parsed_pressure_folder)/ioutils.generate_fname_from_date(
+            file_date,
+            'csv',  # keep as "csv" to help keep COCCON processing same format
+                    # as parsed pressure files are sent to KIT
+            location
+        )
+        for file_date
+        in unparsed_pressure_dates
     )
-    unparsed_pressure_dates = ioutils.generate_set_difference(
-        set(raw_pressure_dates),
-        set(parsed_pressure_dates)
+    return unparsed_pressure_paths, output_paths
+
+
+def probe_dates(
+        location_config: configutils.PressureLocationConfig,
+        start_date: date,
+        end_date: date,
+        raw_pressure_folders: tuple[Path, ...] = ()
+) -> bool:
+    """
+    Checks if the files of a date range are found by checking the file name
+    of each date rather than by listing the raw and parsed folders: if the
+    range has at most `PROBE_DATE_LIMIT` days and fewer days than the raw
+    folders have files, estimated from their size with `estimate_folder_entries`,
+    so that a few lookups replace reading large folders, and raw files are named
+    after the `filename_template` of their format, i.e. the location has no
+    `raw_file_pattern`.
+    Only the raw file named after the template is found for each date, so
+    locations that `merge_raw_files` are always listed.
+    Raises ValueError if `end_date` is earlier than `start_date`.
+    """
+    if start_date > end_date:
+        raise ValueError(
+            f"start_date {start_date} must be earlier or equal to end_date {end_date}."
+        )
+    if (
+        location_config.raw_file_pattern is not None
+        or location_config.merge_raw_files
+    ):
+        return False
+    days = (end_date - start_date).days + 1
+    return days <= PROBE_DATE_LIMIT and days < sum(
+        estimate_folder_entries(folder) for folder in raw_pressure_folders
     )
-    unparsed_pressure_files = ioutils.generate_file_list_from_dates(
-        unparsed_pressure_dates,
-        pressure_config[location]["raw_file_extension"]
+
+
+def estimate_folder_entries(
+        folder: Path
+) -> int:
+    """
+    Estimates the number of entries of a folder from its size, which grows
+    with its entries on most file systems, with one `os.stat` call instead of
+    listing it. Returns 0 if the folder cannot be read.
+    """
+    try:
+        return os.stat(folder).st_size // FOLDER_ENTRY_BYTES
+    except OSError:
+        return 0
+
+
+def get_raw_pressure_folders(
+        location_config: configutils.PressureLocationConfig,
+        start_date: Union[date, None] = None,
+        end_date: Union[date, None] = None
+) -> tuple[Path, ...]:
+    """
+    Returns the raw folders of a location. A folder containing `{year}`, e.g.
+    `raw/{year}` for a layout partitioned by year, gives one folder per year
+    from `start_date` to `end_date`, default is the dates of the location,
+    or today without an end date.
+    """
+    start_date = start_date or location_config.start_date
+    end_date = end_date or location_config.end_date or datetime.now().date()
+    folders: dict[Path, None] = {}
+    for folder in location_config.raw_pressure_folders or (
+        location_config.raw_pressure_folder,
+    ):
+        if '{year}' in folder:
+            for year in range(start_date.year, end_date.year + 1):
+                folders[Path(folder.replace('{year}', str(year)))] = None
+        else:
+            folders[Path(folder)] = None
+    return tuple(folders)
+
+
+def get_filename_patterns(
+        location_config: configutils.PressureLocationConfig
+) -> dict[str, re.Pattern]:
+    """
+    Returns the file name formats used to find the dates of the raw files
+    of a location: `ioutils.FILENAME_DATE_PATTERNS`, with the `raw_file_pattern`
+    of the location, or else the file name pattern of its raw pressure format,
+    for its raw file extension, see `get_raw_file_extension`.
+    """
+    return ioutils.compile_filename_patterns({
+        get_raw_file_extension(location_config): (
+            location_config.raw_file_pattern
+            or get_location_format(location_config).filename_pattern
+        )
+    })
+
+
+def select_raw_file_name(
+        raw_file_names: List[Union[str, Path]],
+        file_date: date,
+        raw_format: str
+) -> Union[str, Path]:
+    """
+    Returns the raw file parsed for a date among the raw files of that date,
+    given as names or paths: the file with the name of the date given by the
+    `filename_template` of `raw_format` if there is one (e.g.
+    yymmdd_PTU300_log.txt rather than yymmdd_PTU300_error_log.txt), else the
+    first file in sorted order of names.
+    """
+    return sort_raw_file_names(raw_file_names, file_date, raw_format)[0]
+
+
+def sort_raw_file_names(
+        raw_file_names: List[Union[str, Path]],
+        file_date: date,
+        raw_format: str
+) -> List[Union[str, Path]]:
+    """
+    Sorts the raw files of a date, given as names or paths, in the order
+    they are preferred: the file with the name of the date given by the
+    `filename_template` of `raw_format` first, then the others by name.
+    """
+    default_name = get_raw_pressure_format(raw_format).filename_template.format(
+        date=file_date
     )
-    output_file_names = ioutils.generate_file_list_from_dates(
-        unparsed_pressure_dates,
-        'csv',  # keep as "csv" to help keep COCCON processing same format
-                # as parsed pressure files are sent to KIT
-        location
+    return sorted(
+        raw_file_names,
+        key=lambda raw_file_name: (
+            Path(raw_file_name).name != default_name,
+            Path(raw_file_name).name
+        )
     )
-    unparsed_pressure_paths = tuple(
-        Path(raw_pressure_folder)/file
-        for file
-        in unparsed_pressure_files
+
+
+def update_processing_index(
+        index: indexutils.ProcessingIndex,
+        location_config: configutils.PressureLocationConfig,
+        start_date: Union[date, None] = None,
+        end_date: Union[date, None] = None,
+        v: bool = False,
+        vv: bool = False
+) -> None:
+    """
+    Brings a processing index up to date with the raw folders of a location,
+    see `get_raw_pressure_folders`. Only the raw folders are listed. Raw files that are not in the index yet are
+    recorded with their size and modification time, as parsed if the output
+    file of their date exists, else as pending. Records of raw files that no
+    longer exist are removed.
+    Parsed raw files with dates from `start_date` to `end_date` (all dates if
+    not given) are checked for changes since they were parsed with the
+    `change_detection` mode of the location (see `indexutils.is_changed`)
+    and set to pending if they changed, so their date is parsed again.
+    For `incremental` locations, raw files with lines appended since they were
+    parsed are set to pending too, keeping their byte offset, so that only
+    the new lines are parsed. Raw files whose parsed part changed, e.g. that
+    were replaced by a larger corrected version, are parsed again from the
+    start instead (see `indexutils.is_appended`).
+    Raw files to parse are recorded with their size, modification time and,
+    with 'hash' change detection, content hash as they are before parsing, so
+    that lines written while they are parsed are found by the next run.
+    Raw files found unchanged by their hash are recorded with their new
+    modification time, so they are not hashed again.
+    """
+    record_hash = location_config.change_detection == 'hash'
+
+    def refresh(entry, stat):
+        # the raw file as it is before parsing
+        return entry._replace(
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_hash=(
+                indexutils.file_hash(entry.raw_path) if record_hash
+                else entry.content_hash
+            )
+        )
+
+    parsed_pressure_folder = Path(location_config.parsed_pressure_folder)
+    raw_file_folders = ioutils.read_file_folders(
+        get_raw_pressure_folders(location_config, start_date, end_date),
+        pattern=f'*.{get_raw_file_extension(location_config)}',
+        v=vv
     )
-    output_paths = tuple(
-        Path(parsed_pressure_folder)/name
-        for name
-        in output_file_names
+    raw_file_names = list(raw_file_folders)
+    known_entries = index.entries()
+    index.remove(
+        set(known_entries).difference(raw_file_names)
     )
-    return unparsed_pressure_paths, output_paths
+    changed_entries = []
+    appended_entries = []
+    refreshed_entries = []
+    if location_config.incremental or location_config.change_detection != 'none':
+        for name in raw_file_names:
+            entry = known_entries.get(name)
+            if (
+                entry is None
+                or (start_date is not None and entry.file_date < start_date)
+                or (end_date is not None and entry.file_date > end_date)
+            ):
+                continue
+            stat = (raw_file_folders[name]/name).stat()
+            if entry.status != indexutils.PARSED:
+                # still to parse, e.g. after a failure
+                if (stat.st_size, stat.st_mtime_ns) != (entry.size, entry.mtime_ns):
+                    refreshed_entries.append(refresh(entry, stat))
+            elif location_config.incremental and indexutils.is_appended(
+                entry, stat, location_config.change_detection
+            ):
+                appended_entries.append(
+                    refresh(entry, stat)._replace(status=indexutils.PENDING)
+                )
+            elif indexutils.is_changed(
+                entry,
+                stat,
+                location_config.change_detection
+            ):
+                # parsed again from the start
+                changed_entries.append(
+                    refresh(entry, stat)._replace(
+                        status=indexutils.PENDING,
+                        byte_offset=None,
+                        last_timestamp=None,
+                        parsed_hash=None
+                    )
+                )
+            elif record_hash and stat.st_mtime_ns != entry.mtime_ns:
+                # touched without changes, see indexutils.is_changed
+                refreshed_entries.append(
+                    entry._replace(mtime_ns=stat.st_mtime_ns)
+                )
+        index.add(changed_entries + appended_entries + refreshed_entries)
+        if changed_entries:
+            print(
+                f'Found {len(changed_entries)} raw files changed since they were parsed'
+                f' for location « {location_config.name} ».'
+            )
+        if appended_entries and v:
+            print(
+                f'Found {len(appended_entries)} raw files with new lines'
+                f' for location « {location_config.name} ».'
+            )
+    new_file_names = [
+        name for name in raw_file_names if name not in known_entries
+    ]
+    if not new_file_names:
+        return
+    # probing a few output files is cheaper than listing the parsed folder
+    parsed_file_names = None
+    if len(new_file_names) > INDEX_PROBE_LIMIT:
+        parsed_file_names = set(
+            ioutils.read_file_names(parsed_pressure_folder, pattern='*.csv')
+        )
+    patterns = get_filename_patterns(location_config)
+    new_entries = []
+    for name in new_file_names:
+        file_date = ioutils.parse_date_from_fname(name, patterns)
+        if file_date is None:
+            if v:
+                print(f'* file\'{name}\': no date in file name.')
+            continue
+        output_name = ioutils.generate_fname_from_date(
+            file_date, 'csv', location=location_config.name
+        )
+        if parsed_file_names is None:
+            parsed = (parsed_pressure_folder/output_name).exists()
+        else:
+            parsed = output_name in parsed_file_names
+        stat = (raw_file_folders[name]/name).stat()
+        entry = indexutils.IndexEntry(
+            raw_name=name,
+            raw_path=str(raw_file_folders[name]/name),
+            file_date=file_date,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            output_path=str(parsed_pressure_folder/output_name) if parsed else None,
+            status=indexutils.PARSED if parsed else indexutils.PENDING
+        )
+        new_entries.append(entry if parsed else refresh(entry, stat))
+    index.add(new_entries)
+    if v:
+        print(f'Added {len(new_entries)} raw files to processing index {index.path}.')
 
 
 def preprocess_case_log_file(
-        file_path: Union[str, PosixPath]
-) -> StringIO:
+        file_path: Union[str, PosixPath, io.TextIOBase]
+) -> 'CaseLogReader':
     """
     Replaces equal signs in case log file to prevent double digit temperature
     readings from changing the number of columns in the file.
@@ -507,8 +1513,76 @@ def preprocess_case_log_file(
     T -10
     After preprocessing "-10" will be read into a dataframe as a numerical value for temperature.
     This preprocessing allows to sure pandas read_csv with separator r"\s+" (one or more spaces).
-    Returns a StringIO object in order to avoid writing a partially processed pressure file.
+    Returns a file-like object that replaces the equal signs while the file is read,
+    so the file is never held in memory as a whole and no partially processed
+    pressure file is written. Use it as a context manager to close the file.
+    `file_path` may also be a text stream, which is read in the same way.
     """
-    with open(file_path, 'r') as file:
-        data = file.read()
-    return StringIO(data.replace('=', ' '))
+    return CaseLogReader(file_path)
+
+
+class CaseLogReader(io.TextIOBase):
+    """
+    Read-only text stream over a case log file in which equal signs are replaced
+    by spaces. As one character is replaced by one character, chunks and lines
+    can be transformed independently and memory use does not depend on file size.
+    """
+
+    def __init__(
+            self,
+            file_path: Union[str, PosixPath, io.TextIOBase]
+    ) -> None:
+        if hasattr(file_path, 'read'):
+            self._file = file_path
+        else:
+            self._file = open(file_path, 'r')
+
+    def readable(self) -> bool:
+        return True
+
+    def read(
+            self,
+            size: Union[int, None] = -1
+    ) -> str:
+        return self._file.read(size).replace('=', ' ')
+
+    def readline(
+            self,
+            size: int = -1
+    ) -> str:
+        return self._file.readline(size).replace('=', ' ')
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+register_raw_pressure_format(RawPressureFormat(
+    name='lst',
+    extension='lst',
+    filename_pattern=ioutils.FILENAME_DATE_PATTERNS['lst'],
+    filename_template=ioutils.FILENAME_TEMPLATES['lst'],
+    columns={
+        'timestamp': AWS_COLUMNS[0],
+        'pressure': AWS_COLUMNS[1],
+        'temperature': AWS_COLUMNS[2],
+        'rh': AWS_COLUMNS[3]
+    },
+    reader=read_aws_frame,
+    header_reader=read_aws_header
+))
+register_raw_pressure_format(RawPressureFormat(
+    name='txt',
+    extension='txt',
+    filename_pattern=ioutils.FILENAME_DATE_PATTERNS['txt'],
+    filename_template=ioutils.FILENAME_TEMPLATES['txt'],
+    columns={
+        'date': 0,
+        'time': 1,
+        'pressure': 9,
+        'temperature': 12,
+        'rh': 15
+    },
+    reader=read_case_log_frame,
+    header_reader=read_case_log_header
+))
@@ -1,64 +1,812 @@
+import errno
+import fcntl
+import fnmatch
+import functools
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Union
+from typing import Any, Callable, Iterable, NamedTuple, Union
+
+# ways of making a target available at a link path, see `materialize`
+LINK_MODES: tuple[str, ...] = ('symlink', 'hardlink', 'reflink', 'copy')
+# bytes copied by one thread at a time in `copy_file`
+COPY_CHUNK_SIZE: int = 16*1024*1024
+COPY_BUFFER_SIZE: int = 1024*1024
+# ioctl cloning a file on copy-on-write file systems (Btrfs, XFS), from linux/fs.h
+FICLONE: int = 0x40049409
+
+
+class SymlinkPlan(NamedTuple):
+    """
+    Symlinks to write in a link directory, as pairs of target path and link
+    path, sorted by what is found at the link path: nothing, or in other
+    modes than symlink a folder missing items of its target (`create`), a
+    symlink to the target, or its copy in other modes (`existing`) or anything
+    else (`conflicts`).
+    """
+    create: list[tuple[Path, Path]]
+    existing: list[tuple[Path, Path]]
+    conflicts: list[tuple[Path, Path]]
+
+
+class SymlinkResult(NamedTuple):
+    """
+    Symlinks of a plan that were written by `create_symlinks`, and the ones
+    that could not be written with their error, in the order of the plan.
+    """
+    plan: SymlinkPlan
+    created: list[tuple[Path, Path]]
+    failed: list[tuple[Path, Path, OSError]]
 
 
 def write_symlinks(
-        target_folder_path: Union[str, Path],
+        target_folder_path: Union[str, Path, None],
         link_folder_path: Union[str, Path],
         link_names: Union[None, tuple[str]] = None,
         resolve_path: bool = True,
-        v: bool = False
+        v: bool = False,
+        link_name: Union[Callable[[str], Union[str, None]], None] = None,
+        targets: Union[Iterable[tuple[Path, str]], None] = None,
+        workers: int = 1,
+        mode: str = 'symlink',
+        depth: Union[int, None] = 1,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = ()
 ) -> int:
     """
     Writes symlinks in link directory that point to files in a
     target directory. Creates a link directory if it doesn't exist.
     Works for directories and files.
+    Links are named after their targets, or with `link_name`, a function
+    applied to the name of each target while the target directory is listed
+    (see `list_targets`), or with `link_names`, a tuple of names of the targets
+    in sorted order. `targets` replaces the listing of the target directory
+    with pairs of target path and link name computed by the caller.
+    The target and link directories are listed once and the links are
+    planned with `plan_symlinks`, so only missing links are written; links
+    that exist with another target are reported and left unchanged.
+    `workers` is the number of threads writing links, see `create_symlinks`.
+    `mode` selects how targets are written at the link paths, one of
+    `LINK_MODES`, see `materialize`. With `depth`, `include` and `exclude`,
+    the tree of the target directory is mirrored in the link directory, see
+    `list_targets`.
     """
+    check_link_mode(mode)
     link_dir = Path(link_folder_path)
     link_dir.mkdir(parents=True, exist_ok=True)
-    target_dir = Path(target_folder_path)
-    target_items = sorted(
-        target_dir.glob('*'),
-        key=lambda p: p.name
-    )
-    symlink_count = 0
+    if targets is None:
+        target_dir = Path(target_folder_path)
+        try:
+            targets = list_targets(
+                target_dir,
+                resolve_path=resolve_path,
+                link_name=link_name,
+                depth=depth,
+                include=include,
+                exclude=exclude
+            )
+        except FileNotFoundError:
+            print(f"Error!\n> Target folder {target_dir} not found.")
+            targets = []
+    else:
+        targets = list(targets)
+        target_dir = target_folder_path
     if link_names is not None:
-        if not isinstance(link_names, tuple) or len(link_names) != len(target_items):
+        if not isinstance(link_names, tuple) or len(link_names) != len(targets):
             raise TypeError(
                 "Link names should be a tuple with the same length as files in target directory."
-                f"Found {len(target_items)} in target directory."
+                f"Found {len(targets)} in target directory."
                 f" Got type {type(link_names)} of length {len(link_names)}."
             )
-        for target_item, link_name in zip(target_items, link_names):
+        targets = [
+            (target_path, name)
+            for (target_path, _), name in zip(targets, link_names)
+        ]
+    return report_symlinks(
+        create_symlinks(
+            plan_symlinks(targets, link_dir, mode=mode), workers=workers, mode=mode
+        ),
+        target_dir,
+        link_dir,
+        v=v
+    )
+
+
+def list_targets(
+        target_dir: Path,
+        resolve_path: bool = True,
+        link_name: Union[Callable[[str], Union[str, None]], None] = None,
+        skipped: Union[list[str], None] = None,
+        depth: Union[int, None] = 1,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = ()
+) -> list[tuple[Path, str]]:
+    """
+    Returns the items of a target directory sorted by name as pairs of target
+    path and link name, listed once with `os.scandir`, hidden items included
+    as with `Path.glob('*')`. Link names are the names of the items,
+    or the result of `link_name` for each name; items it returns None for
+    are skipped, and their paths added to `skipped` if it is given.
+    With `resolve_path`, paths in a relative target directory are made
+    absolute like in `write_symlink`: the directory is resolved once and only
+    items that are symlinks are resolved on their own. Raises a
+    FileNotFoundError if the target directory is missing, e.g. mistyped or
+    not mounted.
+    With a `depth` above 1 (None for no limit), the tree of the target
+    directory is mirrored: folders above that depth are walked, each listed
+    once, and their items are returned with link names that are paths
+    relative to the link directory, e.g. '2016/06/20160602'. Symlinks to
+    folders are not followed. `include` and `exclude` are shell-style patterns
+    (see `fnmatch`) matched with the path of items relative to the target
+    directory, where `*` also matches '/': only items matching an `include`
+    pattern, if any, are returned, and items and folders matching an
+    `exclude` pattern are skipped, e.g. '.*' and '*/.*' for hidden items.
+    """
+    include = compile_path_patterns(include)
+    exclude = compile_path_patterns(exclude)
+    resolve = resolve_path and not target_dir.is_absolute()
+    resolved_dir = target_dir.resolve() if resolve else target_dir
+    targets = []
+
+    def walk(folder, relative_folder, level):
+        try:
+            with os.scandir(folder) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except (FileNotFoundError, NotADirectoryError):
+            if level == 1:
+                raise FileNotFoundError(
+                    errno.ENOENT, 'Target folder not found', str(target_dir)
+                ) from None
+            # removed while the tree is walked
+            return
+        for entry in entries:
+            relative_path = (
+                entry.name if not relative_folder
+                else f'{relative_folder}/{entry.name}'
+            )
+            if exclude is not None and exclude.match(relative_path):
+                continue
+            if (depth is None or level < depth) and entry.is_dir(follow_symlinks=False):
+                walk(entry.path, relative_path, level + 1)
+                continue
+            if include is not None and not include.match(relative_path):
+                continue
+            name = entry.name if link_name is None else link_name(entry.name)
+            if name is None:
+                if skipped is not None:
+                    skipped.append(relative_path)
+                continue
+            if relative_folder:
+                name = f'{relative_folder}/{name}'
+            if resolve and entry.is_symlink():
+                target_path = (target_dir/relative_path).resolve()
+            else:
+                target_path = resolved_dir/relative_path
+            targets.append((target_path, name))
+
+    walk(target_dir, '', 1)
+    return targets
+
+
+def compile_path_patterns(
+        patterns: Iterable[str]
+) -> Union[re.Pattern, None]:
+    """
+    Compiles shell-style patterns (see `fnmatch`) into one regular expression
+    matching paths that match any of them, or returns None without patterns.
+    """
+    patterns = [fnmatch.translate(pattern) for pattern in patterns]
+    if not patterns:
+        return None
+    return re.compile('|'.join(patterns))
+
+
+def plan_symlinks(
+        targets: Iterable[tuple[Path, str]],
+        link_dir: Path,
+        mode: str = 'symlink'
+) -> SymlinkPlan:
+    """
+    Plans symlinks to write in a link directory from pairs of target path and
+    link name. The link directory is listed once with `os.scandir`; only link
+    names that already exist as symlinks are read to compare their target.
+    Link names that are relative paths, e.g. from `list_targets` with a
+    `depth`, are looked up in a listing of their folder, made once per folder.
+    A link name given twice is a conflict the second time, unless it has the
+    same target. With another `mode`, existing link paths are compared with
+    their target with `is_materialized`; a folder at the link path that only
+    misses items of its target folder, e.g. added since the last run or left
+    by an interrupted run, is planned to be completed with `create_symlinks`,
+    while one with items that differ from their target is a conflict.
+    """
+    check_link_mode(mode)
+    # {name: is symlink} of the items of each listed folder of the link directory
+    listings: dict[str, dict[str, bool]] = {}
+    planned: dict[str, Path] = {}
+    plan = SymlinkPlan([], [], [])
+    for target_path, link_name in targets:
+        link_path = link_dir/link_name
+        folder, _, name = link_name.rpartition('/')
+        if folder not in listings:
+            listings[folder] = {}
             try:
-                symlink_count += write_symlink(
-                    target_item, link_dir,
-                    link_name, resolve_path=resolve_path,
-                    v=v
-                )
-            except Exception as e:
-                if v:
-                    print(
-                        f"Problem linking {target_item} -> {link_dir/link_name}", e
-                    )
+                with os.scandir(link_dir/folder) as entries:
+                    for entry in entries:
+                        listings[folder][entry.name] = entry.is_symlink()
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+        link_entries = listings[folder]
+        if link_name in planned:
+            if planned[link_name] == target_path:
+                continue
+            plan.conflicts.append((target_path, link_path))
+        elif name not in link_entries:
+            plan.create.append((target_path, link_path))
+            planned[link_name] = target_path
+        elif mode == 'symlink':
+            if link_entries[name] and os.readlink(link_path) == str(target_path):
+                plan.existing.append((target_path, link_path))
+                planned[link_name] = target_path
+            else:
+                plan.conflicts.append((target_path, link_path))
+        elif (
+            not link_entries[name]
+            and os.path.isdir(target_path)
+            and os.path.isdir(link_path)
+        ):
+            missing, differing = compare_folders(target_path, link_path, mode)
+            if differing:
+                plan.conflicts.append((target_path, link_path))
+            elif missing:
+                # completed by create_symlinks
+                plan.create.append((target_path, link_path))
+                planned[link_name] = target_path
+            else:
+                plan.existing.append((target_path, link_path))
+                planned[link_name] = target_path
+        elif is_materialized(target_path, link_path, mode):
+            plan.existing.append((target_path, link_path))
+            planned[link_name] = target_path
+        else:
+            plan.conflicts.append((target_path, link_path))
+    return plan
+
+
+def create_symlinks(
+        plan: SymlinkPlan,
+        workers: int = 1,
+        mode: str = 'symlink'
+) -> SymlinkResult:
+    """
+    Writes the symlinks to create of a plan, without reporting them. With more
+    than one worker, links are written by a pool of that many threads, which
+    overlap the round trip of each `symlink` call on network mounts. Results
+    are kept in the order of the plan, whatever the order links are written in.
+    With another `mode`, targets are made available with `materialize`. In
+    'copy' mode, targets are copied one after the other, each file in chunks
+    by `workers` threads, and folders already at the link path are completed
+    with the items they miss. The folders of links in sub-folders of the link
+    directory are created first, once per folder.
+    """
+    for folder in sorted({link_path.parent for _, link_path in plan.create}):
+        try:
+            folder.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            # links in the folder fail and are reported
+            pass
+
+    def create(target_link):
+        try:
+            if mode == 'symlink':
+                os.symlink(*target_link)
+            else:
+                materialize(*target_link, mode, workers=workers, update=True)
+        except OSError as e:
+            return e
+        return None
+
+    if workers > 1 and len(plan.create) > 1 and check_link_mode(mode) != 'copy':
+        with ThreadPoolExecutor(max_workers=min(workers, len(plan.create))) as executor:
+            errors = list(executor.map(create, plan.create))
     else:
-        for target_item in target_items:
-            try:
-                symlink_count += write_symlink(
-                    target_item, link_dir,
-                    target_item.name, resolve_path=resolve_path,
-                    v=v
-                )
-            except Exception as e:
-                if v:
-                    print(
-                        f"Problem linking {target_item} -> {link_dir/target_item.name}", e
-                    )
+        errors = [create(target_link) for target_link in plan.create]
+    result = SymlinkResult(plan, [], [])
+    for (target_path, link_path), error in zip(plan.create, errors):
+        if error is None:
+            result.created.append((target_path, link_path))
+        else:
+            result.failed.append((target_path, link_path, error))
+    return result
+
+
+def report_symlinks(
+        result: SymlinkResult,
+        target_dir: Union[str, Path, None],
+        link_dir: Union[str, Path],
+        v: bool = False
+) -> int:
+    """
+    Prints the symlinks of a result that conflict with existing files or could
+    not be written, and with `v` the ones that were skipped or written, in the
+    order of the plan. Returns the number of symlinks written.
+    """
+    if v:
+        for target_path, link_path in result.plan.existing:
+            print(
+                f"Existing symlink found: {link_path} -> {target_path}. Skipping."
+            )
+    for target_path, link_path in result.plan.conflicts:
+        print(
+            f"Error!\n> File {link_path} exists but does not point to {target_path}."
+            " Check and try again."
+        )
+    for target_path, link_path, e in result.failed:
+        print(
+            f"Error!\n> Error accessing {target_path} or {link_path}."
+            f" Check e.g. permissions or the file exists.",
+            e
+        )
+    if v:
+        for target_path, link_path in result.created:
+            print(
+                f"Symlink created: {link_path} -> {target_path}"
+            )
     print(
-        f"******\n{symlink_count} symlinks written."
+        f"******\n{len(result.created)} symlinks written."
         f" Link folder: {link_dir} -> Target folder: {target_dir}\n******"
     )
-    return symlink_count
+    return len(result.created)
+
+
+def sync_symlinks(
+        target_dir: Path,
+        link_dir: Path,
+        state: Union[dict, None] = None,
+        resolve_path: bool = True,
+        link_name: Union[Callable[[str], Union[str, None]], None] = None,
+        workers: int = 1,
+        skipped: Union[list[str], None] = None,
+        mode: str = 'symlink',
+        depth: Union[int, None] = 1,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+        link_name_rule: Union[list, None] = None
+) -> tuple[Union[SymlinkResult, None], list[tuple[Path, Path]], dict]:
+    """
+    Writes the symlinks of a target directory like `write_symlinks`, without
+    reporting them, using `state`, the entry of the target directory recorded
+    by the previous run (see `read_symlink_state`), or None.
+    If the modification time of the target directory is the recorded one, no
+    item was added to or removed from it, so it is not listed and None is
+    returned as result, as long as the modification time of the link
+    directory (see `record_link_folder_state`) and the settings of the links
+    are the recorded ones too: the link directory, `mode`, `depth`, `include`,
+    `exclude` and `link_name_rule`, a JSON compatible description of
+    `link_name` given by the caller. Otherwise, links recorded for targets
+    that no longer exist are removed with `prune_symlinks`. `link_name`,
+    `skipped`, `depth`, `include` and `exclude` are passed to `list_targets`,
+    `mode` to `plan_symlinks` and `create_symlinks`. When the tree of the
+    target directory is mirrored (`depth` other than 1), or targets are copied
+    (`mode` other than symlink), changes in its sub-folders or files do not
+    change its modification time, so it is always listed. It is also listed
+    again after a run where some links could not be written.
+    Returns the result, the removed links and the new state entry.
+    """
+    settings = {
+        'link_folder': str(link_dir),
+        'mode': mode,
+        'link_name_rule': link_name_rule,
+        'depth': depth,
+        'include': list(include),
+        'exclude': list(exclude)
+    }
+    mtime_ns = None
+    if depth == 1 and mode == 'symlink':
+        try:
+            mtime_ns = os.stat(target_dir).st_mtime_ns
+        except FileNotFoundError:
+            pass
+    if (
+        state is not None
+        and mtime_ns is not None
+        and state['mtime_ns'] == mtime_ns
+        and state.get('settings') == settings
+        and state.get('link_mtime_ns') == link_folder_mtime(link_dir)
+    ):
+        return None, [], state
+    # listed after the modification time is taken, so that items added
+    # meanwhile are found again by the next run
+    targets = list_targets(
+        target_dir,
+        resolve_path=resolve_path,
+        link_name=link_name,
+        skipped=skipped,
+        depth=depth,
+        include=include,
+        exclude=exclude
+    )
+    result = create_symlinks(
+        plan_symlinks(targets, link_dir, mode=mode), workers=workers, mode=mode
+    )
+    removed = []
+    if (
+        state is not None
+        and state.get('settings', settings)['link_folder'] == settings['link_folder']
+    ):
+        target_paths = {str(target_path) for target_path, _ in targets}
+        removed = prune_symlinks(
+            (
+                (Path(target_path), link_dir/name)
+                for name, target_path in state['links'].items()
+                if target_path not in target_paths
+            ),
+            mode=mode
+        )
+    links = {
+        (
+            link_path.name if depth == 1
+            else link_path.relative_to(link_dir).as_posix()
+        ): str(target_path)
+        for target_path, link_path in result.created + result.plan.existing
+    }
+    # links that failed, e.g. on a transient error of a network mount, are
+    # written again by the next run, so the target directory is listed again
+    return result, removed, record_link_folder_state(
+        {
+            'mtime_ns': None if result.failed else mtime_ns,
+            'settings': settings,
+            'links': links
+        },
+        link_dir
+    )
+
+
+def link_folder_mtime(
+        link_dir: Path
+) -> Union[int, None]:
+    """
+    Returns the modification time in ns of a link directory, or None if it
+    cannot be read.
+    """
+    try:
+        return os.stat(link_dir).st_mtime_ns
+    except OSError:
+        return None
+
+
+def record_link_folder_state(
+        state: dict,
+        link_dir: Path
+) -> dict:
+    """
+    Returns a state entry of `sync_symlinks` with the current modification
+    time of its link directory, so that links removed from or added to it
+    after this call make the next run list the target directory again. Call
+    it again once all target directories of a link directory were synced.
+    """
+    return {**state, 'link_mtime_ns': link_folder_mtime(link_dir)}
+
+
+def prune_symlinks(
+        links: Iterable[tuple[Path, Path]],
+        mode: str = 'symlink'
+) -> list[tuple[Path, Path]]:
+    """
+    Removes symlinks, given as pairs of target path and link path, that still
+    point to their target if the target no longer exists. Other files at the
+    link paths are left unchanged. With another `mode`, the files or folders
+    written by `materialize` at the link paths are removed if their target no
+    longer exists; symlinks at the link paths are left unchanged.
+    Returns the removed links.
+    """
+    check_link_mode(mode)
+    removed = []
+    for target_path, link_path in links:
+        try:
+            if os.path.exists(target_path):
+                continue
+            if mode == 'symlink':
+                if os.readlink(link_path) != str(target_path):
+                    continue
+                os.unlink(link_path)
+            elif link_path.is_symlink():
+                continue
+            elif link_path.is_dir():
+                shutil.rmtree(link_path)
+            else:
+                os.unlink(link_path)
+        except OSError:
+            continue
+        removed.append((target_path, link_path))
+    return removed
+
+
+def read_symlink_state(
+        state_file_path: Union[str, Path]
+) -> dict:
+    """
+    Reads the state of symlink jobs recorded by `write_symlink_state`: by job
+    name and target folder, the modification time of the target folder and
+    the links written to its items, as {link name: target path}.
+    A missing state file gives an empty state.
+    """
+    try:
+        with open(state_file_path) as state_file:
+            return json.load(state_file)
+    except FileNotFoundError:
+        return {}
+
+
+def write_symlink_state(
+        state_file_path: Union[str, Path],
+        state: dict
+) -> None:
+    """
+    Writes the state of symlink jobs, see `read_symlink_state`. The state is
+    written to a temporary file that replaces the state file, so an
+    interrupted run leaves the previous state.
+    """
+    state_file_path = Path(state_file_path)
+    state_file_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = state_file_path.with_name(f'.{state_file_path.name}.tmp')
+    with open(temporary_path, 'w') as state_file:
+        json.dump(state, state_file)
+    os.replace(temporary_path, state_file_path)
+
+
+def check_link_mode(
+        mode: str
+) -> str:
+    """
+    Returns mode if it is one of `LINK_MODES`, else raises a ValueError.
+    """
+    if mode not in LINK_MODES:
+        raise ValueError(
+            f"Link mode must be one of {', '.join(LINK_MODES)}. Got '{mode}'."
+        )
+    return mode
+
+
+def materialize(
+        target_path: Path,
+        link_path: Path,
+        mode: str = 'symlink',
+        workers: int = 1,
+        update: bool = False
+) -> None:
+    """
+    Makes a target available at a link path: as a symlink, as a hard link
+    (shares the data of the target, on the same file system only), as a
+    copy-on-write clone with `reflink_file`, or as a copy with `copy_file`
+    using `workers` threads. Hard links, clones and copies of a folder are
+    made file by file in a temporary folder next to the link path, which is
+    renamed once complete. Raises a FileExistsError if the link path exists.
+    With `update`, a folder already at the link path, e.g. from a previous
+    run, is completed with the items of the target folder it is missing,
+    see `compare_folders`.
+    """
+    if check_link_mode(mode) == 'symlink':
+        os.symlink(target_path, link_path)
+        return
+    if mode == 'hardlink':
+        copy_function = os.link
+    elif mode == 'reflink':
+        copy_function = reflink_file
+    else:
+        copy_function = functools.partial(copy_file, workers=workers)
+    if not os.path.isdir(target_path):
+        copy_function(target_path, link_path)
+    elif update and os.path.isdir(link_path) and not os.path.islink(link_path):
+        missing, _ = compare_folders(target_path, link_path, mode)
+        for relative_path in missing:
+            source_path = os.path.join(target_path, relative_path)
+            if os.path.isdir(source_path):
+                copy_folder(source_path, Path(link_path, relative_path), copy_function)
+            else:
+                copy_function(source_path, os.path.join(link_path, relative_path))
+    else:
+        copy_folder(target_path, Path(link_path), copy_function)
+
+
+def copy_folder(
+        source_path: Union[str, Path],
+        destination_path: Path,
+        copy_function: Callable[[str, str], Any]
+) -> None:
+    """
+    Copies a folder with `shutil.copytree` and `copy_function` into a
+    temporary folder next to the destination, renamed once complete, so that
+    an interrupted copy is never taken for a complete one. Raises a
+    FileExistsError if the destination exists.
+    """
+    if os.path.lexists(destination_path):
+        raise FileExistsError(
+            errno.EEXIST, os.strerror(errno.EEXIST), str(destination_path)
+        )
+    temporary_path = destination_path.with_name(f'.{destination_path.name}.part')
+    # left by an interrupted copy
+    shutil.rmtree(temporary_path, ignore_errors=True)
+    try:
+        shutil.copytree(source_path, temporary_path, copy_function=copy_function)
+        os.rename(temporary_path, destination_path)
+    except BaseException:
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        raise
+
+
+def compare_folders(
+        target_path: Union[str, Path],
+        link_path: Union[str, Path],
+        mode: str
+) -> tuple[list[str], list[str]]:
+    """
+    Compares a target folder with the folder written for it by `materialize`,
+    walking both once with `os.scandir`. Returns the paths, relative to the
+    target folder, of the items missing in the link folder (a missing
+    folder is returned without its items) and of the items that differ from
+    their target (see `is_materialized`).
+    """
+    missing: list[str] = []
+    differing: list[str] = []
+
+    def walk(target_folder, link_folder, relative_folder):
+        try:
+            with os.scandir(link_folder) as entries:
+                link_entries = {entry.name: entry for entry in entries}
+        except (FileNotFoundError, NotADirectoryError):
+            link_entries = {}
+        with os.scandir(target_folder) as entries:
+            for entry in entries:
+                relative_path = os.path.join(relative_folder, entry.name)
+                link_entry = link_entries.get(entry.name)
+                if link_entry is None:
+                    missing.append(relative_path)
+                elif entry.is_dir():
+                    if link_entry.is_dir(follow_symlinks=False):
+                        walk(entry.path, link_entry.path, relative_path)
+                    else:
+                        differing.append(relative_path)
+                elif not is_materialized(entry.path, link_entry.path, mode):
+                    differing.append(relative_path)
+
+    walk(target_path, link_path, '')
+    return missing, differing
+
+
+def is_materialized(
+        target_path: Path,
+        link_path: Path,
+        mode: str = 'symlink'
+) -> bool:
+    """
+    Checks if a link path holds its target as written by `materialize`: a
+    symlink to the target, a hard link to the same file, or a clone or copy
+    with the size and modification time of the target. A folder counts as
+    written if it is a folder, not a symlink, with all the items of the
+    target folder written in it, see `compare_folders`.
+    """
+    try:
+        link_stat = os.stat(link_path, follow_symlinks=False)
+        if check_link_mode(mode) == 'symlink':
+            return os.path.islink(link_path) and os.readlink(link_path) == str(target_path)
+        target_stat = os.stat(target_path)
+    except OSError:
+        return False
+    if os.path.islink(link_path):
+        return False
+    if os.path.isdir(target_path):
+        return (
+            os.path.isdir(link_path)
+            and compare_folders(target_path, link_path, mode) == ([], [])
+        )
+    if mode == 'hardlink':
+        return os.path.samestat(link_stat, target_stat)
+    return (
+        link_stat.st_size == target_stat.st_size
+        and link_stat.st_mtime_ns == target_stat.st_mtime_ns
+    )
+
+
+def reflink_file(
+        source_path: Union[str, Path],
+        destination_path: Union[str, Path]
+) -> None:
+    """
+    Clones a file with the FICLONE ioctl, so that the clone shares the data of
+    the source until either is changed, on file systems that support it (e.g.
+    Btrfs, XFS). Elsewhere the file is copied with `copy_file`. The clone is
+    made in a temporary file renamed once complete, and keeps the modification
+    time of the source. Raises a FileExistsError if the destination exists.
+    """
+    destination_path = Path(destination_path)
+    if os.path.lexists(destination_path):
+        raise FileExistsError(
+            errno.EEXIST, os.strerror(errno.EEXIST), str(destination_path)
+        )
+    temporary_path = destination_path.with_name(f'.{destination_path.name}.part')
+    try:
+        with open(source_path, 'rb') as source:
+            with open(temporary_path, 'wb') as destination:
+                try:
+                    fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+                    cloned = True
+                except OSError as e:
+                    if e.errno not in (
+                        errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS
+                    ):
+                        raise
+                    cloned = False
+        if cloned:
+            shutil.copystat(source_path, temporary_path)
+            os.rename(temporary_path, destination_path)
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
+    if not cloned:
+        temporary_path.unlink()
+        copy_file(source_path, destination_path)
+
+
+def copy_file(
+        source_path: Union[str, Path],
+        destination_path: Union[str, Path],
+        workers: int = 1,
+        chunk_size: int = COPY_CHUNK_SIZE
+) -> None:
+    """
+    Copies a file in chunks of `chunk_size` bytes, copied at their offsets by
+    `workers` threads, e.g. to read large files from network mounts with
+    several requests at a time. The copy is written to a temporary file next
+    to the destination and renamed once complete with the modification time
+    of the source, so an interrupted copy is never taken for a complete one.
+    Raises a FileExistsError if the destination exists.
+    """
+    destination_path = Path(destination_path)
+    if os.path.lexists(destination_path):
+        raise FileExistsError(
+            errno.EEXIST, os.strerror(errno.EEXIST), str(destination_path)
+        )
+    temporary_path = destination_path.with_name(f'.{destination_path.name}.part')
+    size = os.stat(source_path).st_size
+    source = os.open(source_path, os.O_RDONLY)
+    try:
+        destination = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.ftruncate(destination, size)
+
+            def copy_chunk(offset):
+                end = min(offset + chunk_size, size)
+                while offset < end:
+                    data = os.pread(source, min(COPY_BUFFER_SIZE, end - offset), offset)
+                    if not data:
+                        raise OSError(
+                            errno.EIO, f'{source_path} changed while it was copied'
+                        )
+                    view = memoryview(data)
+                    while view:
+                        written = os.pwrite(destination, view, offset)
+                        view = view[written:]
+                        offset += written
+
+            offsets = range(0, size, chunk_size)
+            if workers > 1 and len(offsets) > 1:
+                with ThreadPoolExecutor(max_workers=min(workers, len(offsets))) as executor:
+                    list(executor.map(copy_chunk, offsets))
+            else:
+                for offset in offsets:
+                    copy_chunk(offset)
+        finally:
+            os.close(destination)
+        shutil.copystat(source_path, temporary_path)
+        os.rename(temporary_path, destination_path)
+    except BaseException:
+        temporary_path.unlink(missing_ok=True)
+        raise
+    finally:
+        os.close(source)
 
 
 def write_symlink(
@@ -66,15 +814,18 @@ def write_symlink(
         link_dir: Path,
         link_name: Union[str, None] = None,
         resolve_path: bool = True,
-        v: bool = False
+        v: bool = False,
+        mode: str = 'symlink'
 ) -> int:
     """
     Writes a single symlink from link_dir/link_name -> target_path.
     resolve_path flag set to True will ensure paths are absolute
     and if a target is a symlink, the new symlink will point to the
     original target. Set this flag to False to suppress modification
-    of target path.
+    of target path. With another `mode`, the target is written as a
+    hard link, clone or copy instead, see `materialize`.
     """
+    check_link_mode(mode)
     for obj, t in zip(
         (target_path, link_dir, link_name),
         (Path, Path, (str, type(None)))
@@ -97,14 +848,14 @@ def write_symlink(
         link_path: Path = link_dir/link_name
 
     try:
-        link_path.symlink_to(target_path)
+        materialize(target_path, link_path, mode)
         if v:
             print(
                 f"Symlink created: {link_path} -> {target_path}"
             )
         return 1
     except FileExistsError:
-        if link_path.is_symlink() and link_path.readlink() == target_path:
+        if is_materialized(target_path, link_path, mode):
             if v:
                 print(
                     f"Existing symlink found: {link_path} -> {target_path}. Skipping."
@@ -1,4 +1,6 @@
 import datetime as dt
+import functools
+from typing import Union
 
 import numpy as np
 import pandas as pd
@@ -51,17 +53,65 @@ def format_datestring(
     )
 
 
+def format_datestrings(
+        original_dates: Union[list[str], pd.Series, np.ndarray],
+        original_format: str,
+        desired_format: str
+) -> pd.Series:
+    """
+    Transforms a column of date strings into date strings with different formatting.
+    Each unique date is only formatted once, with `format_datestring`, and the
+    results are mapped back to the column in one vectorized pass. This is fast
+    for log files in which nearly every row has the same date.
+
+    Parameters
+    ----------
+    original_dates : list like,
+        the original dates, e.g. ["01.09.2021", "01.09.2021"]
+    original_format : str,
+        the format of the original dates, e.g. "%d.%m.%Y"
+    desired_format : str
+        the format of the desired dates, e.g. "%Y-%m-%d"
+
+    Returns
+    -------
+    pd.Series
+        e.g. ["2021-09-01", "2021-09-01"], index starting from 0
+    """
+    codes, unique_dates = pd.factorize(
+        np.asarray(original_dates, dtype=object)
+    )
+    if (codes == -1).any():
+        raise ValueError(
+            'Cannot format missing date values.'
+        )
+    formatted_dates = np.array(
+        [
+            format_datestring(
+                original_date=d,
+                original_format=original_format,
+                desired_format=desired_format
+            )
+            for d in unique_dates
+        ],
+        dtype=object
+    )
+    return pd.Series(formatted_dates[codes], dtype=object)
+
+
 def timestamp_to_date_time(
         timestamps: list[str],
         sep: str = ' '
         ) -> pd.DataFrame:
     """Takes a list of timestamps and returns a 
     DataFrame with date and time columns.
+    Timestamps are parsed with `parse_timestamps` and split with
+    `datetime_to_date_time`, see these functions for whole column parsing.
 
     Parameters
     ----------
     timestamps : list like
-        list of timestamps to parse
+        list of timestamps to parse, e.g. "2016-06-02 18:00"
     sep : str
         separator of date and time
 
@@ -73,29 +123,95 @@ def timestamp_to_date_time(
         time   str 
         =====  ===========
     """
-    _date = []
-    _time = []
-    for ts in timestamps:
-        ts_items = ts.split(sep)
-        d = str(
-            ts_items[0]
-        ).split('-')
-        # date format: yyyy.mm.dd
-        _date.append(
-            f'{d[0]}.{d[1]}.{d[2]}'
+    timestamp_format = 'ISO8601' if sep in (' ', 'T') else f'%Y-%m-%d{sep}%H:%M'
+    return datetime_to_date_time(
+        parse_timestamps(
+            timestamps,
+            timestamp_format=timestamp_format
+        )
+    )
+
+
+def parse_timestamps(
+        timestamps: Union[list[str], pd.Series, np.ndarray],
+        timestamp_format: str = 'ISO8601'
+) -> pd.Series:
+    """Parses timestamp strings into a datetime64 Series in one vectorized pass.
+
+    Parameters
+    ----------
+    timestamps : list like
+        timestamps to parse, e.g. "2016-06-02 18:00"
+    timestamp_format : str
+        strftime format of the timestamps, or "ISO8601" (default) for
+        yyyy-mm-dd hh:mm[:ss] timestamps
+
+    Returns
+    -------
+    pd.Series
+        datetime64 values, index starting from 0
+    """
+    return pd.Series(
+        pd.to_datetime(
+            np.asarray(timestamps, dtype=object),
+            format=timestamp_format
         )
-        # time format: hh:mm:ss
-        # 00 added as granularity is in minutes for this data
-        _time.append(
-            f'{str(ts_items[1])}:00'
+    )
+
+
+def datetime_to_date_time(
+        datetimes: Union[pd.Series, np.ndarray]
+) -> pd.DataFrame:
+    """Splits datetime64 values into date and time strings in one vectorized pass.
+    Values are split into days and seconds of day. Each unique day is formatted
+    once and times are looked up in a table of all seconds of a day, so no
+    string is formatted per value. Fractions of seconds are dropped.
+
+    Parameters
+    ----------
+    datetimes : list like
+        datetime64 values
+
+    Returns
+    -------
+    pd.DataFrame
+        =====  ===========
+        date   str, yyyy.mm.dd
+        time   str, hh:mm:ss
+        =====  ===========
+    """
+    values = np.asarray(datetimes, dtype='datetime64[s]')
+    if np.isnat(values).any():
+        raise ValueError(
+            'Cannot split missing (NaT) datetime values into date and time.'
         )
-    return pd.DataFrame(
-        np.array([
-            _date,
-             _time
-        ]).T,
-        columns=[
-            'date',
-            'time'
-        ]
+    days, seconds = np.divmod(values.astype(np.int64), 86400)
+    unique_days, day_codes = np.unique(days, return_inverse=True)
+    # date format: yyyy.mm.dd
+    unique_dates = np.array(
+        [
+            d.replace('-', '.')
+            for d in np.datetime_as_string(unique_days.astype('datetime64[D]'))
+        ],
+        dtype=object
+    )
+    return pd.DataFrame({
+        'date': unique_dates[day_codes.ravel()],
+        'time': times_of_day()[seconds]
+    })
+
+
+@functools.cache
+def times_of_day() -> np.ndarray:
+    """Returns an array of the hh:mm:ss strings of every second of a day,
+    indexed by the number of seconds since midnight.
+    """
+    return np.array(
+        [
+            f'{h:02d}:{m:02d}:{s:02d}'
+            for h in range(24)
+            for m in range(60)
+            for s in range(60)
+        ],
+        dtype=object
     )
@@ -0,0 +1,175 @@
+import os
+import time
+from pathlib import PosixPath
+from typing import Callable, Hashable, Tuple, Union
+
+
+def scan_folder(
+        folder: Union[str, PosixPath],
+        suffix: str = ''
+) -> Union[dict[str, Tuple[int, int]], None]:
+    """
+    Returns the size and modification time in ns of the files in a folder whose
+    names end with `suffix`, by file name. The folder is read with one `os.scandir`
+    call. Returns None if the folder cannot be read, e.g. if it is missing or a
+    network mount is down or stale. Files that cannot be read are left out.
+    """
+    snapshot: dict[str, Tuple[int, int]] = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not entry.name.endswith(suffix):
+                    continue
+                try:
+                    # follows symlinks, raw folders may be link folders
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.is_file():
+                    snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        return None
+    return snapshot
+
+
+def changed_names(
+        previous: dict[str, Tuple[int, int]],
+        current: dict[str, Tuple[int, int]]
+) -> set[str]:
+    """
+    Returns the names of files that are new or whose size or modification time
+    changed between two results of `scan_folder`. Removed files are ignored.
+    """
+    return {
+        name for name, stat in current.items()
+        if previous.get(name) != stat
+    }
+
+
+class Debouncer:
+    """
+    Collects changed file names per key, e.g. per location, and releases them
+    once no new changes were added for that key during `debounce` seconds, so
+    that a burst of writes to a file is handled once. Files that are written
+    continuously are released at the latest `max_wait` seconds after their
+    first change.
+    """
+
+    def __init__(
+            self,
+            debounce: float,
+            max_wait: Union[float, None] = None
+    ) -> None:
+        self.debounce: float = debounce
+        self.max_wait: Union[float, None] = max_wait
+        self._pending: dict[Hashable, set[str]] = {}
+        self._first_change: dict[Hashable, float] = {}
+        self._last_change: dict[Hashable, float] = {}
+
+    def add(
+            self,
+            key: Hashable,
+            names: set[str],
+            now: float
+    ) -> None:
+        """
+        Adds changed names of a key at time `now`.
+        """
+        if not names:
+            return
+        self._pending.setdefault(key, set()).update(names)
+        self._first_change.setdefault(key, now)
+        self._last_change[key] = now
+
+    def ready(
+            self,
+            now: float
+    ) -> dict[Hashable, set[str]]:
+        """
+        Returns and forgets the names of keys without changes for `debounce`
+        seconds, or with a first change `max_wait` seconds ago.
+        """
+        ready_keys = [
+            key for key, last_change in self._last_change.items()
+            if now - last_change >= self.debounce
+            or (
+                self.max_wait is not None
+                and now - self._first_change[key] >= self.max_wait
+            )
+        ]
+        for key in ready_keys:
+            del self._first_change[key]
+            del self._last_change[key]
+        return {key: self._pending.pop(key) for key in ready_keys}
+
+
+def watch_folders(
+        folders: Union[
+            dict[Hashable, Tuple[Union[str, PosixPath], str]],
+            Callable[[], dict[Hashable, Tuple[Union[str, PosixPath], str]]]
+        ],
+        on_change: Callable[[Hashable, set[str]], None],
+        interval: float = 5.0,
+        debounce: float = 2.0,
+        max_wait: Union[float, None] = 60.0,
+        snapshots: Union[dict[Hashable, Union[dict[str, Tuple[int, int]], None]], None] = None,
+        max_polls: Union[int, None] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        v: bool = False
+) -> None:
+    """
+    Polls folders for new and changed files and calls `on_change` with the key
+    of a folder and the changed file names once they stopped changing for
+    `debounce` seconds, or at the latest `max_wait` seconds after they changed.
+    `folders` maps a key, e.g. a location, to a folder and a file name suffix,
+    or is a function returning that mapping, called at each poll, e.g. for
+    folders named after the current year. All files of a folder that is
+    added to the mapping are reported once, as new files; folders removed
+    from it are no longer polled.
+    Each poll lists every folder once with `scan_folder` and compares sizes and
+    modification times with the previous poll, so no file is opened. The first
+    poll is compared with `snapshots` by key, e.g. taken before the folders were
+    last processed, default is to scan the folders at start.
+    A folder that cannot be read, e.g. while its mount is down, keeps its
+    previous snapshot until it can be read again, so that only files changed
+    meanwhile are reported then. All files of a folder that could not be read
+    since the start are reported once it can be read.
+    Runs until interrupted, or for `max_polls` polls, after which changes that
+    are still pending are reported. `clock` and `sleep` can be replaced, e.g.
+    in tests.
+    """
+    current_folders = folders if callable(folders) else lambda: folders
+    if snapshots is None:
+        snapshots = {}
+    snapshots = {
+        key: snapshots[key] if key in snapshots else scan_folder(folder, suffix)
+        for key, (folder, suffix) in current_folders().items()
+    }
+    debouncer = Debouncer(debounce, max_wait)
+    poll_count = 0
+    while max_polls is None or poll_count < max_polls:
+        sleep(interval)
+        poll_count += 1
+        now = clock()
+        polled_folders = current_folders()
+        for key in set(snapshots).difference(polled_folders):
+            del snapshots[key]
+        for key, (folder, suffix) in polled_folders.items():
+            snapshot = scan_folder(folder, suffix)
+            if snapshot is None:
+                if v:
+                    print(f'! Could not read {folder}, keeping its previous files.')
+                snapshots.setdefault(key, None)
+                continue
+            if v and key not in snapshots:
+                print(f'** Watching new folder {folder}.')
+            names = changed_names(snapshots.get(key) or {}, snapshot)
+            snapshots[key] = snapshot
+            if names and v:
+                print(f'** {len(names)} changed files in {folder}.')
+            debouncer.add(key, names, now)
+        for key, names in debouncer.ready(now).items():
+            on_change(key, names)
+    for key, names in debouncer.ready(float('inf')).items():
+        on_change(key, names)
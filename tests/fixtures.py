@@ -119,6 +119,48 @@ def mock_config_no_processed_files(
     remove_directory_recursively(config.parent)
 
 
+@pytest.fixture
+def mock_config_processing_index(
+        tmp_path_factory: pytest.TempPathFactory,
+        mock_processed_file_paths: Tuple[Tuple[Path], Tuple[Path, Path]]
+) -> Generator[Path, None, None]:
+    """
+    This fixture is used for checking how the processing works with
+    a processing index and NO existing processed files.
+    """
+    index_dir: Path = tmp_path_factory.mktemp("tmp_index")
+    content: str = (
+        f"{CONF_SECTION_PRESSURE}:\n"
+        f"  {LOCS[0]}:\n"
+        f"    raw_pressure_folder: '{EXAMPLE_RAW_FILE_PATHS[0][0].parent}'\n"
+        f"    raw_file_extension: 'txt'\n"
+        f"    parsed_pressure_folder: '{mock_processed_file_paths[0][0].parent}'\n"
+        f"    use_pressure_correction_factor: True\n"
+        f"    em27_m: 2\n"
+        f"    pressure_sensor_m: 1\n"
+        f"    start_date: '2016-06-02'\n"
+        f"    end_date:\n"
+        f"    index_file: '{index_dir/LOCS[0]}.sqlite'\n"
+        f"  {LOCS[1]}:\n"
+        f"    raw_pressure_folder: {EXAMPLE_RAW_FILE_PATHS[1][0].parent}\n"
+        f"    raw_file_extension: 'lst'\n"
+        f"    parsed_pressure_folder: {mock_processed_file_paths[1][0].parent}\n"
+        f"    use_pressure_correction_factor: True\n"
+        f"    em27_m: 2\n"
+        f"    pressure_sensor_m: 1\n"
+        f"    start_date: '2016-06-02'\n"
+        f"    end_date:\n"
+        f"    index_file: '{index_dir/LOCS[1]}.sqlite'\n"
+    )
+    config: Path = tmp_path_factory.mktemp(
+        "tmp_conf"
+    )/"tmp_config.yml"
+    config.write_text(content)
+    yield config
+    remove_directory_recursively(config.parent)
+    remove_directory_recursively(index_dir)
+
+
 @pytest.fixture
 def mock_config_pressure_correction_cases(
         tmp_path_factory: pytest.TempPathFactory,
@@ -146,6 +188,7 @@ def mock_config_pressure_correction_cases(
         f"    pressure_sensor_m: 0.0\n"
         f"    start_date: '2016-06-02'\n"
         f"    end_date:\n"
+        f"    workers: 4\n"
         f"  l3:\n"
         f"    raw_pressure_folder: 'NA'\n"
         f"    raw_file_extension: 'txt'\n"
@@ -182,6 +225,12 @@ def mock_config_pressure_correction_cases(
         f"    pressure_sensor_m: '1'\n"
         f"    start_date: '2016-06-02'\n"
         f"    end_date:\n"
+        f"  l7:\n"
+        f"    raw_pressure_folder: 'NA'\n"
+        f"    raw_file_extension: 'lst'\n"
+        f"    parsed_pressure_folder: 'NA'\n"
+        f"    start_date: '2016-06-02'\n"
+        f"    workers: 0\n"
     )
     config: Path = tmp_path_factory.mktemp(
         "tmp_conf"
@@ -199,6 +248,7 @@ def mock_config_section_ifg_symlinks(
     """
     This fixture is used for testing writing symlinks of EM27 ifg folders,
     which may need to be transformed from 2 digit years to 4 digit years.
+    The first job is written as before link names could be configured.
     """
     link_folder, _, target_folder, _ = mock_ifg_target_link_folders
     content: str = (
@@ -209,9 +259,11 @@ def mock_config_section_ifg_symlinks(
         f"  {EM27S[1]}:\n"
         f"    target_folders: \n        - {target_folder}\n"
         f"    link_folder: '{link_folder}'\n"
+        f"    link_name_template: '{{yyyy}}{{mm}}{{dd}}'\n"
         f"  {EM27S[2]}:\n"
         f"    target_folders: \n        - {target_folder}\n"
         f"    link_folder: '{link_folder}'\n"
+        f"    link_name_template: '{{yyyy}}{{mm}}{{dd}}'\n"
     )
     config: Path = tmp_path_factory.mktemp(
         "tmp_conf"
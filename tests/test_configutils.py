@@ -0,0 +1,252 @@
+import datetime as dt
+import os
+
+from pathlib import Path
+
+import pytest
+
+from modules import configutils
+from .fixtures import (
+    mock_config_existing_processed_files,
+    CONF_SECTION_PRESSURE,
+    CONF_SECTION_SYMLINKS,
+    LOCS,
+    EXAMPLE_PROCESSED_FILE_PATHS
+)
+
+
+# @pytest.mark.only
+def test_load_config(
+        mock_config_existing_processed_files: Path
+) -> None:
+    config = configutils.load_config(
+        mock_config_existing_processed_files
+    )
+    # Test that the file is parsed only once
+    assert configutils.load_config(
+        mock_config_existing_processed_files
+    ) is config
+    assert configutils.load_config(
+        str(mock_config_existing_processed_files)
+    ) is config
+    # Test that a config object is returned unchanged
+    assert configutils.load_config(config) is config
+    assert config.section_keys(CONF_SECTION_PRESSURE) == LOCS
+    # Test that a modified file is parsed again
+    stat = mock_config_existing_processed_files.stat()
+    mock_config_existing_processed_files.write_text(
+        f"{CONF_SECTION_PRESSURE}:\n"
+        f"  {LOCS[0]}:\n"
+        f"    raw_pressure_folder: 'raw'\n"
+        f"    raw_file_extension: 'txt'\n"
+        f"    parsed_pressure_folder: 'parsed'\n"
+        f"    start_date: 2016-06-02\n"
+    )
+    os.utime(
+        mock_config_existing_processed_files,
+        ns=(stat.st_atime_ns, stat.st_mtime_ns + 1)
+    )
+    reloaded_config = configutils.load_config(
+        mock_config_existing_processed_files
+    )
+    assert reloaded_config is not config
+    assert reloaded_config.section_keys(CONF_SECTION_PRESSURE) == LOCS[0:1]
+
+
+# @pytest.mark.only
+def test_pressure_location(
+        mock_config_existing_processed_files: Path
+) -> None:
+    config = configutils.load_config(
+        mock_config_existing_processed_files
+    )
+    location_config = config.pressure_location(
+        CONF_SECTION_PRESSURE, LOCS[0]
+    )
+    assert location_config == configutils.PressureLocationConfig(
+        name=LOCS[0],
+        raw_pressure_folder='examples/pressure/location1_raw',
+        raw_file_extension='txt',
+        parsed_pressure_folder=str(EXAMPLE_PROCESSED_FILE_PATHS[0][0].parent),
+        start_date=dt.date(2016, 6, 2),
+        end_date=None,
+        use_pressure_correction_factor=True,
+        em27_m=2.0,
+        pressure_sensor_m=1.0,
+        raw_pressure_folders=('examples/pressure/location1_raw',)
+    )
+    # Test that views are created once
+    assert config.pressure_location(
+        CONF_SECTION_PRESSURE, LOCS[0]
+    ) is location_config
+    # Test that an invalid entry only fails for that entry
+    config = configutils.PipelineConfig({
+        CONF_SECTION_PRESSURE: {
+            'l1': {
+                'raw_pressure_folder': 'raw',
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': 'parsed',
+                'start_date': '2016-06-02',
+                'end_date': '2016-06-31'
+            },
+            'l2': {
+                'raw_pressure_folder': 'raw',
+                'raw_file_extension': 'lst',
+                'start_date': '2016-06-02'
+            },
+            'l3': None,
+            'l4': {
+                'raw_pressure_folder': 'raw',
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': 'parsed',
+                'start_date': '2016-06-02',
+                'change_detection': 'mtime'
+            },
+            'l5': {
+                'raw_pressure_folder': 'raw',
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': 'parsed',
+                'start_date': '2016-06-02',
+                'incremental': True
+            },
+            'l6': {
+                'raw_pressure_folder': 'raw',
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': 'parsed',
+                'start_date': '2016-06-02',
+                'raw_file_pattern': r'aws_(?P<date>\d{8})\.lst'
+            },
+            'l7': {
+                'raw_pressure_folder': [],
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': 'parsed',
+                'start_date': '2016-06-02'
+            },
+            'l8': {
+                'raw_pressure_folder': 'raw',
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': 'parsed',
+                'start_date': '2016-06-02',
+                'index_file': 'index.sqlite',
+                'incremental': True,
+                'merge_raw_files': True
+            },
+            'l9': {
+                'raw_pressure_folder': 'raw',
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': 'parsed',
+                'start_date': '2016-06-02',
+                'use_pressure_correction_factor': 'yes'
+            },
+            'l10': {
+                'raw_pressure_folder': 'raw',
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': 'parsed',
+                'start_date': '2016-06-02',
+                'em27_m': '2 m'
+            },
+            'l11': {
+                'raw_pressure_folder': 'raw',
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': 'parsed',
+                'start_date': '2016-06-02',
+                'workers': 2.5
+            }
+        }
+    })
+    for location in (
+        'l1', 'l2', 'l3', 'l4', 'l5', 'l6', 'l7', 'l8', 'l9', 'l10', 'l11'
+    ):
+        with pytest.raises(ValueError, match=location):
+            config.pressure_location(CONF_SECTION_PRESSURE, location)
+    with pytest.raises(KeyError):
+        config.section_keys(CONF_SECTION_SYMLINKS)
+
+
+# @pytest.mark.only
+def test_pipeline_settings() -> None:
+    # Test default settings without a pipeline section
+    assert configutils.PipelineConfig({}).pipeline_settings() == (
+        configutils.PipelineSettings()
+    )
+    assert configutils.PipelineConfig(
+        {'pipeline': {'workers': '8', 'location_workers': 2}}
+    ).pipeline_settings() == configutils.PipelineSettings(8, 2)
+    with pytest.raises(ValueError, match='location_workers'):
+        configutils.PipelineConfig(
+            {'pipeline': {'location_workers': 0}}
+        ).pipeline_settings()
+
+
+# @pytest.mark.only
+def test_symlink_job() -> None:
+    config = configutils.PipelineConfig({
+        CONF_SECTION_SYMLINKS: {
+            'job1': {
+                'target_folders': ['target1', 'target2'],
+                'link_folder': 'link'
+            },
+            'job2': {
+                'target_folders': 'target1',
+                'link_folder': 'link'
+            },
+            'job3': {
+                'target_folders': ['target1']
+            },
+            'job4': {
+                'target_folders': ['target1'],
+                'link_folder': 'link',
+                'link_name_template': '{yyyy}{mm}{dd}{hh}'
+            },
+            'job5': {
+                'target_folders': ['target1'],
+                'link_folder': 'link',
+                'link_mode': 'move'
+            },
+            'job6': {
+                'target_folders': ['target1'],
+                'link_folder': 'link',
+                'link_mode': 'copy'
+            },
+            'job7': {
+                'target_folders': ['target1'],
+                'link_folder': 'link',
+                'depth': 'all',
+                'include': '*.lst',
+                'exclude': ['2016/*', '*.tmp']
+            },
+            'job8': {
+                'target_folders': ['target1'],
+                'link_folder': 'link',
+                'depth': 0
+            },
+            'SN039': {
+                'target_folders': ['target1'],
+                'link_folder': 'link'
+            }
+        }
+    })
+    assert config.symlink_job(
+        CONF_SECTION_SYMLINKS, 'job1'
+    ) == configutils.SymlinkJobConfig(
+        name='job1',
+        target_folders=('target1', 'target2'),
+        link_folder='link'
+    )
+    assert config.symlink_job(
+        CONF_SECTION_SYMLINKS, 'job2'
+    ).target_folders == ('target1',)
+    assert config.symlink_job(
+        CONF_SECTION_SYMLINKS, 'job6'
+    ).link_mode == 'copy'
+    job7 = config.symlink_job(CONF_SECTION_SYMLINKS, 'job7')
+    assert (job7.depth, job7.include, job7.exclude) == (
+        None, ('*.lst',), ('2016/*', '*.tmp')
+    )
+    for job_name in ('job3', 'job4', 'job5', 'job8'):
+        with pytest.raises(ValueError, match=job_name):
+            config.symlink_job(CONF_SECTION_SYMLINKS, job_name)
+    # Test that legacy EM27 jobs without a rule get the date rule
+    assert config.symlink_job(
+        CONF_SECTION_SYMLINKS, 'SN039'
+    ).link_name_template == '{yyyy}{mm}{dd}'
@@ -0,0 +1,125 @@
+import datetime as dt
+
+from pathlib import Path
+from typing import Generator
+
+import pytest
+
+from modules import indexutils
+
+
+# @pytest.mark.only
+def test_processing_index(
+        tmp_path: Generator[Path, None, None]
+) -> None:
+    raw_file: Path = tmp_path/'raw'/'aws_20160602.lst'
+    raw_file.parent.mkdir()
+    raw_file.write_text('content')
+    index_file: Path = tmp_path/'index'/'index.sqlite'
+    entry = indexutils.IndexEntry(
+        raw_name=raw_file.name,
+        raw_path=str(raw_file),
+        file_date=dt.date(2016, 6, 2),
+        size=0,
+        mtime_ns=0,
+        output_path=None,
+        status=indexutils.PENDING
+    )
+    # Test that entries are kept between connections
+    with indexutils.ProcessingIndex(index_file) as index:
+        assert index.entries() == {}
+        index.add([entry])
+    assert index_file.exists()
+    with indexutils.ProcessingIndex(index_file) as index:
+        assert index.entries() == {raw_file.name: entry}
+        # Test that status update keeps the raw file as recorded before processing
+        index.set_status(
+            dt.date(2016, 6, 2), indexutils.PARSED, tmp_path/'out.csv'
+        )
+        updated_entry = index.entries()[raw_file.name]
+        assert updated_entry == entry._replace(
+            status=indexutils.PARSED, output_path=str(tmp_path/'out.csv')
+        )
+        # Test invalid status
+        with pytest.raises(ValueError):
+            index.set_status(dt.date(2016, 6, 2), 'invalid')
+        with pytest.raises(ValueError):
+            index.add([entry._replace(status='invalid')])
+        index.remove([raw_file.name])
+        assert index.entries() == {}
+        index.add([entry])
+        index.clear()
+        assert index.entries() == {}
+
+
+# @pytest.mark.only
+def test_is_changed(
+        tmp_path: Generator[Path, None, None]
+) -> None:
+    raw_file: Path = tmp_path/'aws_20160602.lst'
+    raw_file.write_text('content')
+    stat = raw_file.stat()
+    entry = indexutils.IndexEntry(
+        raw_name=raw_file.name,
+        raw_path=str(raw_file),
+        file_date=dt.date(2016, 6, 2),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        output_path=None,
+        status=indexutils.PARSED,
+        content_hash=indexutils.file_hash(raw_file)
+    )
+    for mode in indexutils.CHANGE_DETECTION_MODES:
+        assert not indexutils.is_changed(entry, raw_file.stat(), mode)
+    # Test that a touched file only counts as changed without a hash
+    touched = entry._replace(mtime_ns=stat.st_mtime_ns - 1)
+    assert indexutils.is_changed(touched, stat, 'stat')
+    assert not indexutils.is_changed(touched, stat, 'hash')
+    assert indexutils.is_changed(touched._replace(content_hash=None), stat, 'hash')
+    assert not indexutils.is_changed(touched, stat, 'none')
+    # Test that a changed size or content counts as changed
+    assert indexutils.is_changed(entry._replace(size=0), stat, 'hash')
+    assert indexutils.is_changed(touched._replace(content_hash='0'), stat, 'hash')
+    with pytest.raises(ValueError):
+        indexutils.is_changed(entry, stat, 'mtime')
+
+
+# @pytest.mark.only
+def test_is_appended(
+        tmp_path: Generator[Path, None, None],
+        monkeypatch: pytest.MonkeyPatch
+) -> None:
+    raw_file: Path = tmp_path/'aws_20160602.lst'
+    raw_file.write_text('line 1\nline 2\n')
+    entry = indexutils.IndexEntry(
+        raw_name=raw_file.name,
+        raw_path=str(raw_file),
+        file_date=dt.date(2016, 6, 2),
+        size=14,
+        mtime_ns=0,
+        output_path=None,
+        status=indexutils.PARSED,
+        byte_offset=14
+    )
+    monkeypatch.setattr(indexutils, 'PARSED_PART_CHECK_SIZE', 7)
+    entries = {
+        mode: entry._replace(
+            parsed_hash=indexutils.parsed_part_hash(raw_file, 14, mode)
+        )
+        for mode in indexutils.CHANGE_DETECTION_MODES
+    }
+    # Test that appended lines are found, with or without a recorded hash
+    raw_file.write_text('line 1\nline 2\nline 3\n')
+    for mode, mode_entry in entries.items():
+        assert indexutils.is_appended(mode_entry, raw_file.stat(), mode)
+    assert not indexutils.is_changed(entries['none'], raw_file.stat(), 'none')
+    assert indexutils.is_appended(entry, raw_file.stat())
+    # Test that a larger rewritten file is not appended but changed
+    raw_file.write_text('line 1\nline 9\nline 3\n')
+    for mode, mode_entry in entries.items():
+        assert not indexutils.is_appended(mode_entry, raw_file.stat(), mode)
+        assert indexutils.is_changed(mode_entry, raw_file.stat(), mode)
+    # Test that only the end of the parsed part is compared without a hash
+    raw_file.write_text('line 9\nline 2\nline 3\n')
+    assert indexutils.is_appended(entries['stat'], raw_file.stat(), 'stat')
+    assert not indexutils.is_appended(entries['hash'], raw_file.stat(), 'hash')
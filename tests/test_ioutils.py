@@ -1,4 +1,5 @@
 import datetime as dt
+import re
 
 from contextlib import nullcontext
 from pathlib import Path
@@ -174,6 +175,50 @@ def test_extract_date_from_fname() -> None:
     assert dates == DATES
 
 
+# @pytest.mark.only
+def test_parse_date_from_fname() -> None:
+    assert [
+        ioutils.parse_date_from_fname(f) for f in FILENAMES
+    ] == DATES + [None]
+    # Test that names that do not match or have invalid dates give None
+    for name in (
+        'README.md', 'aws_20160602.lst.tmp', 'aws_2016062.lst', 'aws_20161302.lst'
+    ):
+        assert ioutils.parse_date_from_fname(name) is None
+    with pytest.raises(ValueError):
+        ioutils.extract_date_from_fname('aws_20161302.lst')
+    assert ioutils.parse_date_from_fname(
+        '160602_PTU300_error_log.txt'
+    ) == dt.date(2016, 6, 2)
+    # Test that patterns can be replaced by file type
+    patterns = ioutils.compile_filename_patterns(
+        {'lst': r'AWS-(?P<day>\d{2})(?P<month>\d{2})(?P<year>\d{4})\.lst', 'txt': None}
+    )
+    assert ioutils.parse_date_from_fname('AWS-02062016.lst', patterns) == DATES[0]
+    assert ioutils.parse_date_from_fname(FILENAMES[0], patterns) is None
+    assert ioutils.parse_date_from_fname(FILENAMES[1], patterns) == DATES[1]
+    for pattern in (r'aws_(?P<year>\d{4})\.lst', r'aws_(?P<year>\d{4}'):
+        with pytest.raises(ValueError):
+            ioutils.compile_filename_patterns({'lst': pattern})
+
+
+# @pytest.mark.only
+def test_generate_date_map_from_folder(
+        mock_files: list[Path]
+) -> None:
+    mock_dir = mock_files[0].parent
+    (mock_dir/'160603_PTU300_error_log.txt').touch()
+    (mock_dir/'README.md').touch()
+    assert ioutils.generate_date_map_from_folder(
+        mock_dir,
+        start_date=DATES[0],
+        end_date=DATES[1]
+    ) == {
+        DATES[0]: [FILENAMES[0]],
+        DATES[1]: ['160603_PTU300_error_log.txt', FILENAMES[1]]
+    }
+
+
 # @pytest.mark.only
 @pytest.mark.parametrize(
     "date, expectation",
@@ -219,6 +264,34 @@ def test_extract_date_from_dirname(
         ) == e
 
 
+# @pytest.mark.only
+def test_compile_link_name_rule() -> None:
+    # Test the default rule of interferogram folders
+    link_name = ioutils.compile_link_name_rule()
+    assert [
+        link_name(name) for name in
+        ('19960229', '001231', '500606', '690101', '960230', 'notes', '2016060')
+    ] == ['19960229', '20001231', '20500606', '19690101', None, None, None]
+    # Test a pattern with other named groups and a template
+    link_name = ioutils.compile_link_name_rule(
+        r'(?P<site>[a-z]+)_(?P<day>\d{2})\.(?P<month>\d{2})\.(?P<year>\d{4})',
+        '{yyyy}-{mm}-{dd}_{site}'
+    )
+    assert link_name('bremen_02.06.2016') == '2016-06-02_bremen'
+    assert link_name('bremen_2016') is None
+    # Test a pattern without a date
+    link_name = ioutils.compile_link_name_rule(r'raw_(?P<n>\d+)', 'copy_{n}_{name}')
+    assert link_name('raw_7') == 'copy_7_raw_7'
+    # Test invalid patterns and templates
+    for pattern, template in (
+        ('(?P<year>', None),
+        (None, '{year}{month}{dd}{hh}'),
+        (r'(?P<n>\d+)', '{yyyy}')
+    ):
+        with pytest.raises(ValueError):
+            ioutils.compile_link_name_rule(pattern, template)
+
+
 # @pytest.mark.only
 def test_generate_set_difference() -> None:
     raw_folder: set = {'file1','file2','file3'}
@@ -266,6 +339,35 @@ def test_read_file_names(
     path = mock_csv.parent
     filename = ioutils.read_file_names(path)[0]
     assert filename == MOCK_CSV_FILENAME
+    (path/'aws_20160602.lst').write_text('')
+    (path/'subfolder.csv').mkdir()
+    assert sorted(ioutils.read_file_names(path)) == ['aws_20160602.lst', MOCK_CSV_FILENAME]
+    # Test that only names matching a glob pattern or regex are returned
+    assert ioutils.read_file_names(path, pattern='*.csv') == [MOCK_CSV_FILENAME]
+    assert ioutils.read_file_names(
+        path, pattern=re.compile(r'aws_\d{8}')
+    ) == ['aws_20160602.lst']
+    assert ioutils.read_file_names(path/'missing') == []
+
+
+# @pytest.mark.only
+def test_read_file_folders(
+        tmp_path: Path
+) -> None:
+    for folder, names in (
+        ('a', ['aws_20160602.lst']),
+        ('b', ['aws_20160602.lst', 'aws_20170602.lst'])
+    ):
+        (tmp_path/folder).mkdir()
+        for name in names:
+            (tmp_path/folder/name).write_text('')
+    # Test that names found in several folders are given the first folder
+    assert ioutils.read_file_folders(
+        [tmp_path/'a', tmp_path/'b', tmp_path/'missing'], pattern='*.lst'
+    ) == {
+        'aws_20160602.lst': tmp_path/'a',
+        'aws_20170602.lst': tmp_path/'b'
+    }
 
 
 ############# Working with YAML config file ##################
@@ -1,16 +1,18 @@
 import os
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Generator, Tuple
+from typing import Generator, Tuple, Union
 
 import pytest
 
-from modules import pipeline, ioutils
+from modules import configutils, pipeline, ioutils
 from .fixtures import (
     mock_config_existing_processed_files,
     mock_config_no_processed_files,
     mock_config_section_ifg_symlinks,
     mock_ifg_target_link_folders,
+    mock_target_link_folders,
     mock_processed_file_paths,
     remove_directory_recursively,
     LOCS,
@@ -24,6 +26,15 @@ def test_setup_environment() -> None:
     pipeline.setup_environment()
 
 
+# @pytest.mark.only
+def test_parse_cli_args() -> None:
+    positional_args, keyword_args = pipeline.parse_cli_args(
+        ['config.yml', '--workers=4', '--rebuild-index']
+    )
+    assert positional_args == ['config.yml']
+    assert keyword_args == {'workers': '4', 'rebuild_index': True}
+
+
 # @pytest.mark.only
 def test_prepare_pressure_existing(
         mock_config_existing_processed_files: Path
@@ -71,6 +82,98 @@ def test_prepare_pressure_no_existing(
             assert parsed_pressure_file.exists()
 
 
+# @pytest.mark.only
+def test_prepare_pressure_concurrent(
+        mock_config_no_processed_files: Path,
+        mock_processed_file_paths: Tuple[Tuple[Path], Tuple[Path, Path]]
+) -> None:
+    # Test that locations processed at the same time give a summary
+    # in config order with the number of files found and parsed
+    summary = pipeline.prepare_pressure(
+        mock_config_no_processed_files,
+        workers='2',
+        location_workers='2'
+    )
+    assert list(summary) == LOCS
+    assert summary == {
+        LOCS[0]: (1, 1),
+        LOCS[1]: (2, 2)
+    }
+    for loc_paths in mock_processed_file_paths:
+        assert False not in list(p.exists() for p in loc_paths)
+
+
+# @pytest.mark.only
+def test_prepare_pressure_failed_location(
+        mock_config_no_processed_files: Path,
+        mock_processed_file_paths: Tuple[Tuple[Path], Tuple[Path, Path]],
+        tmp_path: Generator[Path, None, None]
+) -> None:
+    # Test that a failing location does not stop the other locations
+    # and that the failure is raised after all locations are processed
+    config: dict = ioutils.read_yaml_config(
+        mock_config_no_processed_files
+    )
+    config['pressure'][LOCS[0]]['pressure_sensor_m'] = 'h'
+    mock_config_path: Path = tmp_path/'mock_config_file.yml'
+    ioutils.write_yaml_config(
+        data=config,
+        config_file_path=mock_config_path
+    )
+    with pytest.raises(RuntimeError, match=LOCS[0]):
+        pipeline.prepare_pressure(
+            mock_config_path,
+            location_workers=2
+        )
+    assert False not in list(p.exists() for p in mock_processed_file_paths[1])
+
+
+# @pytest.mark.only
+def test_prepare_pressure_shared_pool(
+        monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pools = []
+    calls = []
+
+    class RecordingPool(ThreadPoolExecutor):
+        def __init__(self, max_workers):
+            pools.append(max_workers)
+            super().__init__(max_workers)
+
+    def parse_pressure_folder(config, section, location, workers=None, executor=None, **kwargs):
+        calls.append((location, workers, executor))
+        return 0, 0
+
+    monkeypatch.setattr(pipeline, 'ProcessPoolExecutor', RecordingPool)
+    monkeypatch.setattr(pipeline.pressureutils, 'parse_pressure_folder', parse_pressure_folder)
+    locations = {
+        location: {
+            'raw_pressure_folder': 'raw',
+            'raw_file_extension': 'lst',
+            'parsed_pressure_folder': 'parsed',
+            'start_date': '2016-06-02',
+            'workers': location_workers
+        }
+        for location, location_workers in (('l1', 3), ('l2', 2), ('l3', None))
+    }
+    # Test that all locations share one pool sized from their largest workers
+    pipeline.prepare_pressure(
+        configutils.PipelineConfig({'pressure': locations}), location_workers=3
+    )
+    assert pools == [3]
+    assert len({executor for _, _, executor in calls}) == 1
+    assert None not in {executor for _, _, executor in calls}
+    # Test that the pipeline section and the command line set the pool size
+    config = configutils.PipelineConfig({
+        'pipeline': {'workers': 4, 'location_workers': 2},
+        'pressure': locations
+    })
+    pipeline.prepare_pressure(config)
+    pipeline.prepare_pressure(config, workers='1')
+    assert pools == [3, 4]
+    assert [workers for _, workers, executor in calls[-3:]] == [1, 1, 1]
+
+
 # @pytest.mark.only
 def test_prepare_pressure_config_file(
         tmp_path: Generator[Path, None, None]
@@ -241,9 +344,11 @@ def test_prepare_symlinks(
 
 
 # @pytest.mark.only
+@pytest.mark.parametrize('workers', [None, 2])
 def test_prepare_symlinks_ifg(
         mock_config_section_ifg_symlinks: Path,
-        mock_ifg_target_link_folders: Tuple[Path, list[Path], Path, list[Path]]
+        mock_ifg_target_link_folders: Tuple[Path, list[Path], Path, list[Path]],
+        workers: Union[int, None]
 ) -> None:
     """
     Test prepare_symlinks when symlinks section of config contains EM27 instruments.
@@ -256,7 +361,8 @@ def test_prepare_symlinks_ifg(
     # Test that correct output is given based on mock config file
     # i.e. that correct symlinks are created.
     pipeline.prepare_symlinks(
-        mock_config_section_ifg_symlinks
+        mock_config_section_ifg_symlinks,
+        workers=workers
     )
     link_folder, link_paths, _, _ = mock_ifg_target_link_folders
     created_links = sorted(
@@ -264,3 +370,160 @@ def test_prepare_symlinks_ifg(
         key=lambda d: d.name
     )
     assert created_links == link_paths
+
+
+# @pytest.mark.only
+def test_prepare_symlinks_link_name_rule(
+        mock_ifg_target_link_folders: Tuple[Path, list[Path], Path, list[Path]],
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture
+) -> None:
+    link_folder, link_paths, target_folder, _ = mock_ifg_target_link_folders
+    (target_folder/'notes.txt').touch()
+    config_file: Path = tmp_path/'config.yml'
+    ioutils.write_yaml_config(
+        data={CONF_SECTION_SYMLINKS: {
+            # the date rule enabled with its template
+            'SN300': {
+                'target_folders': [str(target_folder)],
+                'link_folder': str(link_folder),
+                'link_name_template': '{yyyy}{mm}{dd}'
+            },
+            # a legacy EM27 job without a rule
+            'SN039': {
+                'target_folders': [str(target_folder)],
+                'link_folder': str(tmp_path/'SN039')
+            },
+            # other jobs keep the names of the targets
+            'SN400': {
+                'target_folders': [str(target_folder)],
+                'link_folder': str(tmp_path/'SN400')
+            },
+            # a new instrument with a configured rule
+            'SN200': {
+                'target_folders': [str(target_folder)],
+                'link_folder': str(tmp_path/'SN200'),
+                'link_name_pattern': r'(?P<year>\d{2}|\d{4})(?P<month>\d{2})(?P<day>\d{2})',
+                'link_name_template': 'ifg_{yyyy}{mm}{dd}'
+            }
+        }},
+        config_file_path=config_file
+    )
+    # Test that names that do not match are skipped, not the whole target folder
+    pipeline.prepare_symlinks(config_file)
+    assert sorted(link_folder.iterdir()) == link_paths
+    assert sorted(p.name for p in (tmp_path/'SN039').iterdir()) == [
+        p.name for p in link_paths
+    ]
+    assert "link_name_template: '{yyyy}{mm}{dd}'" in capsys.readouterr().out
+    assert sorted(p.name for p in (tmp_path/'SN400').iterdir()) == sorted(
+        p.name for p in target_folder.iterdir()
+    )
+    assert sorted(p.name for p in (tmp_path/'SN200').iterdir()) == [
+        f'ifg_{p.name}' for p in link_paths
+    ]
+
+
+# @pytest.mark.only
+def test_prepare_symlinks_state_file(
+        mock_target_link_folders: Tuple[Path, list[Path], Path, list[Path]],
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture
+) -> None:
+    link_folder, link_paths, target_folder, target_paths = mock_target_link_folders
+    config_file: Path = tmp_path/'config.yml'
+    ioutils.write_yaml_config(
+        data={CONF_SECTION_SYMLINKS: {'job1': {
+            'target_folders': [str(target_folder)],
+            'link_folder': str(link_folder),
+            'state_file': str(tmp_path/'state.json')
+        }}},
+        config_file_path=config_file
+    )
+    os.utime(target_folder, ns=(0, 0))
+    pipeline.prepare_symlinks(config_file)
+    assert sorted(link_folder.iterdir()) == link_paths
+    # Test that unchanged target folders are skipped
+    capsys.readouterr()
+    pipeline.prepare_symlinks(config_file)
+    assert 'unchanged since last run' in capsys.readouterr().out
+    # Test that links deleted from the link folder are written again
+    link_paths[0].unlink()
+    pipeline.prepare_symlinks(config_file)
+    assert sorted(link_folder.iterdir()) == link_paths
+    # Test that links to removed targets are deleted
+    target_paths[1].unlink()
+    pipeline.prepare_symlinks(config_file)
+    assert sorted(link_folder.iterdir()) == [link_paths[0], link_paths[2]]
+    # Test that a new link folder of the job is linked
+    config_file.unlink()
+    ioutils.write_yaml_config(
+        data={CONF_SECTION_SYMLINKS: {'job1': {
+            'target_folders': [str(target_folder)],
+            'link_folder': str(tmp_path/'link2'),
+            'state_file': str(tmp_path/'state.json')
+        }}},
+        config_file_path=config_file
+    )
+    pipeline.prepare_symlinks(config_file)
+    assert sorted(p.name for p in (tmp_path/'link2').iterdir()) == [
+        link_paths[0].name, link_paths[2].name
+    ]
+
+
+# @pytest.mark.only
+@pytest.mark.parametrize('workers', [None, 2])
+def test_prepare_symlinks_unreadable_target_folder(
+        mock_target_link_folders: Tuple[Path, list[Path], Path, list[Path]],
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture,
+        monkeypatch: pytest.MonkeyPatch,
+        workers: Union[int, None]
+) -> None:
+    link_folder, link_paths, target_folder, _ = mock_target_link_folders
+    (tmp_path/'stale').mkdir()
+    config_file: Path = tmp_path/'config.yml'
+    ioutils.write_yaml_config(
+        data={CONF_SECTION_SYMLINKS: {
+            'job1': {
+                'target_folders': [str(tmp_path/'missing'), str(target_folder)],
+                'link_folder': str(link_folder)
+            },
+            'job2': {
+                'target_folders': [str(tmp_path/'stale')],
+                'link_folder': str(tmp_path/'link2')
+            }
+        }},
+        config_file_path=config_file
+    )
+    scandir = os.scandir
+
+    def stale_scandir(path):
+        if Path(path) == tmp_path/'stale':
+            raise OSError(116, 'Stale file handle')
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', stale_scandir)
+    # Test that unreadable target folders are reported and the other ones linked
+    pipeline.prepare_symlinks(config_file, workers=workers)
+    out = capsys.readouterr().out
+    assert f"Target folder {tmp_path/'missing'} not found." in out
+    assert f"! Error, skipping '{tmp_path/'stale'}'." in out
+    assert sorted(link_folder.iterdir()) == link_paths
+
+
+# @pytest.mark.only
+def test_watch_pressure(
+        mock_config_no_processed_files: Path,
+        mock_processed_file_paths: Tuple[Tuple[Path], Tuple[Path, Path]]
+) -> None:
+    # Test that all locations are parsed at start
+    pipeline.watch_pressure(
+        mock_config_no_processed_files,
+        interval=0,
+        debounce=0,
+        polls=1
+    )
+    for loc_paths in mock_processed_file_paths:
+        for file_path in loc_paths:
+            assert file_path.exists()
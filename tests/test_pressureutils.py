@@ -1,4 +1,7 @@
-from io import StringIO
+import datetime
+import os
+import re
+
 from pathlib import Path
 from typing import Generator, Tuple
 
@@ -6,10 +9,11 @@ import numpy as np
 import pandas as pd
 import pytest
 
-from modules import pressureutils
+from modules import configutils, indexutils, pressureutils, timeutils
 from .fixtures import (
     mock_config_existing_processed_files,
     mock_config_no_processed_files,
+    mock_config_processing_index,
     mock_config_pressure_correction_cases,
     mock_processed_file_paths,
     CONF_SECTION_PRESSURE,
@@ -42,6 +46,638 @@ def test_parse_pressure_folder(
     # based on example config
 
 
+# @pytest.mark.only
+def test_parse_pressure_folder_workers(
+        mock_config_no_processed_files: Path,
+        mock_processed_file_paths: Tuple[Tuple[Path], Tuple[Path, Path]]
+) -> None:
+    # Test that parsing in a process pool creates the same files
+    for i, loc in enumerate(LOCS):
+        pressureutils.parse_pressure_folder(
+            mock_config_no_processed_files,
+            CONF_SECTION_PRESSURE,
+            loc,
+            workers=2
+        )
+        assert False not in list(p.exists() for p in mock_processed_file_paths[i])
+
+
+# @pytest.mark.only
+def test_parse_pressure_folder_index(
+        mock_config_processing_index: Path,
+        mock_processed_file_paths: Tuple[Tuple[Path], Tuple[Path, Path]]
+) -> None:
+    for i, loc in enumerate(LOCS):
+        # Test that files are parsed and recorded in the index
+        assert pressureutils.parse_pressure_folder(
+            mock_config_processing_index,
+            CONF_SECTION_PRESSURE,
+            loc
+        ) == (len(EXAMPLE_RAW_FILE_PATHS[i]), len(EXAMPLE_RAW_FILE_PATHS[i]))
+        assert False not in list(p.exists() for p in mock_processed_file_paths[i])
+        index_file = configutils.load_config(
+            mock_config_processing_index
+        ).pressure_location(CONF_SECTION_PRESSURE, loc).index_file
+        with indexutils.ProcessingIndex(index_file) as index:
+            entries = index.entries()
+        assert sorted(entries) == [p.name for p in EXAMPLE_RAW_FILE_PATHS[i]]
+        for entry, output_path in zip(
+            sorted(entries.values()), mock_processed_file_paths[i]
+        ):
+            assert entry.status == indexutils.PARSED
+            assert entry.output_path == str(output_path)
+        # Test that parsed files are not parsed again
+        assert pressureutils.parse_pressure_folder(
+            mock_config_processing_index,
+            CONF_SECTION_PRESSURE,
+            loc
+        ) == (0, 0)
+        # Test that a deleted output file is only found
+        # after rebuilding the index
+        mock_processed_file_paths[i][0].unlink()
+        assert pressureutils.parse_pressure_folder(
+            mock_config_processing_index,
+            CONF_SECTION_PRESSURE,
+            loc
+        ) == (0, 0)
+        assert pressureutils.parse_pressure_folder(
+            mock_config_processing_index,
+            CONF_SECTION_PRESSURE,
+            loc,
+            rebuild_index=True
+        ) == (1, 1)
+        assert mock_processed_file_paths[i][0].exists()
+
+
+# @pytest.mark.only
+@pytest.mark.parametrize('change_detection', ['stat', 'hash', 'none'])
+def test_parse_pressure_folder_changed_files(
+        tmp_path: Generator[Path, None, None],
+        change_detection: str
+) -> None:
+    raw_folder: Path = tmp_path/'raw'
+    raw_folder.mkdir()
+    for raw_file in EXAMPLE_RAW_FILE_PATHS[1]:
+        (raw_folder/raw_file.name).write_bytes(raw_file.read_bytes())
+    config = configutils.PipelineConfig({
+        CONF_SECTION_PRESSURE: {
+            LOCS[1]: {
+                'raw_pressure_folder': str(raw_folder),
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': str(tmp_path/'parsed'),
+                'start_date': '2016-06-02',
+                'index_file': str(tmp_path/'index.sqlite'),
+                'change_detection': change_detection
+            }
+        }
+    })
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (2, 2)
+    # Test that a touched file is only parsed again when comparing stats
+    raw_file = sorted(raw_folder.iterdir())[0]
+    stat = raw_file.stat()
+    os.utime(raw_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    expected = (1, 1) if change_detection == 'stat' else (0, 0)
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == expected
+    # Test that a modified file is parsed again and its output replaced
+    output_file = next((tmp_path/'parsed').glob('*20160602.csv'))
+    output_content = output_file.read_text()
+    lines = raw_file.read_text().splitlines(keepends=True)
+    raw_file.write_text(''.join(lines[:-1]))
+    expected = (0, 0) if change_detection == 'none' else (1, 1)
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == expected
+    assert (output_file.read_text() != output_content) == (change_detection != 'none')
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (0, 0)
+
+
+# @pytest.mark.only
+@pytest.mark.parametrize('change_detection', ['stat', 'hash'])
+def test_parse_pressure_folder_written_while_parsed(
+        tmp_path: Generator[Path, None, None],
+        monkeypatch: pytest.MonkeyPatch,
+        change_detection: str
+) -> None:
+    raw_folder: Path = tmp_path/'raw'
+    raw_folder.mkdir()
+    raw_file: Path = raw_folder/EXAMPLE_RAW_FILE_PATHS[1][0].name
+    content = EXAMPLE_RAW_FILE_PATHS[1][0].read_bytes()
+    lines = content.splitlines(keepends=True)
+    raw_file.write_bytes(b''.join(lines[:-1]))
+    config = configutils.PipelineConfig({
+        CONF_SECTION_PRESSURE: {
+            LOCS[1]: {
+                'raw_pressure_folder': str(raw_folder),
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': str(tmp_path/'parsed'),
+                'start_date': '2016-06-02',
+                'index_file': str(tmp_path/'index.sqlite'),
+                'change_detection': change_detection
+            }
+        }
+    })
+    record_parse_result = pressureutils.record_parse_result
+
+    def append_then_record(*args, **kwargs):
+        raw_file.write_bytes(content)
+        record_parse_result(*args, **kwargs)
+
+    # Test that lines written between parsing and recording are parsed next run
+    monkeypatch.setattr(pressureutils, 'record_parse_result', append_then_record)
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (1, 1)
+    monkeypatch.undo()
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (1, 1)
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (0, 0)
+    # Test that a touched file is recorded with its new modification time
+    stat = raw_file.stat()
+    os.utime(raw_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    pressureutils.parse_pressure_folder(config, CONF_SECTION_PRESSURE, LOCS[1])
+    with indexutils.ProcessingIndex(tmp_path/'index.sqlite') as index:
+        entry = index.entries()[raw_file.name]
+    assert entry.mtime_ns == stat.st_mtime_ns + 10**9
+    assert entry.content_hash == (
+        indexutils.file_hash(raw_file) if change_detection == 'hash' else None
+    )
+
+
+# @pytest.mark.only
+@pytest.mark.parametrize(
+    'raw_file_path', [EXAMPLE_RAW_FILE_PATHS[0][0], EXAMPLE_RAW_FILE_PATHS[1][0]]
+)
+def test_append_pressure_file(
+        tmp_path: Generator[Path, None, None],
+        raw_file_path: Path
+) -> None:
+    raw_file: Path = tmp_path/raw_file_path.name
+    output_file: Path = tmp_path/'parsed'/'pressure.csv'
+    expected_file: Path = tmp_path/'expected.csv'
+    pressureutils.parse_pressure_file(
+        raw_file_path, expected_file, pressure_correction=1.0
+    )
+    content = raw_file_path.read_bytes()
+    lines = content.splitlines(keepends=True)
+    # Test that an unfinished last line is left for the next call
+    raw_file.write_bytes(b''.join(lines[:-2]) + lines[-2][:10])
+    offset, last_timestamp = pressureutils.append_pressure_file(
+        raw_file, output_file, pressure_correction=1.0
+    )
+    assert offset == len(b''.join(lines[:-2]))
+    assert len(pd.read_csv(output_file)) == len(pd.read_csv(expected_file)) - 2
+    raw_file.write_bytes(content)
+    offset, last_timestamp = pressureutils.append_pressure_file(
+        raw_file, output_file, offset, last_timestamp, pressure_correction=1.0
+    )
+    assert offset == len(content)
+    assert output_file.read_text() == expected_file.read_text()
+    # Test that nothing is appended without new lines
+    assert pressureutils.append_pressure_file(
+        raw_file, output_file, offset, last_timestamp, pressure_correction=1.0
+    ) == (offset, last_timestamp)
+    assert output_file.read_text() == expected_file.read_text()
+    # Test that rows up to the last timestamp are not appended twice
+    assert pressureutils.append_pressure_file(
+        raw_file, output_file, offset - len(lines[-1]), last_timestamp,
+        pressure_correction=1.0
+    ) == (offset, last_timestamp)
+    assert output_file.read_text() == expected_file.read_text()
+
+
+# @pytest.mark.only
+@pytest.mark.parametrize('change_detection', ['stat', 'hash'])
+def test_parse_pressure_folder_incremental(
+        tmp_path: Generator[Path, None, None],
+        change_detection: str
+) -> None:
+    raw_folder: Path = tmp_path/'raw'
+    raw_folder.mkdir()
+    raw_file: Path = raw_folder/EXAMPLE_RAW_FILE_PATHS[1][0].name
+    content = EXAMPLE_RAW_FILE_PATHS[1][0].read_bytes()
+    lines = content.splitlines(keepends=True)
+    raw_file.write_bytes(b''.join(lines[:-1]))
+    config = configutils.PipelineConfig({
+        CONF_SECTION_PRESSURE: {
+            LOCS[1]: {
+                'raw_pressure_folder': str(raw_folder),
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': str(tmp_path/'parsed'),
+                'start_date': '2016-06-02',
+                'index_file': str(tmp_path/'index.sqlite'),
+                'incremental': True,
+                'change_detection': change_detection
+            }
+        }
+    })
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (1, 1)
+    # Test that appended lines are parsed and added to the output file
+    raw_file.write_bytes(content)
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1], workers=2
+    ) == (1, 1)
+    output_file = next((tmp_path/'parsed').iterdir())
+    expected_file: Path = tmp_path/'expected.csv'
+    pressureutils.parse_pressure_file(
+        raw_file,
+        expected_file,
+        pressureutils.calculate_barometric_factor(None)
+    )
+    assert output_file.read_text() == expected_file.read_text()
+    with indexutils.ProcessingIndex(tmp_path/'index.sqlite') as index:
+        assert index.entries()[raw_file.name].byte_offset == len(content)
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (0, 0)
+    # Test that a rewritten file is parsed again from the start
+    raw_file.write_bytes(b''.join(lines[:-2]))
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (1, 1)
+    assert len(pd.read_csv(output_file)) == len(pd.read_csv(expected_file)) - 2
+    # Test that a larger corrected file is parsed again from the start
+    raw_file.write_bytes(
+        b''.join(lines[:-3]) + lines[-3].replace(b'1003.8', b'1004.8')
+        + b''.join(lines[-2:])
+    )
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (1, 1)
+    corrected_file: Path = tmp_path/'corrected.csv'
+    pressureutils.parse_pressure_file(
+        raw_file,
+        corrected_file,
+        pressureutils.calculate_barometric_factor(None)
+    )
+    assert output_file.read_text() == corrected_file.read_text()
+    # Test that a file without data lines is left pending without output file
+    output_file.unlink()
+    header = lines[:next(
+        i for i, line in enumerate(lines) if pressureutils.AWS_SEPARATOR_LINE.match(line.decode())
+    ) + 1]
+    raw_file.write_bytes(b''.join(header))
+    assert pressureutils.append_pressure_file(raw_file, output_file) == pressureutils.NO_DATA
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (1, 0)
+    assert not output_file.exists()
+    with indexutils.ProcessingIndex(tmp_path/'index.sqlite') as index:
+        entry = index.entries()[raw_file.name]
+    assert (entry.status, entry.output_path) == (indexutils.PENDING, None)
+    # Test that its data is parsed once written
+    raw_file.write_bytes(content)
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (1, 1)
+    assert output_file.read_text() == expected_file.read_text()
+
+
+# @pytest.mark.only
+def test_parse_pressure_folder_raw_file_names(
+        mock_config_no_processed_files: Path,
+        mock_processed_file_paths: Tuple[Tuple[Path], Tuple[Path, Path]]
+) -> None:
+    # Test that only the dates of given raw files are parsed,
+    # also if their output files exist
+    assert pressureutils.parse_pressure_folder(
+        mock_config_no_processed_files,
+        CONF_SECTION_PRESSURE,
+        LOCS[1],
+        raw_file_names=[]
+    ) == (0, 0)
+    assert pressureutils.parse_pressure_folder(
+        mock_config_no_processed_files,
+        CONF_SECTION_PRESSURE,
+        LOCS[1],
+        raw_file_names=[EXAMPLE_RAW_FILE_PATHS[1][1].name, 'notes.lst']
+    ) == (1, 1)
+    assert [p.exists() for p in mock_processed_file_paths[1]] == [False, True]
+    assert pressureutils.parse_pressure_folder(
+        mock_config_no_processed_files,
+        CONF_SECTION_PRESSURE,
+        LOCS[1],
+        raw_file_names=[EXAMPLE_RAW_FILE_PATHS[1][1].name]
+    ) == (1, 1)
+
+
+# @pytest.mark.only
+@pytest.mark.parametrize('index_file', [None, 'index.sqlite'])
+def test_parse_pressure_folder_raw_file_pattern(
+        tmp_path: Generator[Path, None, None],
+        index_file: str
+) -> None:
+    raw_folder: Path = tmp_path/'raw'
+    raw_folder.mkdir()
+    for raw_file in EXAMPLE_RAW_FILE_PATHS[1]:
+        date_string = raw_file.stem.split('_')[1]
+        (raw_folder/f'AWS-{date_string[6:8]}{date_string[4:6]}{date_string[0:4]}.lst').write_bytes(
+            raw_file.read_bytes()
+        )
+    (raw_folder/'AWS-notes.lst').write_text('')
+    config = configutils.PipelineConfig({
+        CONF_SECTION_PRESSURE: {
+            LOCS[1]: {
+                'raw_pressure_folder': str(raw_folder),
+                'raw_file_extension': 'lst',
+                'raw_file_pattern': r'AWS-(?P<day>\d{2})(?P<month>\d{2})(?P<year>\d{4})\.lst',
+                'parsed_pressure_folder': str(tmp_path/'parsed'),
+                'start_date': '2016-06-02',
+                'index_file': None if index_file is None else str(tmp_path/index_file)
+            }
+        }
+    })
+    # Test that raw files are found and parsed with a configured file name pattern
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (2, 2)
+    assert sorted(p.name for p in (tmp_path/'parsed').iterdir()) == [
+        f'pressure-{LOCS[1]}-20160602.csv', f'pressure-{LOCS[1]}-20170602.csv'
+    ]
+
+
+# @pytest.mark.only
+@pytest.mark.parametrize('end_date', ['2016-06-30', '2016-12-31'])
+def test_generate_unparsed_pressure_file_list_probe_dates(
+        tmp_path: Generator[Path, None, None],
+        monkeypatch: pytest.MonkeyPatch,
+        end_date: str
+) -> None:
+    raw_folder: Path = tmp_path/'raw'
+    raw_folder.mkdir()
+    for raw_file in EXAMPLE_RAW_FILE_PATHS[1]:
+        (raw_folder/raw_file.name).write_bytes(raw_file.read_bytes())
+    (tmp_path/'parsed').mkdir()
+    (tmp_path/'parsed'/f'pressure-{LOCS[1]}-20160603.csv').write_text('')
+    (raw_folder/'aws_20160603.lst').write_text('')
+    config = configutils.PipelineConfig({
+        CONF_SECTION_PRESSURE: {
+            LOCS[1]: {
+                'raw_pressure_folder': str(raw_folder),
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': str(tmp_path/'parsed'),
+                'start_date': '2016-06-01',
+                'end_date': end_date
+            }
+        }
+    })
+    location_config = config.pressure_location(CONF_SECTION_PRESSURE, LOCS[1])
+    # Test that short date ranges are checked by file name, long ones listed,
+    # with the same unparsed files found either way
+    assert pressureutils.probe_dates(
+        location_config,
+        location_config.start_date,
+        location_config.end_date,
+        (raw_folder,)
+    ) == (end_date == '2016-06-30')
+    raw_paths, output_paths = pressureutils.generate_unparsed_pressure_file_list(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    )
+    assert raw_paths == (raw_folder/'aws_20160602.lst',)
+    assert output_paths == (tmp_path/'parsed'/f'pressure-{LOCS[1]}-20160602.csv',)
+    # Test that ranges with more days than the raw folder has files are listed
+    monkeypatch.setattr(
+        pressureutils, 'FOLDER_ENTRY_BYTES', raw_folder.stat().st_size
+    )
+    assert not pressureutils.probe_dates(
+        location_config,
+        location_config.start_date,
+        location_config.end_date,
+        (raw_folder,)
+    )
+    assert pressureutils.generate_unparsed_pressure_file_list(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (raw_paths, output_paths)
+    # Test that an end date earlier than the start date is rejected
+    with pytest.raises(ValueError, match='must be earlier or equal'):
+        pressureutils.probe_dates(
+            location_config, location_config.end_date, location_config.start_date
+        )
+
+
+# @pytest.mark.only
+@pytest.mark.parametrize('index_file', [None, 'index.sqlite'])
+@pytest.mark.parametrize('raw_pressure_folder', [
+    ['examples/pressure/location2_raw_2016', 'examples/pressure/location2_raw_2017'],
+    'examples/pressure/location2_raw_{year}'
+])
+def test_parse_pressure_folder_raw_pressure_folders(
+        tmp_path: Generator[Path, None, None],
+        index_file: str,
+        raw_pressure_folder: list
+) -> None:
+    config = configutils.PipelineConfig({
+        CONF_SECTION_PRESSURE: {
+            LOCS[1]: {
+                'raw_pressure_folder': raw_pressure_folder,
+                'raw_file_extension': 'lst',
+                'parsed_pressure_folder': str(tmp_path/'parsed'),
+                'start_date': '2016-06-02',
+                'end_date': '2017-12-31',
+                'index_file': None if index_file is None else str(tmp_path/index_file)
+            }
+        }
+    })
+    location_config = config.pressure_location(CONF_SECTION_PRESSURE, LOCS[1])
+    assert pressureutils.get_raw_pressure_folders(location_config) == (
+        Path('examples/pressure/location2_raw_2016'),
+        Path('examples/pressure/location2_raw_2017')
+    )
+    # Test that the raw files of all the folders of a location are parsed
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1]
+    ) == (2, 2)
+    assert sorted(p.name for p in (tmp_path/'parsed').iterdir()) == [
+        f'pressure-{LOCS[1]}-20160602.csv', f'pressure-{LOCS[1]}-20170602.csv'
+    ]
+    # Test that requested raw files are found in their folder
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[1],
+        raw_file_names=['aws_20170602.lst']
+    ) == ((1, 1) if index_file is None else (0, 0))
+
+
+# @pytest.mark.only
+def test_parse_pressure_folder_merge_raw_files(
+        tmp_path: Generator[Path, None, None]
+) -> None:
+    raw_folder: Path = tmp_path/'raw'
+    raw_folder.mkdir()
+    log_lines = EXAMPLE_RAW_FILE_PATHS[0][0].read_text().splitlines(keepends=True)
+    (raw_folder/EXAMPLE_RAW_FILE_PATHS[0][0].name).write_text(''.join(log_lines))
+    # an error log with a line before the log, a line of the log with another
+    # value and a line after the log
+    error_lines = [
+        log_lines[2].replace('18:44:29', '18:40:00'),
+        log_lines[3].replace('62.3', '99.9'),
+        log_lines[-1].replace(log_lines[-1][11:19], '23:59:59')
+    ]
+    (raw_folder/'160602_PTU300_error_log.txt').write_text(
+        ''.join(log_lines[:2] + error_lines)
+    )
+    config = configutils.PipelineConfig({
+        CONF_SECTION_PRESSURE: {
+            LOCS[0]: {
+                'raw_pressure_folder': str(raw_folder),
+                'raw_file_extension': 'txt',
+                'parsed_pressure_folder': str(tmp_path/'parsed'),
+                'start_date': '2016-06-02',
+                'end_date': '2016-06-02',
+                'merge_raw_files': True
+            }
+        }
+    })
+    # Test that the log and error log of a date are merged into one file
+    assert pressureutils.parse_pressure_folder(
+        config, CONF_SECTION_PRESSURE, LOCS[0]
+    ) == (1, 1)
+    merged = pd.read_csv(tmp_path/'parsed'/f'pressure-{LOCS[0]}-20160602.csv')
+    log = pd.read_csv(EXAMPLE_PROCESSED_FILE_PATHS[0][0])
+    assert len(merged) == len(log) + 2
+    assert merged['TimeUTC'].iloc[0] == '18:40:00'
+    assert merged['TimeUTC'].iloc[-1] == '23:59:59'
+    assert merged['TimeUTC'].is_unique
+    assert merged['TimeUTC'].is_monotonic_increasing
+    # rows of the log are preferred over rows of the error log
+    assert merged.loc[merged['TimeUTC'] == '18:44:43', 'RelativeHumidity'].item() == 62.3
+
+
+# @pytest.mark.only
+def test_select_raw_file_name() -> None:
+    file_date = datetime.date(2016, 6, 2)
+    assert pressureutils.select_raw_file_name(
+        ['160602_PTU300_error_log.txt', '160602_PTU300_log.txt'], file_date, 'txt'
+    ) == '160602_PTU300_log.txt'
+    assert pressureutils.select_raw_file_name(
+        ['160602_b.txt', '160602_a.txt'], file_date, 'txt'
+    ) == '160602_a.txt'
+
+
+# @pytest.mark.only
+def test_raw_pressure_format(
+        tmp_path: Generator[Path, None, None]
+) -> None:
+    def read_dat_frame(input_file, columns, in_sep=None, engine='c', v=False):
+        df = pd.read_csv(input_file, sep=in_sep or ',', engine=engine)
+        timestamps = timeutils.datetime_to_date_time(
+            timeutils.parse_timestamps(df[columns['timestamp']])
+        )
+        return pd.DataFrame({
+            'date': timestamps['date'],
+            'time': timestamps['time'],
+            'pressure': df[columns['pressure']],
+            'temperature': df[columns['temperature']],
+            'rh': df[columns['rh']]
+        })
+
+    raw_format = pressureutils.RawPressureFormat(
+        name='dat_logger',
+        extension='dat',
+        filename_pattern=re.compile(
+            r'logger_(?P<year>\d{4})(?P<month>\d{2})(?P<day>\d{2})\.dat'
+        ),
+        filename_template='logger_{date:%Y%m%d}.dat',
+        columns={'timestamp': 'time', 'pressure': 'p', 'temperature': 't', 'rh': 'rh'},
+        reader=read_dat_frame,
+        header_reader=lambda file: file.readline()
+    )
+    raw_folder: Path = tmp_path/'raw'
+    raw_folder.mkdir()
+    (raw_folder/'logger_20160602.dat').write_text(
+        'time,p,t,rh\n2016-06-02T18:00:00,1000.5,-20.0,70\n'
+    )
+    config = configutils.PipelineConfig({
+        CONF_SECTION_PRESSURE: {
+            LOCS[1]: {
+                'raw_pressure_folder': str(raw_folder),
+                'raw_file_extension': 'txt',
+                'raw_file_format': 'dat_logger',
+                'parsed_pressure_folder': str(tmp_path/'parsed'),
+                'start_date': '2016-06-02'
+            }
+        }
+    })
+    # Test that an unregistered format is not accepted
+    with pytest.raises(ValueError):
+        pressureutils.parse_pressure_folder(config, CONF_SECTION_PRESSURE, LOCS[1])
+    pressureutils.register_raw_pressure_format(raw_format)
+    try:
+        with pytest.raises(ValueError):
+            pressureutils.register_raw_pressure_format(raw_format)
+        # Test that files are listed with the extension of the format
+        location_config = config.pressure_location(CONF_SECTION_PRESSURE, LOCS[1])
+        assert pressureutils.get_raw_file_extension(location_config) == 'dat'
+        # Test that files are found and read with the format of the location
+        assert pressureutils.parse_pressure_folder(
+            config, CONF_SECTION_PRESSURE, LOCS[1]
+        ) == (1, 1)
+        output = pd.read_csv(tmp_path/'parsed'/f'pressure-{LOCS[1]}-20160602.csv')
+        assert output['Date'].tolist() == ['2016.06.02']
+        assert output['TimeUTC'].tolist() == ['18:00:00']
+        assert output['PressureBaroTHB40'].tolist() == [1000.5]
+    finally:
+        del pressureutils.RAW_PRESSURE_FORMATS[raw_format.name]
+
+
+# @pytest.mark.only
+def test_parse_pressure_files(
+        tmp_path: Generator[Path, None, None],
+        capsys: pytest.CaptureFixture
+) -> None:
+    input_paths = EXAMPLE_RAW_FILE_PATHS[1] + (tmp_path/'aws_20180602.lst',)
+    output_paths = tuple(
+        tmp_path/f'tmp_parsed_{i}.csv' for i in range(len(input_paths))
+    )
+    # Test that a missing input file does not stop the other files
+    # and is not counted as parsed
+    for workers in (1, 2):
+        assert pressureutils.parse_pressure_files(
+            input_paths,
+            output_paths,
+            pressure_correction=1.0,
+            workers=workers
+        ) == 2
+        for output_path, example_path in zip(
+            output_paths, EXAMPLE_PROCESSED_FILE_PATHS[1]
+        ):
+            assert output_path.read_text() == example_path.read_text()
+        assert not output_paths[-1].exists()
+    # Test that a file without data lines is not counted nor reported as failed
+    lines = EXAMPLE_RAW_FILE_PATHS[1][0].read_bytes().splitlines(keepends=True)
+    header_file: Path = tmp_path/'aws_20160603.lst'
+    header_file.write_bytes(b''.join(lines[:next(
+        i for i, line in enumerate(lines) if pressureutils.AWS_SEPARATOR_LINE.match(line.decode())
+    ) + 1]))
+    capsys.readouterr()
+    assert pressureutils.parse_pressure_files(
+        (header_file,),
+        (tmp_path/'tmp_parsed_header.csv',),
+        pressure_correction=1.0,
+        offsets={},
+        v=True
+    ) == 0
+    out = capsys.readouterr().out
+    assert 'no data yet' in out
+    assert 'Failed' not in out
+    # Test invalid number of workers
+    with pytest.raises(ValueError):
+        pressureutils.parse_pressure_files(
+            input_paths,
+            output_paths,
+            workers=0
+        )
+
+
 # @pytest.mark.only
 def test_parse_pressure_file(
         tmp_path: Generator[Path, None, None]
@@ -52,19 +688,90 @@ def test_parse_pressure_file(
     for i, loc_paths in enumerate(EXAMPLE_RAW_FILE_PATHS):
         for j, raw_input_path in enumerate(loc_paths):
             mock_output_path: Path = tmp_path/f'tmp_parsed_loc{i}_{raw_input_path.name}.csv'
-            pressureutils.parse_pressure_file(
-                raw_input_path,
-                mock_output_path,
-                pressure_correction=1.0 # calibration factor
-            )
-            mock_output_content = mock_output_path.read_text()
-            with open(
-                EXAMPLE_PROCESSED_FILE_PATHS[i][j],
-                'r',
-                encoding='utf-8'
-            ) as f:
-                example_output_content = f.read()
-            assert mock_output_content == example_output_content
+            for lst_engine in ('c', 'python'):
+                pressureutils.parse_pressure_file(
+                    raw_input_path,
+                    mock_output_path,
+                    pressure_correction=1.0, # calibration factor
+                    lst_engine=lst_engine
+                )
+                mock_output_content = mock_output_path.read_text()
+                with open(
+                    EXAMPLE_PROCESSED_FILE_PATHS[i][j],
+                    'r',
+                    encoding='utf-8'
+                ) as f:
+                    example_output_content = f.read()
+                assert mock_output_content == example_output_content
+
+
+# @pytest.mark.only
+def test_parse_pressure_file_output_format(
+        tmp_path: Generator[Path, None, None]
+) -> None:
+    mock_output_path: Path = tmp_path/'tmp_parsed.csv'
+    # Test float formatting of output
+    pressureutils.parse_pressure_file(
+        EXAMPLE_RAW_FILE_PATHS[1][0],
+        mock_output_path,
+        pressure_correction=0.5,
+        float_format='%.2f'
+    )
+    assert mock_output_path.read_text().splitlines()[1] == (
+        '2016.06.02,18:00:00,1003.80,0.50,501.90,-21.10,75.00'
+    )
+    # Test that columns are typed
+    df = pd.read_csv(mock_output_path)
+    assert list(df.dtypes[2:]) == [np.float64]*5
+    # Test that no correction gives an empty correction column
+    pressureutils.parse_pressure_file(
+        EXAMPLE_RAW_FILE_PATHS[0][0],
+        mock_output_path,
+        pressure_correction=None
+    )
+    assert mock_output_path.read_text().splitlines()[1] == (
+        '2016.06.02,18:44:29,997.2,,997.2,-9.9,62.0'
+    )
+
+
+# @pytest.mark.only
+def test_correction_column() -> None:
+    assert np.isnan(pressureutils.correction_column(None, 2)).all()
+    assert list(pressureutils.correction_column(0.5, 2)) == [0.5, 0.5]
+    assert list(pressureutils.correction_column([1, 2], 2)) == [1.0, 2.0]
+    assert pressureutils.correction_column([1, 2], 2).dtype == np.float64
+
+
+# @pytest.mark.only
+def test_read_aws_file(
+        tmp_path: Generator[Path, None, None]
+) -> None:
+    # Test that both engines read the same values
+    raw_input_path: Path = EXAMPLE_RAW_FILE_PATHS[1][0]
+    df_c = pressureutils.read_aws_file(raw_input_path)
+    df_python = pressureutils.read_aws_file(raw_input_path, engine='python')
+    assert list(df_c.columns) == list(pressureutils.AWS_COLUMNS)
+    assert list(df_c['OBSTIME']) == [
+        '2016-06-02 18:00', '2016-06-02 18:10', '2016-06-02 18:20'
+    ]
+    for column in pressureutils.AWS_COLUMNS[1:]:
+        assert df_c[column].dtype == np.float64
+        assert list(df_c[column]) == list(df_python[column])
+    # Test that a file with an empty field is read with the python engine
+    content: str = (
+        "OBSTIME               P_ST         T        RH  WS_10MIN  WD_10MIN\n"
+        "---------------- --------- --------- --------- --------- ---------\n"
+        "2016-06-02 18:00    1003.8     -21.1        75       0.0         0\n"
+        "2016-06-02 18:10    1003.8     -21.4        75                 218\n"
+    )
+    file: Path = tmp_path/'aws_20160602.lst'
+    file.write_text(content)
+    df = pressureutils.read_aws_file(file)
+    assert list(df['P_ST']) == [1003.8, 1003.8]
+    assert list(df['RH']) == [75, 75]
+    # Test invalid engine
+    with pytest.raises(ValueError):
+        pressureutils.read_aws_file(raw_input_path, engine='invalid')
 
 
 # @pytest.mark.only
@@ -221,6 +928,31 @@ def test_get_elevations(
         )
 
 
+# @pytest.mark.only
+def test_get_workers(
+        mock_config_pressure_correction_cases: Path
+) -> None:
+    # Test default value when workers is not configured
+    assert pressureutils.get_workers(
+        mock_config_pressure_correction_cases,
+        CONF_SECTION_PRESSURE,
+        'l1'
+    ) == 1
+    # Test configured values
+    assert pressureutils.get_workers(
+        mock_config_pressure_correction_cases,
+        CONF_SECTION_PRESSURE,
+        'l2'
+    ) == 4
+    # Test that an invalid value is rejected
+    with pytest.raises(ValueError, match='workers'):
+        pressureutils.get_workers(
+            mock_config_pressure_correction_cases,
+            CONF_SECTION_PRESSURE,
+            'l7'
+        )
+
+
 # @pytest.mark.only
 def test_generate_unparsed_pressure_file_list(
         mock_config_no_processed_files: Path,
@@ -255,7 +987,17 @@ def test_preprocess_case_log_file(
     content: str = '='
     file: Path = tmp_path/'tmp_raw_file.txt'
     file.write_text(content)
-    preprocessed_file: StringIO = pressureutils.preprocess_case_log_file(
+    with pressureutils.preprocess_case_log_file(
         file
-    )
-    assert preprocessed_file.read() == ' '
+    ) as preprocessed_file:
+        assert preprocessed_file.read() == ' '
+    assert preprocessed_file.closed
+    # Test that the file can be read in chunks and lines
+    content = 'T=-10\nP=997.2 RH=62\n'
+    file.write_text(content)
+    with pressureutils.preprocess_case_log_file(
+        file
+    ) as preprocessed_file:
+        assert preprocessed_file.read(3) == 'T -'
+        assert preprocessed_file.readline() == '10\n'
+        assert list(preprocessed_file) == ['P 997.2 RH 62\n']
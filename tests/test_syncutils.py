@@ -1,3 +1,5 @@
+import os
+
 from pathlib import Path
 from typing import Generator, Tuple, Union
 
@@ -65,6 +67,273 @@ def test_write_symlinks_arguement_types(
         )
 
 
+# @pytest.mark.only
+def test_write_symlinks_link_name(
+        mock_target_link_folders: Tuple[Path, list[Path], Path, list[Path]]
+) -> None:
+    link_folder, _, target_folder, target_paths = mock_target_link_folders
+    # Test naming links with a function applied while listing the target folder
+    assert syncutils.write_symlinks(
+        target_folder, link_folder,
+        link_name=lambda name: None if name.endswith('_dir') else f'named_{name}'
+    ) == 2
+    assert sorted(p.name for p in link_folder.iterdir()) == [
+        'named_test1.file', 'named_test2.file'
+    ]
+    assert (link_folder/'named_test1.file').readlink() == target_paths[1]
+    # Test supplying pairs of target and link name
+    assert syncutils.write_symlinks(
+        None, link_folder,
+        targets=[(target_paths[0], 'paired_dir')]
+    ) == 1
+    assert (link_folder/'paired_dir').readlink() == target_paths[0]
+
+
+# @pytest.mark.only
+def test_plan_symlinks(
+        mock_target_link_folders: Tuple[Path, list[Path], Path, list[Path]]
+) -> None:
+    link_folder, link_paths, target_folder, target_paths = mock_target_link_folders
+    link_paths[0].symlink_to(target_paths[0])
+    link_paths[1].symlink_to(target_paths[0])
+    targets = [(t, t.name) for t in target_paths] + [(target_paths[0], 'test2.file')]
+    # Test that links are sorted by what exists at the link path
+    plan = syncutils.plan_symlinks(targets, link_folder)
+    assert plan.create == [(target_paths[2], link_paths[2])]
+    assert plan.existing == [(target_paths[0], link_paths[0])]
+    assert plan.conflicts == [
+        (target_paths[1], link_paths[1]), (target_paths[0], link_paths[2])
+    ]
+    # Test that only missing links are written and conflicts are left unchanged
+    assert syncutils.write_symlinks(target_folder, link_folder) == 1
+    assert link_paths[1].readlink() == target_paths[0]
+    assert link_paths[2].readlink() == target_paths[2]
+    assert syncutils.write_symlinks(target_folder, link_folder) == 0
+
+
+# @pytest.mark.only
+def test_create_symlinks(
+        mock_target_link_folders: Tuple[Path, list[Path], Path, list[Path]]
+) -> None:
+    link_folder, link_paths, _, target_paths = mock_target_link_folders
+    link_paths[1].touch()
+    plan = syncutils.SymlinkPlan(list(zip(target_paths, link_paths)), [], [])
+    # Test that links written by threads are reported in the order of the plan
+    result = syncutils.create_symlinks(plan, workers=3)
+    assert result.created == [
+        (target_paths[0], link_paths[0]), (target_paths[2], link_paths[2])
+    ]
+    assert [failed[:2] for failed in result.failed] == [(target_paths[1], link_paths[1])]
+    assert isinstance(result.failed[0][2], FileExistsError)
+
+
+# @pytest.mark.only
+def test_sync_symlinks(
+        mock_target_link_folders: Tuple[Path, list[Path], Path, list[Path]],
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch
+) -> None:
+    link_folder, link_paths, target_folder, target_paths = mock_target_link_folders
+    os.utime(target_folder, ns=(0, 0))
+    result, removed, state = syncutils.sync_symlinks(target_folder, link_folder)
+    assert len(result.created) == 3
+    assert removed == []
+    assert state == {
+        'mtime_ns': 0,
+        'settings': {
+            'link_folder': str(link_folder),
+            'mode': 'symlink',
+            'link_name_rule': None,
+            'depth': 1,
+            'include': [],
+            'exclude': []
+        },
+        'links': {t.name: str(t) for t in target_paths},
+        'link_mtime_ns': link_folder.stat().st_mtime_ns
+    }
+    syncutils.write_symlink_state(tmp_path/'state.json', {'job': {str(target_folder): state}})
+    state = syncutils.read_symlink_state(tmp_path/'state.json')['job'][str(target_folder)]
+    # Test that an unchanged target folder is skipped
+    assert syncutils.sync_symlinks(target_folder, link_folder, state) == (None, [], state)
+    # Test that a changed link folder or other settings list it again
+    link_paths[0].unlink()
+    result, _, state = syncutils.sync_symlinks(target_folder, link_folder, state)
+    assert result.created == [(target_paths[0], link_paths[0])]
+    result, _, _ = syncutils.sync_symlinks(target_folder, tmp_path/'link2', state)
+    assert len(result.created) == 3
+    result, _, _ = syncutils.sync_symlinks(
+        target_folder, link_folder, state, link_name_rule=['.*', '{name}']
+    )
+    assert len(result.plan.existing) == 3
+    # Test that links to removed targets are deleted
+    target_paths[2].unlink()
+    result, removed, state = syncutils.sync_symlinks(target_folder, link_folder, state)
+    assert result.created == []
+    assert removed == [(target_paths[2], link_paths[2])]
+    assert not link_paths[2].is_symlink()
+    assert sorted(state['links']) == [t.name for t in target_paths[:2]]
+    # Test that a link that failed once is written by the next run
+    symlink = os.symlink
+    calls = {'count': 0}
+
+    def failing_symlink(target_path, link_path):
+        calls['count'] += 1
+        if calls['count'] == 1:
+            raise OSError(5, 'Input/output error')
+        symlink(target_path, link_path)
+
+    link_paths[0].unlink()
+    link_paths[1].unlink()
+    monkeypatch.setattr(syncutils.os, 'symlink', failing_symlink)
+    result, _, state = syncutils.sync_symlinks(target_folder, link_folder, state)
+    assert len(result.failed) == 1
+    assert state['mtime_ns'] is None
+    result, _, state = syncutils.sync_symlinks(target_folder, link_folder, state)
+    assert len(result.created) == 1
+    assert link_paths[0].is_symlink() and link_paths[1].is_symlink()
+    assert state['mtime_ns'] == target_folder.stat().st_mtime_ns
+    assert syncutils.read_symlink_state(tmp_path/'missing.json') == {}
+
+
+# @pytest.mark.only
+def test_write_symlinks_depth(
+        tmp_path: Path
+) -> None:
+    target_folder = tmp_path/'archive'
+    link_folder = tmp_path/'link'
+    for day in ('2016/06/160602', '2016/06/160603', '2016/07/160701', '2017/01/170101'):
+        (target_folder/day).mkdir(parents=True)
+    (target_folder/'2016'/'notes.txt').touch()
+    (target_folder/'2016'/'.hidden').touch()
+    # Test that the tree is mirrored down to depth with the patterns
+    targets = syncutils.list_targets(
+        target_folder, depth=3, include=['2016/*'], exclude=['*/07', '*/.*']
+    )
+    assert targets == [
+        (target_folder/'2016/06/160602', '2016/06/160602'),
+        (target_folder/'2016/06/160603', '2016/06/160603'),
+        (target_folder/'2016/notes.txt', '2016/notes.txt')
+    ]
+    assert syncutils.list_targets(target_folder, depth=2)[1] == (
+        target_folder/'2016/06', '2016/06'
+    )
+    # Test that hidden items are listed, as with Path.glob('*')
+    assert [name for _, name in syncutils.list_targets(target_folder, depth=None)] == [
+        '2016/.hidden', '2016/notes.txt'
+    ]
+    skipped = []
+    assert [name for _, name in syncutils.list_targets(
+        target_folder,
+        depth=3,
+        link_name=lambda name: name if name.startswith('17') else None,
+        skipped=skipped
+    )] == ['2017/01/170101']
+    assert skipped == ['2016/.hidden', '2016/06/160602', '2016/06/160603', '2016/07/160701', '2016/notes.txt']
+    # Test that links are written in the mirrored folders, and only once
+    assert syncutils.write_symlinks(
+        target_folder, link_folder, depth=3, exclude=['*.txt', '*/.*']
+    ) == 4
+    assert (link_folder/'2016'/'06').is_dir()
+    assert not (link_folder/'2016'/'06').is_symlink()
+    assert (link_folder/'2016/06/160602').readlink() == target_folder/'2016/06/160602'
+    assert sorted(path.name for path in (link_folder/'2016').iterdir()) == ['06', '07']
+    assert syncutils.write_symlinks(
+        target_folder, link_folder, depth=3, exclude=['*.txt', '*/.*']
+    ) == 0
+    # Test that nested links are recorded and pruned with their relative path
+    result, _, state = syncutils.sync_symlinks(target_folder, link_folder, depth=3)
+    assert result.created == [
+        (target_folder/'2016/.hidden', link_folder/'2016/.hidden'),
+        (target_folder/'2016/notes.txt', link_folder/'2016/notes.txt')
+    ]
+    assert state['mtime_ns'] is None
+    assert '2017/01/170101' in state['links']
+    (target_folder/'2017/01/170101').rmdir()
+    result, removed, state = syncutils.sync_symlinks(
+        target_folder, link_folder, state, depth=3
+    )
+    assert removed == [(target_folder/'2017/01/170101', link_folder/'2017/01/170101')]
+    assert '2017/01/170101' not in state['links']
+
+
+# @pytest.mark.only
+@pytest.mark.parametrize(
+    "mode", ['hardlink', 'reflink', 'copy']
+)
+def test_write_symlinks_link_mode(
+        mock_target_link_folders: Tuple[Path, list[Path], Path, list[Path]],
+        mode: str
+) -> None:
+    link_folder, link_paths, target_folder, target_paths = mock_target_link_folders
+    target_paths[1].write_text('test1')
+    (target_paths[0]/'test3.file').write_text('test3')
+    # Test that targets are written as files and folders, and only once
+    assert syncutils.write_symlinks(target_folder, link_folder, mode=mode) == 3
+    assert not any(link_path.is_symlink() for link_path in link_paths)
+    assert link_paths[1].read_text() == 'test1'
+    assert (link_paths[0]/'test3.file').read_text() == 'test3'
+    if mode == 'hardlink':
+        assert link_paths[1].samefile(target_paths[1])
+    assert syncutils.write_symlinks(target_folder, link_folder, mode=mode) == 0
+    assert syncutils.write_symlink(
+        target_paths[1], link_folder, mode=mode
+    ) == 0
+    # Test that a changed link path is a conflict and left unchanged
+    link_paths[1].unlink()
+    link_paths[1].write_text('changed')
+    plan = syncutils.plan_symlinks(
+        syncutils.list_targets(target_folder), link_folder, mode=mode
+    )
+    assert plan.conflicts == [(target_paths[1], link_paths[1])]
+    with pytest.raises(FileExistsError):
+        syncutils.write_symlink(target_paths[1], link_folder, mode=mode)
+    # Test that items added to a target folder, or missing after an interrupted
+    # copy, are written on the next run
+    (target_paths[0]/'sub').mkdir()
+    (target_paths[0]/'sub'/'test4.file').write_text('test4')
+    (link_paths[0]/'test3.file').unlink()
+    (link_folder/'.test0_dir.part').mkdir()
+    assert not syncutils.is_materialized(target_paths[0], link_paths[0], mode)
+    assert syncutils.write_symlinks(target_folder, link_folder, mode=mode) == 1
+    assert (link_paths[0]/'test3.file').read_text() == 'test3'
+    assert (link_paths[0]/'sub'/'test4.file').read_text() == 'test4'
+    assert syncutils.is_materialized(target_paths[0], link_paths[0], mode)
+    # Test that a folder with an item that differs from its target is a conflict
+    (link_paths[0]/'test3.file').unlink()
+    (link_paths[0]/'test3.file').write_text('changed')
+    plan = syncutils.plan_symlinks(
+        syncutils.list_targets(target_folder), link_folder, mode=mode
+    )
+    assert (target_paths[0], link_paths[0]) in plan.conflicts
+    # Test that copies of removed targets are deleted
+    target_paths[2].unlink()
+    assert syncutils.prune_symlinks(
+        [(target_paths[2], link_paths[2])], mode=mode
+    ) == [(target_paths[2], link_paths[2])]
+    assert not link_paths[2].exists()
+    with pytest.raises(ValueError):
+        syncutils.write_symlinks(target_folder, link_folder, mode='move')
+
+
+# @pytest.mark.only
+def test_copy_file(
+        tmp_path: Path
+) -> None:
+    source = tmp_path/'source.file'
+    source.write_bytes(os.urandom(10000))
+    os.utime(source, ns=(0, 10**9))
+    # Test that chunks copied by threads make the same file
+    syncutils.copy_file(source, tmp_path/'copy.file', workers=4, chunk_size=1024)
+    assert (tmp_path/'copy.file').read_bytes() == source.read_bytes()
+    assert (tmp_path/'copy.file').stat().st_mtime_ns == 10**9
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['copy.file', 'source.file']
+    with pytest.raises(FileExistsError):
+        syncutils.copy_file(source, tmp_path/'copy.file')
+    (tmp_path/'empty.file').touch()
+    syncutils.copy_file(tmp_path/'empty.file', tmp_path/'empty_copy.file')
+    assert (tmp_path/'empty_copy.file').read_bytes() == b''
+
+
 # @pytest.mark.only
 def test_write_symlink(
         mock_target_link_folders: Tuple[Path, list[Path], Path, list[Path]]
@@ -53,6 +53,36 @@ def test_format_datestring() -> None:
     ) == desired_output
 
 
+# @pytest.mark.only
+def test_format_datestrings() -> None:
+    original_dates = pd.Series(
+        ["01.09.2021", "01.09.2021", "02.09.2021", "01.09.2021"],
+        index=[3, 4, 5, 6]
+    )
+    formatted_dates = timeutils.format_datestrings(
+        original_dates,
+        "%d.%m.%Y",
+        "%Y-%m-%d"
+    )
+    assert list(formatted_dates.index) == [0, 1, 2, 3]
+    assert list(formatted_dates) == [
+        "2021-09-01", "2021-09-01", "2021-09-02", "2021-09-01"
+    ]
+    # Test that same errors are raised as for a single date
+    with pytest.raises(ValueError):
+        timeutils.format_datestrings(
+            ["01.09.2021", "2021-09-01"],
+            "%d.%m.%Y",
+            "%Y-%m-%d"
+        )
+    with pytest.raises(ValueError):
+        timeutils.format_datestrings(
+            ["01.09.2021", None],
+            "%d.%m.%Y",
+            "%Y-%m-%d"
+        )
+
+
 # @pytest.mark.only
 def test_timestamp_to_date_time() -> None:
     timestamps = ["2016-06-02 18:00"]
@@ -71,3 +101,48 @@ def test_timestamp_to_date_time() -> None:
         timestamps,
         sep
     ).equals(df)
+
+
+# @pytest.mark.only
+def test_parse_timestamps() -> None:
+    timestamps = pd.Series(
+        ["2016-06-02 18:00", "2016-06-02 18:10:30"],
+        index=[1, 2]
+    )
+    datetimes = timeutils.parse_timestamps(timestamps)
+    assert datetimes.dtype.kind == 'M'
+    assert list(datetimes.index) == [0, 1]
+    assert list(datetimes) == [
+        dt.datetime(2016, 6, 2, 18, 0),
+        dt.datetime(2016, 6, 2, 18, 10, 30)
+    ]
+    # Test explicit format
+    assert list(timeutils.parse_timestamps(
+        ["02.06.2016 18:00"],
+        timestamp_format="%d.%m.%Y %H:%M"
+    )) == [dt.datetime(2016, 6, 2, 18, 0)]
+    with pytest.raises(ValueError):
+        timeutils.parse_timestamps(["not a timestamp"])
+
+
+# @pytest.mark.only
+def test_datetime_to_date_time() -> None:
+    datetimes = pd.Series([
+        dt.datetime(2016, 6, 2, 0, 0),
+        dt.datetime(2016, 6, 2, 23, 59, 59),
+        dt.datetime(1969, 12, 31, 12, 30, 1),
+        dt.datetime(2017, 1, 1, 6, 5, 4, 900)
+    ])
+    df = timeutils.datetime_to_date_time(datetimes)
+    assert list(df.columns) == ['date', 'time']
+    assert list(df['date']) == [
+        "2016.06.02", "2016.06.02", "1969.12.31", "2017.01.01"
+    ]
+    assert list(df['time']) == [
+        "00:00:00", "23:59:59", "12:30:01", "06:05:04"
+    ]
+    # Test that missing values are not split
+    with pytest.raises(ValueError):
+        timeutils.datetime_to_date_time(
+            pd.Series([dt.datetime(2016, 6, 2), pd.NaT])
+        )
@@ -0,0 +1,152 @@
+import os
+from pathlib import Path
+from typing import Generator
+
+import pytest
+
+from modules import watchutils
+
+
+# @pytest.mark.only
+def test_scan_folder(
+        tmp_path: Generator[Path, None, None]
+) -> None:
+    (tmp_path/'aws_20160602.lst').write_text('1')
+    (tmp_path/'notes.txt').write_text('1')
+    (tmp_path/'sub.lst').mkdir()
+    snapshot = watchutils.scan_folder(tmp_path, '.lst')
+    assert list(snapshot) == ['aws_20160602.lst']
+    assert watchutils.scan_folder(tmp_path/'missing', '.lst') is None
+    # Test that new and modified files are found, removed files are ignored
+    (tmp_path/'aws_20160602.lst').write_text('12')
+    (tmp_path/'aws_20160603.lst').write_text('1')
+    assert watchutils.changed_names(
+        snapshot, watchutils.scan_folder(tmp_path, '.lst')
+    ) == {'aws_20160602.lst', 'aws_20160603.lst'}
+    assert watchutils.changed_names(snapshot, {}) == set()
+
+
+# @pytest.mark.only
+def test_debouncer() -> None:
+    debouncer = watchutils.Debouncer(debounce=2, max_wait=10)
+    debouncer.add('l1', {'a'}, now=0)
+    debouncer.add('l2', set(), now=0)
+    assert debouncer.ready(now=1) == {}
+    debouncer.add('l1', {'b'}, now=1)
+    assert debouncer.ready(now=2) == {}
+    assert debouncer.ready(now=3) == {'l1': {'a', 'b'}}
+    assert debouncer.ready(now=10) == {}
+    # Test that continuous changes are released after max_wait
+    for now in range(20, 31):
+        debouncer.add('l1', {'c'}, now=now)
+        released = debouncer.ready(now=now)
+    assert released == {'l1': {'c'}}
+
+
+# @pytest.mark.only
+def test_watch_folders(
+        tmp_path: Generator[Path, None, None]
+) -> None:
+    folder: Path = tmp_path/'raw'
+    folder.mkdir()
+    raw_file: Path = folder/'aws_20160602.lst'
+    writes = {
+        1: lambda: raw_file.write_text('1'),
+        2: lambda: raw_file.write_text('12'),
+        5: lambda: (folder/'aws_20160603.lst').write_text('1')
+    }
+    time = {'now': 0}
+    changes = []
+
+    def sleep(interval):
+        time['now'] += interval
+        writes.get(time['now'], lambda: None)()
+
+    watchutils.watch_folders(
+        {'l1': (folder, '.lst')},
+        lambda key, names: changes.append((time['now'], key, names)),
+        interval=1,
+        debounce=2,
+        max_polls=6,
+        clock=lambda: time['now'],
+        sleep=sleep
+    )
+    # Test that a burst of writes is reported once after it stopped
+    # and that changes pending after the last poll are reported
+    assert changes == [
+        (4, 'l1', {'aws_20160602.lst'}),
+        (6, 'l1', {'aws_20160603.lst'})
+    ]
+
+
+# @pytest.mark.only
+def test_watch_folders_unreadable(
+        tmp_path: Generator[Path, None, None],
+        monkeypatch: pytest.MonkeyPatch
+) -> None:
+    folder: Path = tmp_path/'raw'
+    folder.mkdir()
+    (folder/'aws_20160602.lst').write_text('1')
+    scandir = os.scandir
+    time = {'now': 0}
+    changes = []
+
+    def stale_scandir(path):
+        # the mount is stale at the second and third poll
+        if time['now'] in (2, 3):
+            raise OSError(116, 'Stale file handle')
+        return scandir(path)
+
+    def sleep(interval):
+        time['now'] += interval
+        if time['now'] == 3:
+            (folder/'aws_20160603.lst').write_text('1')
+
+    monkeypatch.setattr(watchutils.os, 'scandir', stale_scandir)
+    watchutils.watch_folders(
+        {'l1': (folder, '.lst')},
+        lambda key, names: changes.append((time['now'], key, names)),
+        interval=1,
+        debounce=1,
+        max_polls=6,
+        clock=lambda: time['now'],
+        sleep=sleep
+    )
+    # Test that an unreadable folder keeps its previous files, so that only
+    # files written during the outage are reported once it can be read again
+    assert changes == [(5, 'l1', {'aws_20160603.lst'})]
+
+
+# @pytest.mark.only
+def test_watch_folders_changing_folders(
+        tmp_path: Generator[Path, None, None]
+) -> None:
+    folders = {year: tmp_path/str(year) for year in (2026, 2027)}
+    for folder in folders.values():
+        folder.mkdir()
+    (folders[2027]/'aws_20270101.lst').write_text('1')
+    time = {'now': 0}
+    changes = []
+
+    def current_folders():
+        # the folder of the next year is added at the third poll
+        years = (2026, 2027) if time['now'] >= 3 else (2026,)
+        return {year: (folders[year], '.lst') for year in years}
+
+    def sleep(interval):
+        time['now'] += interval
+        if time['now'] == 4:
+            (folders[2027]/'aws_20270102.lst').write_text('1')
+
+    watchutils.watch_folders(
+        current_folders,
+        lambda key, names: changes.append((time['now'], key, names)),
+        interval=1,
+        debounce=1,
+        max_polls=6,
+        clock=lambda: time['now'],
+        sleep=sleep
+    )
+    # Test that the files of a folder added while watching are reported
+    # with the files written to it after
+    assert changes == [(5, 2027, {'aws_20270101.lst', 'aws_20270102.lst'})]